@@ -0,0 +1,8 @@
+"""
+The smart home energy analyzer. The analysis engine is the modules package; with the
+repository root on the path it is imported as smarthome.modules, without the GUI:
+
+    from smarthome.modules import EnergyAnalysis
+
+The command line tools and the GUI (main.py) are scripts run from this directory.
+"""
@@ -0,0 +1,152 @@
+"""
+Command line entry point for headless batch analysis.
+
+Evaluates every combination of load profile workbook and PVGIS meteorological file
+found in two directories and writes a single results table. With --sites, the PVGIS files
+are indexed by the site location in their headers instead, and every household is evaluated
+with the weather of its own location (its nearest site, or with --idw the inverse-distance
+weighted weather of several sites).
+
+Usage:
+    python batch.py data/load_profile_data data/meteorological_data -o results.csv
+    python batch.py LOAD_DIR MET_DIR --threshold 2.5 --threshold 3.0 -o results.csv
+    python batch.py LOAD_DIR MET_DIR --year -o yearly_results.csv
+    python batch.py LOAD_DIR MET_DIR --step-minutes 15 -o results_15min.csv
+    python batch.py LOAD_DIR MET_DIR --tariffs tariffs.json -o results.csv
+    python batch.py LOAD_DIR MET_DIR --workers 0 --chunk-size 32 -o results.csv
+    python batch.py LOAD_DIR MET_DIR --store -o results.csv
+    python batch.py LOAD_DIR MET_DIR --sites locations.csv --idw 3 -o results.csv
+    python batch.py LOAD_DIR MET_DIR --pv model --noct 45 --temperature-coefficient -0.004 -o results.csv
+    python batch.py LOAD_DIR MET_DIR --dispatch mpc --horizon 24 --forecast persistence --year -o results.csv
+    python batch.py LOAD_DIR MET_DIR --tariffs tariffs.json --dispatch mpc --mpc-tariff tou-weekday -o results.csv
+    python batch.py LOAD_DIR MET_DIR --instrument stages.json --profile stages.pstats -o results.csv
+"""
+
+import argparse
+import contextlib
+
+import pandas as pd
+
+from modules import instrument, trace
+from modules.analysis import EnergyAnalysis, PANEL_AREA, PANEL_EFFICIENCY, PEAK_END, PEAK_START
+from modules.mpc import FORECASTS, HORIZON_HOURS, MPCDispatch
+from modules.portfolio import PortfolioRunner
+from modules.pv import NOCT, SOURCES, TEMPERATURE_COEFFICIENT, PVSpec
+from modules.store import ResultStore, default_path
+from modules.tariff import load_tariffs
+from modules.time_grid import TimeGrid
+from modules.weather import WeatherLibrary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the energy analysis for every load profile and meteorological file.")
+    parser.add_argument('load_dir', help="Directory containing load profile (.xlsx) files")
+    parser.add_argument('met_dir', help="Directory containing PVGIS meteorological (.csv) files")
+    parser.add_argument('-o', '--output', default='results.csv', help="Output table (.csv)")
+    parser.add_argument('-t', '--threshold', type=float, action='append',
+                        help="Threshold value (kW); repeat to evaluate several thresholds (default: 3.0)")
+    parser.add_argument('--peak-start', type=int, default=PEAK_START, help="First peak hour")
+    parser.add_argument('--peak-end', type=int, default=PEAK_END, help="Last peak hour")
+    parser.add_argument('--solver', choices=['greedy', 'optimal'], default='greedy', help="Load shifting solver")
+    parser.add_argument('--year', action='store_true', help="Simulate every hour of the meteorological year instead of two seasons")
+    parser.add_argument('--step-minutes', type=int, default=60,
+                        help="Simulation step in minutes; must divide an hour (default: 60)")
+    parser.add_argument('--tariffs', metavar='JSON',
+                        help="Tariff definitions to price every result with (adds one cost column per tariff and profile)")
+    parser.add_argument('--store', nargs='?', const='', metavar='SQLITE',
+                        help="Reuse and save seasonal runs in a result store (default: results.sqlite in the cache directory)")
+    parser.add_argument('--sites', metavar='CSV',
+                        help="Household locations (columns Household, Latitude, Longitude); each household uses the weather of its location")
+    parser.add_argument('--idw', type=int, default=1, metavar='K',
+                        help="With --sites, interpolate the weather of a location between its K nearest sites (default: 1, the nearest site)")
+    parser.add_argument('--pv', choices=SOURCES,
+                        help="Charge the battery from the PV yield computed from G(i) and T2m ('model') or scaled from P ('pvgis') "
+                             "instead of the sun height")
+    parser.add_argument('--temperature-coefficient', type=float, default=TEMPERATURE_COEFFICIENT,
+                        help=f"With --pv model, change of the PV output per degree C above 25 C (default: {TEMPERATURE_COEFFICIENT})")
+    parser.add_argument('--noct', type=float, default=NOCT, help=f"With --pv model, nominal operating cell temperature (default: {NOCT})")
+    parser.add_argument('--dispatch', choices=['rules', 'mpc'], default='rules',
+                        help="Battery dispatch: the fixed charge and discharge rules, or a rolling horizon over the tariff prices")
+    parser.add_argument('--horizon', type=float, default=HORIZON_HOURS,
+                        help=f"With --dispatch mpc, hours planned at every step (default: {HORIZON_HOURS})")
+    parser.add_argument('--forecast', choices=FORECASTS, default='perfect',
+                        help="With --dispatch mpc, forecast of the load and solar output of the planned steps")
+    parser.add_argument('--mpc-tariff', metavar='NAME',
+                        help="With --dispatch mpc, plan against the prices of this tariff of --tariffs (default: the peak tariff)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="Worker processes (0: one per CPU)")
+    parser.add_argument('--chunk-size', type=int, default=16, help="Households per worker task")
+    parser.add_argument('--instrument', metavar='JSON', help="Write the wall time, CPU time, peak memory and rows of every stage")
+    parser.add_argument('--no-memory', action='store_true', help="With --instrument, skip the (slow) peak memory measurement")
+    parser.add_argument('--profile', metavar='PSTATS', help="Write a cProfile dump of the run (only with --workers 1)")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="Show the per-stage analysis output (-vv: also per-hour details and tables)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile and args.workers != 1:
+        raise SystemExit("--profile needs --workers 1; use --instrument for per-stage timings of parallel runs")
+    if args.sites and args.workers != 1:
+        raise SystemExit("--sites needs --workers 1")
+    if args.idw < 1:
+        raise SystemExit("--idw needs at least one site")
+    try:
+        grid = TimeGrid(args.step_minutes)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    tariffs = load_tariffs(args.tariffs) if args.tariffs else None
+    if args.store == '':
+        args.store = default_path()
+        if args.store is None:
+            raise SystemExit("--store without a path needs the cache directory; set it or give the store's path")
+    # The PV array is the battery's panel
+    pv = PVSpec(PANEL_AREA, PANEL_EFFICIENCY, args.temperature_coefficient, args.noct, args.pv) if args.pv else None
+    mpc_tariff = None
+    if args.mpc_tariff:
+        mpc_tariff = next((tariff for tariff in tariffs or [] if tariff.name == args.mpc_tariff), None)
+        if mpc_tariff is None:
+            raise SystemExit(f"--mpc-tariff {args.mpc_tariff} is not one of the tariffs of --tariffs")
+    try:
+        mpc = MPCDispatch(args.horizon, args.forecast, tariff=mpc_tariff) if args.dispatch == 'mpc' else None
+    except ValueError as e:
+        raise SystemExit(str(e))
+    thresholds = args.threshold or [3.0]
+    peak_hours = list(range(args.peak_start, args.peak_end + 1))
+    # The per-stage output is only useful for single runs; warnings are always shown
+    trace.set_level((trace.WARNING, trace.INFO, trace.DEBUG)[min(args.verbose, 2)])
+
+    instrumented = args.instrument or args.profile
+    with instrument.session(memory=not args.no_memory, profile=bool(args.profile)) if instrumented else contextlib.nullcontext() as run:
+        results = analyze(args, thresholds, peak_hours, grid, tariffs, pv, mpc)
+
+    results.to_csv(args.output, index=False)
+    print(f"Wrote {len(results)} rows to {args.output}")
+    if args.instrument:
+        run.to_json(args.instrument)
+        print(f"Wrote {len(run.records)} stage records to {args.instrument}")
+        print(run.summary().to_string(index=False))
+    if args.profile:
+        run.dump_stats(args.profile)
+        print(f"Wrote profile to {args.profile}")
+
+
+def analyze(args, thresholds, peak_hours, grid, tariffs, pv=None, mpc=None):
+    """Run the analysis serially or with the portfolio runner."""
+    if args.sites:
+        store = ResultStore(args.store) if args.store else None
+        library = WeatherLibrary.from_directory(args.met_dir, pv)
+        return EnergyAnalysis.analyze_located(args.load_dir, library, pd.read_csv(args.sites), thresholds, peak_hours,
+                                              args.solver, args.year, grid, tariffs, store, args.idw, mpc)
+    if args.workers != 1:
+        load_files = EnergyAnalysis.list_files(args.load_dir, '.xlsx')
+        met_files = EnergyAnalysis.list_files(args.met_dir, '.csv')
+        return PortfolioRunner.run(load_files, met_files, thresholds, peak_hours, args.solver, args.year,
+                                   args.workers or None, args.chunk_size, grid, tariffs, args.store, pv, mpc)
+    store = ResultStore(args.store) if args.store else None
+    return EnergyAnalysis.analyze_directories(args.load_dir, args.met_dir, thresholds, peak_hours, args.solver, args.year,
+                                              grid, tariffs, store, pv, mpc)
+
+
+if __name__ == "__main__":
+    main()
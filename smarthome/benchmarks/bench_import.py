@@ -0,0 +1,106 @@
+"""
+Benchmark of the import time of the analysis modules, as paid by every cold worker process.
+
+Each target is imported in a fresh interpreter, repeatedly, and the run records the time of
+the import itself, the wall time of the whole process (interpreter startup included) and
+which heavy GUI/plotting packages the import pulled in. The analysis modules must not load
+any of them: a core target that does fails the run (exit status 1), as does a slowdown
+against an earlier run beyond the tolerance (--compare).
+
+Targets:
+    modules: The package alone (lazy exports only)
+    modules.analysis: The analysis engine, as imported by batch.py and the portfolio workers
+    modules.portfolio: The portfolio runner
+    modules.plotting: The plots (matplotlib), for reference
+    main: The GUI module (Tkinter), for reference
+
+Usage (from the smarthome directory):
+    python benchmarks/bench_import.py -o import.json
+    python benchmarks/bench_import.py --repeats 20 -o new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import bench_pipeline
+
+SMARTHOME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ['modules', 'modules.analysis', 'modules.portfolio', 'modules.plotting', 'main']
+GUI_TARGETS = {'modules.plotting', 'main'}  # Targets allowed to load the heavy packages
+HEAVY_PACKAGES = ('matplotlib', 'tkinter', 'PIL')
+
+# Run in the fresh interpreter: time the import and list the heavy packages it loaded
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({target!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'import_s': elapsed, 'modules': len(sys.modules),
+                  'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def probe(target):
+    """Import a target in a fresh interpreter; returns its import time, process time and loaded modules."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', PROBE.format(target=target, heavy=HEAVY_PACKAGES)],
+                               cwd=SMARTHOME_DIR, capture_output=True, text=True)
+    process_s = time.perf_counter() - started
+    if completed.returncode:
+        raise RuntimeError(f"Importing {target} failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_s'] = process_s
+    return result
+
+
+def run(targets, repeats):
+    """Probe every target repeats times; returns the result rows."""
+    rows = []
+    for target in targets:
+        probes = [probe(target) for _ in range(repeats)]
+        row = bench_pipeline.summarize(target, [p['import_s'] for p in probes])
+        row['process_median_s'] = float(np.median([p['process_s'] for p in probes]))
+        row['modules'] = probes[-1]['modules']
+        row['heavy'] = probes[-1]['heavy']
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the import of the analysis modules in fresh interpreters.")
+    parser.add_argument('--targets', nargs='+', default=TARGETS, help="Modules to import")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-o', '--output', default='bench_import.json', help="Results file (.json)")
+    parser.add_argument('--compare', help="Results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Slowdown ratio above which a target is flagged with --compare (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    rows = run(args.targets, args.repeats)
+    results = {'metadata': bench_pipeline.metadata(), 'results': rows}
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(pd.DataFrame(rows).drop(columns=['appliances', 'years']).to_string(index=False))
+    print(f"\nWrote {len(rows)} results to {args.output}")
+
+    failed = False
+    for row in rows:
+        if row['heavy'] and row['stage'] not in GUI_TARGETS:
+            print(f"{row['stage']} imports {', '.join(row['heavy'])}; the analysis modules must not load GUI or plotting packages")
+            failed = True
+    if args.compare:
+        with open(args.compare) as f:
+            failed = bench_pipeline.compare(results, json.load(f), args.tolerance) or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark of the analysis pipeline stages on synthetic households and weather.
+
+Times each stage of a household analysis for appliance tables of increasing size and for
+weather files covering an increasing number of years, and writes the timings as JSON so
+that runs of different versions can be compared (--compare).
+
+Stages:
+    from_excel: ElectricLoad.from_excel on a synthetic workbook (parsed-file cache disabled)
+    from_csv: MeteorologicalData.from_csv on a synthetic PVGIS file (parsed-file cache disabled)
+    simulate_battery: Battery.simulate_battery for the winter profile
+    shift_loads: Calculations.shift_loads (greedy) of the battery profile
+    generate_adjusted_profile: Calculations.generate_adjusted_profile net of battery discharge
+    calculate_energy_cost: Calculations.calculate_energy_cost of the adjusted profile
+
+Usage (from the smarthome directory):
+    python benchmarks/bench_pipeline.py -o bench.json
+    python benchmarks/bench_pipeline.py --sizes 10 100 1000 10000 --years 1 5 --repeats 5 -o bench.json
+    python benchmarks/bench_pipeline.py -o new.json --compare old.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import cache, trace
+from modules.analysis import EnergyAnalysis
+from modules.calculations import Calculations
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+import generators
+
+THRESHOLD_FRACTION = 0.6    # Threshold as a fraction of the profile's peak load
+
+
+def time_stage(function, repeats):
+    """Run a stage repeats times and return its timings (s) and the result of the last run."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def summarize(stage, timings, appliances=None, years=None):
+    """One result row of the JSON output."""
+    return {
+        'stage': stage,
+        'appliances': appliances,
+        'years': years,
+        'repeats': len(timings),
+        'min_s': min(timings),
+        'median_s': float(np.median(timings)),
+        'mean_s': float(np.mean(timings)),
+    }
+
+
+def metadata():
+    """Versions and machine of the run, to tell results apart when comparing."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(sizes, years_list, repeats, seed, workdir):
+    """Time every stage; returns the result rows."""
+    rng = np.random.default_rng(seed)
+    peak_hours = EnergyAnalysis.default_peak_hours()
+    rows = []
+
+    # Weather parsing scales with the number of years
+    meteorological_df = None
+    for years in years_list:
+        met_path = os.path.join(workdir, f"weather_{years}y.csv")
+        generators.write_pvgis_csv(met_path, generators.weather(years, rng))
+        timings, (winter_met_df, _) = time_stage(lambda: MeteorologicalData.from_csv(met_path), repeats)
+        rows.append(summarize('from_csv', timings, years=years))
+        meteorological_df = winter_met_df if meteorological_df is None else meteorological_df
+
+    # The other stages scale with the number of appliances
+    for size in sizes:
+        workbook_path = os.path.join(workdir, f"household_{size}.xlsx")
+        generators.write_workbook(workbook_path, generators.appliance_table(size, rng))
+        timings, (profile_df, _) = time_stage(lambda: ElectricLoad.from_excel(workbook_path), repeats)
+        rows.append(summarize('from_excel', timings, appliances=size))
+
+        hourly = Calculations.generate_hourly_profile(profile_df)['Power (kW)']
+        max_load = hourly.max()
+        threshold = THRESHOLD_FRACTION * max_load
+
+        def simulate():
+            battery = EnergyAnalysis.create_battery(max_load)
+            return battery.simulate_battery(profile_df, meteorological_df, threshold, peak_hours)[0]
+
+        timings, battery_profile_df = time_stage(simulate, repeats)
+        rows.append(summarize('simulate_battery', timings, appliances=size))
+
+        timings, _ = time_stage(lambda: Calculations.shift_loads(battery_profile_df.copy(), threshold, peak_hours), repeats)
+        rows.append(summarize('shift_loads', timings, appliances=size))
+
+        timings, adjusted_df = time_stage(lambda: Calculations.generate_adjusted_profile(profile_df, battery_profile_df), repeats)
+        rows.append(summarize('generate_adjusted_profile', timings, appliances=size))
+
+        timings, _ = time_stage(lambda: Calculations.calculate_energy_cost(adjusted_df, peak_hours), repeats)
+        rows.append(summarize('calculate_energy_cost', timings, appliances=size))
+
+    return rows
+
+
+def compare(results, baseline, tolerance):
+    """Print the median timings of both runs side by side and flag stages slower than the tolerance."""
+    key = lambda row: (row['stage'], row['appliances'], row['years'])
+    old = {key(row): row['median_s'] for row in baseline['results']}
+    table = []
+    for row in results['results']:
+        if key(row) in old:
+            ratio = row['median_s'] / old[key(row)] if old[key(row)] else float('inf')
+            table.append({'Stage': row['stage'], 'Appliances': row['appliances'], 'Years': row['years'],
+                          'Baseline (s)': old[key(row)], 'Current (s)': row['median_s'], 'Ratio': round(ratio, 2),
+                          'Regression': ratio > 1 + tolerance})
+    table = pd.DataFrame(table)
+    print(f"\nCompared with {baseline['metadata'].get('commit') or 'baseline'}:")
+    print(table.to_string(index=False) if len(table) else "No common stages.")
+    return bool(len(table)) and table['Regression'].any()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the analysis pipeline stages on synthetic inputs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help="Appliances per household")
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5], help="Years of weather per file")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='bench_pipeline.json', help="Results file (.json)")
+    parser.add_argument('--compare', help="Results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Slowdown ratio above which a stage is flagged with --compare (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Time the parsers themselves, and keep the stage output out of the timings
+    os.environ[cache.CACHE_DIR_ENV] = ''
+    trace.set_level(trace.OFF)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = run(args.sizes, args.years, args.repeats, args.seed, workdir)
+    results = {'metadata': metadata(), 'results': rows}
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print(f"\nWrote {len(rows)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the optimal load-shifting solver against the greedy shift.
+
+For random appliance profiles of increasing size, both solvers shift the same profile and
+the run time, tariff cost (calculate_energy_cost) and load above the threshold are compared.
+
+Usage (from the smarthome directory):
+    python benchmarks/bench_shift_solver.py
+    python benchmarks/bench_shift_solver.py --sizes 30 100 300 --time-budget 0.5 --threshold 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import trace
+from modules.analysis import EnergyAnalysis
+from modules.calculations import Calculations
+
+
+def random_profile(n_appliances, rng):
+    """Random appliance table with the columns of a seasonal load profile."""
+    start = rng.integers(0, 24, n_appliances)
+    duration = rng.integers(1, 6, n_appliances)
+    return pd.DataFrame({
+        'Name': [f"Appliance {i}" for i in range(n_appliances)],
+        'Rated Power (kW)': rng.choice([0.05, 0.1, 0.2, 0.75, 1.2, 1.75, 2.0], n_appliances),
+        'Priority Group': rng.integers(1, 6, n_appliances),
+        'Start': start.astype(float),
+        'End': ((start + duration) % 24).astype(float),
+    })
+
+
+def evaluate(profile_df, threshold, peak_hours):
+    """Tariff cost and total load above the threshold of a shifted profile."""
+    hourly_df = Calculations.generate_hourly_profile(profile_df)
+    cost = Calculations.calculate_energy_cost(hourly_df, peak_hours)
+    return cost, np.maximum(hourly_df['Power (kW)'].to_numpy() - threshold, 0.0).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the greedy and optimal load-shifting solvers.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 100, 300])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Threshold (kW); defaults to 30%% of each profile's peak load")
+    parser.add_argument('--time-budget', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    trace.set_level(trace.OFF)
+    rng = np.random.default_rng(args.seed)
+    peak_hours = EnergyAnalysis.default_peak_hours()
+    rows = []
+    for size in args.sizes:
+        for repeat in range(args.repeats):
+            profile_df = random_profile(size, rng)
+            threshold = args.threshold
+            if threshold is None:
+                threshold = 0.3 * Calculations.generate_hourly_profile(profile_df)['Power (kW)'].max()
+
+            row = {'Appliances': size, 'Repeat': repeat, 'Threshold': round(threshold, 3)}
+            for solver in ('greedy', 'optimal'):
+                started = time.perf_counter()
+                shifted_df = Calculations.shift_loads(profile_df.copy(), threshold, peak_hours, solver, args.time_budget)
+                elapsed = time.perf_counter() - started
+                cost, excess = evaluate(shifted_df, threshold, peak_hours)
+                row[f'{solver} time (s)'] = round(elapsed, 4)
+                row[f'{solver} cost'] = cost
+                row[f'{solver} excess (kWh)'] = round(excess, 3)
+            rows.append(row)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    print("\nMean by size:")
+    print(results.drop(columns=['Repeat']).groupby('Appliances').mean().round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
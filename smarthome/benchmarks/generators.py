@@ -0,0 +1,145 @@
+"""
+Synthetic inputs for the benchmarks: appliance tables and PVGIS-style weather.
+
+The appliance tables have the columns of the load profile workbooks, with mixed priority
+groups, intervals that wrap around midnight, appliances that run all day and appliances
+that are unused in one season. The weather follows the PVGIS hourly CSV layout read by
+MeteorologicalData (metadata header, 'time,P,G(i),H_sun,T2m,WS10m,Int' rows and a text
+footer), with sun height from the solar geometry of the site and random cloud cover, over
+any number of years.
+
+Functions:
+    appliance_table(n_appliances, rng): Appliance table in the workbook layout
+    season_profile(n_appliances, rng, season): Cleaned single-season table, as from ElectricLoad.from_excel
+    write_workbook(path, table): Writes an appliance table as a load profile workbook
+    weather(years, rng, start_year, latitude): Hourly PVGIS columns over whole years
+    write_pvgis_csv(path, weather_df, latitude, longitude): Writes weather as a PVGIS hourly CSV file
+"""
+
+import numpy as np
+import pandas as pd
+
+POWERS = [0.02, 0.05, 0.1, 0.2, 0.5, 0.75, 1.2, 1.75, 2.0, 3.0]  # kW
+PRIORITY_GROUPS = [1, 2, 3, 4, 5]
+
+
+def _intervals(n_appliances, rng):
+    """Start and end hours: mostly 1-8 hour runs (wrapping around midnight when they pass it),
+    about 5% running all day and about 5% unused (0, 0)."""
+    start = rng.integers(0, 24, n_appliances).astype(float)
+    end = (start + rng.integers(1, 9, n_appliances)) % 24
+    kind = rng.random(n_appliances)
+    start[kind < 0.05], end[kind < 0.05] = 0.0, 24.0
+    start[(kind >= 0.05) & (kind < 0.10)], end[(kind >= 0.05) & (kind < 0.10)] = 0.0, 0.0
+    return start, end
+
+
+def appliance_table(n_appliances, rng):
+    """
+    Random appliance table in the layout of the load profile workbooks.
+
+    Args:
+        n_appliances (int): Number of appliances.
+        rng (Generator): NumPy random generator.
+
+    Returns:
+        DataFrame: Name, Rated Power (kW), Priority Group and winter and summer start and end hours.
+    """
+    winter_start, winter_end = _intervals(n_appliances, rng)
+    summer_start, summer_end = _intervals(n_appliances, rng)
+    return pd.DataFrame({
+        'Name': [f"Appliance {i}" for i in range(n_appliances)],
+        'Rated Power (kW)': rng.choice(POWERS, n_appliances),
+        'Priority Group': rng.choice(PRIORITY_GROUPS, n_appliances),
+        'Winter Hours Start': winter_start,
+        'Winter Hours End': winter_end,
+        'Summer Hours Start': summer_start,
+        'Summer Hours End': summer_end,
+    })
+
+
+def season_profile(n_appliances, rng, season='winter'):
+    """Random single-season table with the columns returned by ElectricLoad.from_excel."""
+    table = appliance_table(n_appliances, rng)
+    prefix = season.capitalize()
+    profile = table[['Name', 'Rated Power (kW)', 'Priority Group', f'{prefix} Hours Start', f'{prefix} Hours End']]
+    profile = profile.rename(columns={f'{prefix} Hours Start': 'Start', f'{prefix} Hours End': 'End'})
+    return profile[(profile['Start'] != 0) | (profile['End'] != 0)]
+
+
+def write_workbook(path, table):
+    """Write an appliance table as a load profile workbook (.xlsx)."""
+    table.to_excel(path, index=False)
+
+
+def weather(years, rng, start_year=2023, latitude=41.0):
+    """
+    Hourly PVGIS columns over whole years.
+
+    Args:
+        years (int): Number of years.
+        rng (Generator): NumPy random generator.
+        start_year (int): First year.
+        latitude (float): Site latitude (decimal degrees), for the sun height.
+
+    Returns:
+        DataFrame: time (PVGIS 'YYYYMMDD:HHMM' strings), P (W), G(i) (W/m2), H_sun (degrees),
+        T2m (degrees Celsius), WS10m (m/s) and Int columns.
+    """
+    times = pd.date_range(f"{start_year}-01-01", f"{start_year + years}-01-01", freq='h', inclusive='left')
+    times = times + pd.Timedelta(minutes=10)  # PVGIS timestamps are at ten past the hour
+    day = times.dayofyear.to_numpy()
+    hour = times.hour.to_numpy() + times.minute.to_numpy() / 60
+
+    # Sun height from the solar declination and the hour angle
+    declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day) / 365)
+    hour_angle = np.radians(15 * (hour - 12))
+    phi = np.radians(latitude)
+    sin_height = np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.cos(hour_angle)
+    sun_height = np.degrees(np.arcsin(np.clip(sin_height, -1, 1)))
+    sun_height = np.where(sun_height > 0, sun_height, 0.0)
+
+    # Irradiance on the panel with a cloud cover that changes from day to day
+    cloud = np.repeat(rng.beta(4, 2, len(times) // 24 + 1), 24)[:len(times)]
+    irradiance = np.where(sun_height > 0, 1000 * np.sin(np.radians(sun_height)) * cloud, 0.0)
+    temperature = (15 - 10 * np.cos(2 * np.pi * (day - 15) / 365) + 4 * np.sin(2 * np.pi * (hour - 9) / 24)
+                   + rng.normal(0, 1.5, len(times)))
+
+    return pd.DataFrame({
+        'time': times.strftime('%Y%m%d:%H%M'),
+        'P': np.round(irradiance * 3, 1),  # 3 kWp system
+        'G(i)': np.round(irradiance, 2),
+        'H_sun': np.round(sun_height, 2),
+        'T2m': np.round(temperature, 2),
+        'WS10m': np.round(rng.gamma(2, 1.2, len(times)), 2),
+        'Int': 0.0,
+    })
+
+
+def write_pvgis_csv(path, weather_df, latitude=41.0, longitude=28.9):
+    """Write weather as a PVGIS hourly CSV file (10 metadata lines, the rows, then the legend footer)."""
+    header = [
+        f"Latitude (decimal degrees):\t{latitude:.3f}",
+        f"Longitude (decimal degrees):\t{longitude:.3f}",
+        "Elevation (m):\t0",
+        "Radiation database:\tSYNTHETIC",
+        "",
+        "",
+        "Slope: 34 deg. ",
+        "Azimuth: 0 deg. ",
+        "Nominal power of the PV system (c-Si) (kWp):\t3.0",
+        "System losses (%):\t0.0",
+    ]
+    footer = [
+        "",
+        "P: PV system power (W)",
+        "G(i): Global irradiance on the inclined plane (plane of the array) (W/m2)",
+        "H_sun: Sun height (degree)",
+        "T2m: 2-m air temperature (degree Celsius)",
+        "WS10m: 10-m total wind speed (m/s)",
+        "Int: 1 means solar radiation values are reconstructed",
+    ]
+    with open(path, 'w', newline='') as f:
+        f.write("\n".join(header) + "\n")
+        weather_df.to_csv(f, index=False, lineterminator="\n")
+        f.write("\n".join(footer) + "\n")
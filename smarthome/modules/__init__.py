@@ -0,0 +1,51 @@
+"""
+The smart home analysis engine: load profiles, meteorological data, battery dispatch,
+load shifting and costs, without any GUI or plotting dependency.
+
+Importing the package (or any analysis module) loads only NumPy and pandas; matplotlib is
+imported by modules.plotting alone, and Tkinter only by the GUI (main.py). The main classes
+are available from the package itself and are imported on first use, so that, for example,
+a worker that only needs the battery kernel does not import the portfolio runner:
+
+    from modules import EnergyAnalysis
+    results = EnergyAnalysis.analyze_household(load_file_path, met_file_path, threshold)
+
+From the repository root, the same package is smarthome.modules.
+"""
+
+import importlib
+
+# Public name -> module that defines it, imported on first access
+_EXPORTS = {
+    'EnergyAnalysis': 'analysis',
+    'ApplianceTable': 'appliances',
+    'Battery': 'battery',
+    'Calculations': 'calculations',
+    'ElectricLoad': 'load_profile',
+    'MeteorologicalData': 'met_data',
+    'MonteCarlo': 'montecarlo',
+    'MPCDispatch': 'mpc',
+    'PVGISStream': 'met_stream',
+    'PortfolioRunner': 'portfolio',
+    'PVModel': 'pv',
+    'PVSpec': 'pv',
+    'BatterySweep': 'sweep',
+    'ResultStore': 'store',
+    'TimeGrid': 'time_grid',
+    'HOURLY': 'time_grid',
+    'WeatherLibrary': 'weather',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
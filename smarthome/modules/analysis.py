@@ -0,0 +1,526 @@
+"""
+This module provides a GUI-free analysis engine for the smart home energy pipeline.
+It runs the same stages as the Energy Analyzer window (load profile, meteorological data,
+battery simulation, load shifting and cost calculation) without Tkinter, so the analysis
+can be scripted or run in batch over many households. Every stage is recorded by the
+instrument module while an instrumentation session is active.
+
+Optional inputs of the analyses:
+    - TimeGrid (time_grid.py): Simulates the day in steps shorter than an hour (default: hourly).
+    - ResultStore (store.py): Reads seasonal runs with the same input files and parameters
+      from the store instead of recomputing them.
+    - PVSpec (pv.py): Charges the battery from the PV yield of the panel instead of the
+      averaged sun height.
+    - MPCDispatch (mpc.py): Dispatches the battery with a rolling horizon over the tariff
+      prices instead of the fixed charge and discharge rules.
+
+Classes:
+    EnergyAnalysis: A class containing static methods to analyze one season, one household
+      or every combination of load profile and meteorological files in two directories.
+Methods:
+    create_battery(max_load): Creates a battery sized from the maximum hourly load
+    battery_parameters(): The battery sizing constants (part of the key of stored runs)
+    dispatch_tariff(mpc, peak_hours): The tariff a rolling-horizon dispatch plans against
+    analyze_season(profile_df, meteorological_df, threshold, peak_hours, mpc): Analyzes one season
+    analyze_household(load_file_path, met_file_path, threshold, peak_hours): Analyzes both seasons
+    iter_household(load_file_path, met_file_path, threshold, peak_hours, store, pv, mpc): Yields each season's result when done
+    read_seasonal_meteorology(met_path, pv): Reads the winter and summer irradiance of a meteorological file
+    analyze_year(profiles, hourly_met_df, threshold, peak_hours, mpc): Simulates the battery over a full year
+    analyze_directories(load_dir, met_dir, thresholds, peak_hours, store, pv, mpc): Analyzes every combination
+    analyze_located(load_dir, library, locations, thresholds, peak_hours, store, k): Analyzes every household
+      with the weather of its location
+    read_load_profile(load_path): Reads the seasonal appliance tables of a load profile file
+    tariff_matrices(tariffs, grid): Compiles tariffs for the representative day of each season
+    tariff_costs(profiles, matrix): Costs of a result's profiles under every compiled tariff
+
+Constants:
+    - PEAK_START: The start hour for peak pricing (17:00).
+    - PEAK_END: The end hour for peak pricing (22:00).
+    - SEASONS: The seasons analyzed for each household.
+    - SEASON_MONTHS: The months each season's representative day stands for (for seasonal tariffs).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import instrument, trace
+from .appliances import ApplianceTable
+from .battery import Battery
+from .calculations import Calculations
+from .load_profile import ElectricLoad
+from .met_data import SUMMER_SCHEDULE_MONTHS, MeteorologicalData
+from .pv import PVModel
+from .tariff import TariffMatrix
+from .time_grid import HOURLY
+
+PEAK_START = 17
+PEAK_END = 22
+SEASONS = ('winter', 'summer')
+SEASON_MONTHS = {
+    'winter': [month for month in range(1, 13) if month not in SUMMER_SCHEDULE_MONTHS],
+    'summer': SUMMER_SCHEDULE_MONTHS,
+}
+
+# Battery sizing used for every household
+CAPACITY_FACTOR = 0.5   # Capacity as a fraction of the maximum hourly load
+INITIAL_SOC_FACTOR = 0.1    # Initial SoC as a fraction of capacity
+CHARGE_RATE = 0.2   # kW
+DISCHARGE_RATE = 0.3    # kW
+PANEL_AREA = 10     # m^2
+PANEL_EFFICIENCY = 0.70
+
+
+class EnergyAnalysis:
+
+    @staticmethod
+    def default_peak_hours():
+        """Return the list of peak hours used by the tariff."""
+        return list(range(PEAK_START, PEAK_END + 1))
+
+    @staticmethod
+    def create_battery(max_load):
+        """
+        Create a battery sized from the maximum hourly load of a profile.
+
+        Args:
+            max_load (float): The maximum hourly load of the profile (kW).
+
+        Returns:
+            Battery: A new battery instance.
+        """
+        capacity = max_load * CAPACITY_FACTOR
+        return Battery(
+            capacity=capacity,
+            charge_rate=CHARGE_RATE,
+            discharge_rate=DISCHARGE_RATE,
+            soc=capacity * INITIAL_SOC_FACTOR,
+            panel_area=PANEL_AREA,
+            panel_efficiency=PANEL_EFFICIENCY,
+        )
+
+    @staticmethod
+    def battery_parameters():
+        """Return the battery sizing constants, which together with the inputs decide a run's results."""
+        return {
+            'capacity_factor': CAPACITY_FACTOR,
+            'initial_soc_factor': INITIAL_SOC_FACTOR,
+            'charge_rate': CHARGE_RATE,
+            'discharge_rate': DISCHARGE_RATE,
+            'panel_area': PANEL_AREA,
+            'panel_efficiency': PANEL_EFFICIENCY,
+        }
+
+    @staticmethod
+    def dispatch_tariff(mpc, peak_hours):
+        """Return the tariff whose prices a rolling-horizon dispatch plans against: its own, or the default one."""
+        return mpc.tariff if mpc.tariff is not None else Calculations.default_tariff(peak_hours)
+
+    @staticmethod
+    def analyze_season(profile_df, meteorological_df, threshold, peak_hours, solver='greedy', grid=HOURLY, mpc=None):
+        """
+        Run the battery simulation, load shifting and cost calculation for one season.
+
+        Args:
+            profile_df (ApplianceTable or DataFrame): Appliance profile for the season.
+            meteorological_df (DataFrame): Hourly solar irradiance for the season.
+            threshold (float): Maximum allowable load in any hour.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            grid (TimeGrid): Time steps of the simulated day.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon over the prices of its tariff
+              (by default the tariff of the costs) instead of the rules.
+
+        Returns:
+            dict: Hourly profiles, SoC log, shifted profile (as a DataFrame with the battery
+            discharge rows) and costs for the season.
+        """
+        # The stages work on the arrays of the table; DataFrames are only built for the result
+        profile = ApplianceTable.of(profile_df)
+        with instrument.stage('generate_adjusted_profile', rows=len(profile)):
+            original_hourly = Calculations.generate_adjusted_profile(profile, grid=grid)
+        max_load = max(original_hourly['Power (kW)'])
+        trace.info("Max load set to: %s", max_load)
+
+        battery = EnergyAnalysis.create_battery(max_load)
+        prices = EnergyAnalysis.dispatch_tariff(mpc, peak_hours).day_prices(grid) if mpc else None
+        with instrument.stage('simulate_battery', rows=len(profile)):
+            battery_profile, soc_df = battery.simulate_battery(profile, meteorological_df, threshold, peak_hours, grid, mpc, prices)
+        # The shifted table has its own timings, so the battery profile keeps the original ones
+        with instrument.stage('shift_loads', rows=len(battery_profile)):
+            shifted_profile = Calculations.shift_loads(battery_profile, threshold, peak_hours, solver, grid=grid)
+
+        with instrument.stage('generate_adjusted_profile', rows=2 * len(profile)):
+            battery_hourly = Calculations.generate_adjusted_profile(profile, battery_profile, grid)
+            shifted_hourly = Calculations.generate_adjusted_profile(shifted_profile, battery_profile, grid)
+
+        with instrument.stage('calculate_energy_cost', rows=3 * grid.steps):
+            original_cost = Calculations.calculate_energy_cost(original_hourly, peak_hours, grid)
+            battery_cost = Calculations.calculate_energy_cost(battery_hourly, peak_hours, grid)
+            shifted_cost = Calculations.calculate_energy_cost(shifted_hourly, peak_hours, grid)
+
+        return {
+            'original_hourly': original_hourly,
+            'battery_hourly': battery_hourly,
+            'shifted_hourly': shifted_hourly,
+            'shifted_profile': shifted_profile.to_frame(),
+            'meteorological': meteorological_df,
+            'soc': soc_df,
+            'original_cost': original_cost,
+            'battery_cost': battery_cost,
+            'shifted_cost': shifted_cost,
+        }
+
+    @staticmethod
+    def analyze_household(load_file_path, met_file_path, threshold, peak_hours=None, solver='greedy', grid=HOURLY,
+                          store=None, pv=None, mpc=None):
+        """
+        Analyze both seasons of one household.
+
+        Args:
+            load_file_path (str): Path to the load profile Excel file.
+            met_file_path (str): Path to the PVGIS meteorological CSV file.
+            threshold (float): Maximum allowable load in any hour.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            grid (TimeGrid): Time steps of the simulated day.
+            store (ResultStore): Store to read the run from, or to save it to once computed.
+            pv (PVSpec): Charge the battery from the PV yield of this array instead of the sun height.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon instead of the rules.
+
+        Returns:
+            dict: Season name mapped to the result of analyze_season.
+        """
+        return dict(EnergyAnalysis.iter_household(load_file_path, met_file_path, threshold, peak_hours, solver, grid, store,
+                                                  pv, mpc))
+
+    @staticmethod
+    def iter_household(load_file_path, met_file_path, threshold, peak_hours=None, solver='greedy', grid=HOURLY,
+                       store=None, pv=None, mpc=None):
+        """
+        Analyze both seasons of one household, yielding each season's result as soon as it is done
+        (e.g. to show the winter results while the summer is still running). A run found in the
+        store is yielded without being recomputed; a computed run is saved once both seasons are done.
+
+        Yields:
+            tuple: Season name and the result of analyze_season.
+        """
+        peak_hours = peak_hours or EnergyAnalysis.default_peak_hours()
+        key, stored = EnergyAnalysis.lookup(store, load_file_path, met_file_path, threshold, peak_hours, solver, grid, pv, mpc)
+        if stored is not None:
+            yield from stored.items()
+            return
+
+        results = {}
+        with instrument.stage('household'):
+            profiles = EnergyAnalysis.read_load_profile(load_file_path)
+            meteorological = EnergyAnalysis.read_seasonal_meteorology(met_file_path, pv)
+
+            for season, profile_df, meteorological_df in zip(SEASONS, profiles, meteorological):
+                trace.info("\n===================%s PROFILE===================\n", season.upper())
+                with instrument.stage('season', season=season):
+                    result = EnergyAnalysis.analyze_season(profile_df, meteorological_df, threshold, peak_hours, solver, grid, mpc)
+                results[season] = result
+                yield season, result
+        if store is not None:
+            store.put(key, results)
+
+    @staticmethod
+    def read_seasonal_meteorology(met_path, pv=None):
+        """
+        Read the winter and summer profiles of a meteorological file: the averaged sun height of
+        MeteorologicalData.from_csv (the 'from_csv' stage), or with a PVSpec the PV yield of
+        PVModel.seasonal_profiles (the 'pv_yield' stage).
+        """
+        with instrument.stage('pv_yield' if pv else 'from_csv') as stage:
+            meteorological = PVModel.seasonal_profiles(met_path, pv) if pv else MeteorologicalData.from_csv(met_path)
+            stage['rows'] = sum(len(df) for df in meteorological)
+        return meteorological
+
+    @staticmethod
+    def lookup(store, load_path, met_path, threshold, peak_hours, solver, grid, pv=None, mpc=None):
+        """
+        Look a run up in a result store (the 'store_lookup' stage). Runs with a PV yield or a
+        rolling-horizon dispatch are keyed by their settings as well.
+
+        Returns:
+            tuple: Key of the run and its stored results (None when not stored), or (None, None)
+            without a store.
+        """
+        if store is None:
+            return None, None
+        with instrument.stage('store_lookup'):
+            battery = EnergyAnalysis.battery_parameters()
+            if pv is not None:
+                battery['pv'] = pv.to_dict()
+            if mpc is not None:
+                battery['mpc'] = mpc.to_dict()
+            key = store.key(load_path, met_path, threshold, peak_hours, solver, grid, battery)
+            return key, store.get(key)
+
+    @staticmethod
+    def analyze_year(profiles, hourly_met_df, threshold, peak_hours, grid=HOURLY, mpc=None):
+        """
+        Simulate the battery over every hour of the meteorological year.
+
+        Args:
+            profiles (tuple): Winter and summer appliance tables (see read_load_profile).
+            hourly_met_df (DataFrame): Hourly rows from MeteorologicalData.read_hourly.
+            threshold (float): Maximum allowable load in any hour.
+            peak_hours (list): List of hours considered as peak hours.
+            grid (TimeGrid): Time steps of each day.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon over the prices of its tariff
+              (by default the tariff of the costs) instead of the rules.
+
+        Returns:
+            dict: The simulation (one row per step) and the yearly costs without and with the battery.
+        """
+        winter_profile_df, summer_profile_df = profiles
+        max_load = max(Calculations.generate_hourly_profile(profile_df, grid)['Power (kW)'].max() for profile_df in profiles)
+        battery = EnergyAnalysis.create_battery(max_load)
+        prices = None
+        if mpc:
+            # Rates change by the hour, so every step of an hour has the price of the hour
+            hourly_prices = TariffMatrix.timeline([EnergyAnalysis.dispatch_tariff(mpc, peak_hours)], hourly_met_df['time']).import_prices[0]
+            prices = np.repeat(hourly_prices, grid.steps_per_hour)
+        with instrument.stage('simulate_year', season='year', rows=len(hourly_met_df) * grid.steps_per_hour):
+            year_df = battery.simulate_year(winter_profile_df, summer_profile_df, hourly_met_df, threshold, peak_hours, grid,
+                                            mpc, prices)
+
+        with instrument.stage('calculate_energy_cost', season='year', rows=len(year_df)):
+            tariff = TariffMatrix.timeline([Calculations.default_tariff(peak_hours)], year_df['time'], grid.step_hours)
+            load = year_df['Load (kW)'].to_numpy()
+            costs = tariff.cost(np.array([load, load - year_df['Discharge (kW)'].to_numpy()]))[:, 0]
+            original_cost, battery_cost = round(float(costs[0]), 2), round(float(costs[1]), 2)
+        return {
+            'hourly': year_df,
+            'original_cost': original_cost,
+            'battery_cost': battery_cost,
+        }
+
+    @staticmethod
+    def analyze_directories(load_dir, met_dir, thresholds, peak_hours=None, solver='greedy', year=False, grid=HOURLY,
+                            tariffs=None, store=None, pv=None, mpc=None):
+        """
+        Analyze every combination of load profile and meteorological file in two directories.
+
+        Each file is parsed once, then every (load profile, meteorological file, threshold)
+        combination is evaluated for both seasons, or over the whole year when year is set.
+
+        Args:
+            load_dir (str): Directory containing load profile Excel files.
+            met_dir (str): Directory containing PVGIS meteorological CSV files.
+            thresholds (list): Threshold values to evaluate.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            year (bool): Run the full-year hourly simulation instead of the two seasons.
+            grid (TimeGrid): Time steps of the simulated day.
+            tariffs (list): Tariffs to price every result with, in addition to the default tariff.
+            store (ResultStore): Store of seasonal runs, read before and written after each run.
+            pv (PVSpec): Charge the battery from the PV yield of this array instead of the sun height.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon instead of the rules.
+
+        Returns:
+            DataFrame: One row per household, meteorological file, threshold and season.
+        """
+        peak_hours = peak_hours or EnergyAnalysis.default_peak_hours()
+        load_files = EnergyAnalysis.list_files(load_dir, '.xlsx')
+        met_files = EnergyAnalysis.list_files(met_dir, '.csv')
+        if not load_files or not met_files:
+            raise ValueError(f"No load profile (.xlsx) files in {load_dir} or no meteorological (.csv) files in {met_dir}")
+
+        meteorological = EnergyAnalysis.read_meteorology(met_files, year, pv)
+
+        rows = []
+        for load_path in load_files:
+            rows.extend(EnergyAnalysis.analyze_load_file(load_path, meteorological, thresholds, peak_hours, solver, year, grid,
+                                                         tariffs, store, pv, mpc))
+
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def analyze_located(load_dir, library, locations, thresholds, peak_hours=None, solver='greedy', year=False, grid=HOURLY,
+                        tariffs=None, store=None, k=1, mpc=None):
+        """
+        Analyze every load profile file in a directory with the weather of its household's location.
+
+        Args:
+            load_dir (str): Directory containing load profile Excel files.
+            library (WeatherLibrary): Meteorological files indexed by site location (see weather.py).
+            locations (DataFrame): 'Household' (load profile file name without extension), 'Latitude'
+              and 'Longitude' of every household.
+            thresholds (list): Threshold values to evaluate.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            year (bool): Run the full-year hourly simulation instead of the two seasons.
+            grid (TimeGrid): Time steps of the simulated day.
+            tariffs (list): Tariffs to price every result with (see analyze_load_file).
+            store (ResultStore): Store of seasonal runs; only runs with the weather of a single site are stored.
+            k (int): Sites to interpolate the weather of a location between (1: its nearest site).
+              With a PVSpec on the library, the weather is the PV yield of its sites.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon instead of the rules.
+
+        Returns:
+            DataFrame: One row per household, threshold and season, with the distance to the nearest site.
+        """
+        peak_hours = peak_hours or EnergyAnalysis.default_peak_hours()
+        load_files = EnergyAnalysis.list_files(load_dir, '.xlsx')
+        if not load_files:
+            raise ValueError(f"No load profile (.xlsx) files in {load_dir}")
+        positions = locations.drop_duplicates('Household', keep='last').set_index('Household')
+        households = [os.path.splitext(os.path.basename(path))[0] for path in load_files]
+        missing = [household for household in households if household not in positions.index]
+        if missing:
+            raise ValueError(f"No location for the households: {', '.join(missing)}")
+
+        rows = []
+        for load_path, household in zip(load_files, households):
+            latitude, longitude = (float(positions.at[household, column]) for column in ('Latitude', 'Longitude'))
+            with instrument.stage('weather_lookup'):
+                sites, _, distances = library.weights(latitude, longitude, k)
+                met_data = library.hourly(latitude, longitude, k) if year else library.profiles(latitude, longitude, k)
+            label = library.label(latitude, longitude, k)
+            household_rows = EnergyAnalysis.analyze_load_file(load_path, {label: met_data}, thresholds, peak_hours, solver,
+                                                              year, grid, tariffs, store if len(sites) == 1 else None, library.pv,
+                                                              mpc)
+            for row in household_rows:
+                row['Site Distance (km)'] = round(float(distances[0]), 3)
+            rows.extend(household_rows)
+
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def read_meteorology(met_files, year=False, pv=None):
+        """
+        Parse every meteorological file once: seasonal profiles, or hourly rows when year is set;
+        with a PVSpec, the PV yield of the array (see pv.py).
+        """
+        if year:
+            read_met = PVModel.hourly if pv else MeteorologicalData.read_hourly
+        else:
+            read_met = PVModel.seasonal_profiles if pv else MeteorologicalData.from_csv
+        meteorological = {}
+        for path in met_files:
+            with instrument.stage('pv_yield' if pv else read_met.__name__) as stage:
+                meteorological[path] = read_met(path, pv) if pv else read_met(path)
+                stage['rows'] = len(meteorological[path]) if year else sum(len(df) for df in meteorological[path])
+        return meteorological
+
+    @staticmethod
+    def read_load_profile(load_path):
+        """
+        Read the winter and summer appliance profiles of a load profile file (the 'from_excel'
+        stage) as ApplianceTables, converted once for every analysis of the file.
+        """
+        with instrument.stage('from_excel') as stage:
+            profiles = tuple(ApplianceTable.from_frame(df) for df in ElectricLoad.from_excel(load_path))
+            stage['rows'] = sum(len(df) for df in profiles)
+        return profiles
+
+    @staticmethod
+    def analyze_load_file(load_path, meteorological, thresholds, peak_hours, solver='greedy', year=False, grid=HOURLY,
+                          tariffs=None, store=None, pv=None, mpc=None):
+        """
+        Analyze one load profile file against already parsed meteorological files.
+
+        Args:
+            load_path (str): Path to the load profile Excel file.
+            meteorological (dict): Meteorological file path mapped to its parsed data (see read_meteorology).
+            thresholds (list): Threshold values to evaluate.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            year (bool): Run the full-year hourly simulation instead of the two seasons.
+            grid (TimeGrid): Time steps of the simulated day.
+            tariffs (list): Tariffs to price every result with; each adds '<name> Original Cost',
+              '<name> Battery Cost' and (for seasons) '<name> Shifted Cost' columns.
+            store (ResultStore): Store of seasonal runs (full-year runs are not stored).
+            pv (PVSpec): The PV array the meteorological data was read for, if any (part of the key of stored runs).
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon instead of the rules.
+
+        Returns:
+            list: Rows of the results table (see summary_row).
+        """
+        rows = []
+        matrices = EnergyAnalysis.tariff_matrices(tariffs, grid) if tariffs and not year else {}
+        with instrument.stage('household'):
+            profiles = EnergyAnalysis.read_load_profile(load_path)
+            for met_path, met_data in meteorological.items():
+                for threshold in thresholds:
+                    if year:
+                        result = EnergyAnalysis.analyze_year(profiles, met_data, threshold, peak_hours, grid, mpc)
+                        row = EnergyAnalysis.summary_row(load_path, met_path, threshold, 'year', result)
+                        if tariffs:
+                            # Every threshold has the same time axis, so compile once per meteorological file
+                            if met_path not in matrices:
+                                matrices[met_path] = TariffMatrix.timeline(tariffs, result['hourly']['time'], grid.step_hours)
+                            load = result['hourly']['Load (kW)'].to_numpy()
+                            row.update(EnergyAnalysis.tariff_costs({
+                                'Original': load, 'Battery': load - result['hourly']['Discharge (kW)'].to_numpy(),
+                            }, matrices[met_path]))
+                        rows.append(row)
+                        continue
+                    key, results = EnergyAnalysis.lookup(store, load_path, met_path, threshold, peak_hours, solver, grid, pv, mpc)
+                    if results is None:
+                        results = {}
+                        for season, profile_df, meteorological_df in zip(SEASONS, profiles, met_data):
+                            with instrument.stage('season', season=season):
+                                results[season] = EnergyAnalysis.analyze_season(profile_df, meteorological_df, threshold,
+                                                                                 peak_hours, solver, grid, mpc)
+                        if store is not None:
+                            store.put(key, results)
+                    for season, result in results.items():
+                        row = EnergyAnalysis.summary_row(load_path, met_path, threshold, season, result)
+                        if tariffs:
+                            row.update(EnergyAnalysis.tariff_costs({
+                                name: result[f'{name.lower()}_hourly']['Power (kW)'].to_numpy()
+                                for name in ('Original', 'Battery', 'Shifted')
+                            }, matrices[season]))
+                        rows.append(row)
+        return rows
+
+    @staticmethod
+    def tariff_matrices(tariffs, grid=HOURLY):
+        """Compile tariffs for the representative day of each season (see SEASON_MONTHS)."""
+        return {season: TariffMatrix.day(tariffs, grid, SEASON_MONTHS[season]) for season in SEASONS}
+
+    @staticmethod
+    def tariff_costs(profiles, matrix):
+        """
+        Price load profiles under every compiled tariff in one batch.
+
+        Args:
+            profiles (dict): Profile label (e.g. 'Battery') mapped to its load of each step (kW).
+            matrix (TariffMatrix): Tariffs compiled for the time axis of the profiles.
+
+        Returns:
+            dict: '<tariff> <label> Cost' mapped to the rounded cost.
+        """
+        with instrument.stage('tariff_costs', rows=len(profiles) * len(matrix.names)):
+            costs = matrix.cost(np.array(list(profiles.values())))
+        return {
+            f'{name} {label} Cost': round(float(costs[i, j]), 2)
+            for j, name in enumerate(matrix.names) for i, label in enumerate(profiles)
+        }
+
+    @staticmethod
+    def summary_row(load_path, met_path, threshold, season, result):
+        """Flatten a season result into one row of the results table."""
+        return {
+            'Household': os.path.splitext(os.path.basename(load_path))[0],
+            'Load File': load_path,
+            'Meteorological File': met_path,
+            'Threshold': threshold,
+            'Season': season,
+            'Original Cost': result['original_cost'],
+            'Battery Cost': result['battery_cost'],
+            'Shifted Cost': result.get('shifted_cost'),
+        }
+
+    @staticmethod
+    def list_files(directory, extension):
+        """Return the sorted paths of the files in a directory with the given extension."""
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(extension) and not name.startswith('~$')
+        )
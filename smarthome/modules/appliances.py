@@ -0,0 +1,167 @@
+"""
+This module provides the appliance table used by the simulation core.
+
+An ApplianceTable holds the appliances of one season as parallel NumPy arrays (name, rated
+power, priority group, start and end hour and a shiftable flag) and the battery discharge
+of a simulated day as a separate channel of (start, end, power) steps. The battery, the
+load shifting solvers and the profile calculations work on these arrays directly: a
+shifted table shares every array with the table it came from except its start and end
+hours, and adding the battery discharge shares all of the appliance arrays, so a scenario
+allocates a few small arrays instead of copying and growing DataFrames.
+
+DataFrames are only built at the edges: tables are read from the cleaned DataFrames of
+ElectricLoad.from_excel (from_frame) and written back in the same layout (to_frame), where
+the discharge channel appears as the 'Battery Discharge (Hour N)' rows with negative power
+that earlier versions appended to the profile. from_frame turns such rows back into the
+discharge channel, so DataFrames in either layout can be passed to every function that
+takes a profile.
+
+Classes:
+    ApplianceTable: Appliances as parallel arrays, with a battery discharge channel.
+
+Constants:
+    - COLUMNS: The columns of an appliance DataFrame.
+    - DISCHARGE_NAME: Name of the rows of the discharge channel in appliance DataFrames.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Name', 'Rated Power (kW)', 'Priority Group', 'Start', 'End']
+DISCHARGE_NAME = 'Battery Discharge'
+_EMPTY = np.zeros(0)
+
+
+class ApplianceTable:
+    """ Appliances of one season as parallel arrays, plus the battery discharge of each step. """
+
+    __slots__ = ('name', 'power', 'priority', 'start', 'end', 'shiftable',
+                 'discharge_start', 'discharge_end', 'discharge_power', 'index')
+
+    def __init__(self, name, power, priority, start, end, shiftable=None,
+                 discharge_start=_EMPTY, discharge_end=_EMPTY, discharge_power=_EMPTY, index=None):
+        """
+        Args:
+            name (ndarray): Appliance names.
+            power (ndarray): Rated power of each appliance (kW).
+            priority (ndarray): Priority group of each appliance (1 is never shifted).
+            start, end (ndarray): Working hours of each appliance (wrapping around midnight when start >= end).
+            shiftable (ndarray): Whether each appliance may be shifted (default: priority other
+              than 1 and non-zero power; appliances that run all day are never shifted either).
+            discharge_start, discharge_end (ndarray): Steps of the battery discharge channel (hours).
+            discharge_power (ndarray): Battery discharge of each step (kW, positive).
+            index (ndarray): Row labels of the DataFrame the table was read from.
+        """
+        self.name = name
+        self.power = power
+        self.priority = priority
+        self.start = start
+        self.end = end
+        self.shiftable = (priority != 1) & (power != 0) if shiftable is None else shiftable
+        self.discharge_start = discharge_start
+        self.discharge_end = discharge_end
+        self.discharge_power = discharge_power
+        self.index = index
+
+    def __len__(self):
+        return len(self.power)
+
+    def __repr__(self):
+        return f"ApplianceTable({len(self)} appliances, {len(self.discharge_power)} discharge steps)"
+
+    @staticmethod
+    def of(profile):
+        """Return a profile as an ApplianceTable (tables are returned as they are)."""
+        return profile if isinstance(profile, ApplianceTable) else ApplianceTable.from_frame(profile)
+
+    @staticmethod
+    def from_frame(df):
+        """
+        Read an appliance DataFrame with the columns of COLUMNS; 'Battery Discharge' rows
+        become the discharge channel.
+        """
+        name = df['Name'].to_numpy()
+        power = df['Rated Power (kW)'].to_numpy(dtype=float)
+        priority = df['Priority Group'].to_numpy()
+        start = df['Start'].to_numpy(dtype=float)
+        end = df['End'].to_numpy(dtype=float)
+        discharge = df['Name'].astype(str).str.contains(DISCHARGE_NAME, regex=False).to_numpy()
+        if not discharge.any():
+            return ApplianceTable(name, power, priority, start, end, index=df.index.to_numpy())
+        keep = ~discharge
+        return ApplianceTable(name[keep], power[keep], priority[keep], start[keep], end[keep],
+                              discharge_start=start[discharge], discharge_end=end[discharge],
+                              discharge_power=-power[discharge], index=df.index.to_numpy()[keep])
+
+    def to_frame(self):
+        """
+        The table as an appliance DataFrame, with one 'Battery Discharge (Hour N)' row of
+        negative power per discharge step after the appliances.
+        """
+        if not len(self.discharge_power):
+            return pd.DataFrame({'Name': self.name, 'Rated Power (kW)': self.power, 'Priority Group': self.priority,
+                                 'Start': self.start, 'End': self.end}, index=self.index)
+        hours = self.discharge_start
+        if ((self.discharge_end - hours) == 1).all():
+            hours = hours.astype(int)  # Whole hours on the hourly grid
+        return pd.DataFrame({
+            'Name': np.concatenate([self.name, [f"{DISCHARGE_NAME} (Hour {hour})" for hour in hours.tolist()]]),
+            'Rated Power (kW)': np.concatenate([self.power, -self.discharge_power]),
+            'Priority Group': np.concatenate([self.priority, np.zeros(len(hours), dtype=self.priority.dtype)]),
+            'Start': np.concatenate([self.start, self.discharge_start]),
+            'End': np.concatenate([self.end, self.discharge_end]),
+        })
+
+    def write_timings(self, df):
+        """
+        Write the start and end hours of the table to the appliance rows of the DataFrame it
+        was read from (the discharge rows are left as they are); returns the DataFrame.
+        """
+        appliances = ~df['Name'].astype(str).str.contains(DISCHARGE_NAME, regex=False).to_numpy()
+        start = df['Start'].to_numpy(dtype=float, copy=True)
+        end = df['End'].to_numpy(dtype=float, copy=True)
+        start[appliances] = self.start
+        end[appliances] = self.end
+        df['Start'] = start
+        df['End'] = end
+        return df
+
+    def copy(self):
+        """Copy of the table whose start and end hours can be changed independently."""
+        return self.with_timings(self.start.copy(), self.end.copy())
+
+    def with_timings(self, start, end):
+        """Table with other start and end hours, sharing every other array."""
+        return ApplianceTable(self.name, self.power, self.priority, start, end, self.shiftable,
+                              self.discharge_start, self.discharge_end, self.discharge_power, self.index)
+
+    def with_discharge(self, hours, discharge, step_hours=1.0):
+        """
+        Table with a battery discharge channel, sharing the appliance arrays.
+
+        Args:
+            hours (ndarray): Start of each step (hours).
+            discharge (ndarray): Battery discharge of each step (kW); steps without discharge are left out.
+            step_hours (float): Length of a step in hours.
+        """
+        discharging = discharge > 0
+        start = np.asarray(hours, dtype=float)[discharging]
+        return ApplianceTable(self.name, self.power, self.priority, self.start, self.end, self.shiftable,
+                              start, start + step_hours, discharge[discharging], self.index)
+
+    @staticmethod
+    def intervals_of(profile):
+        """Intervals of a table (see intervals) or of the rows of an appliance DataFrame, in row order."""
+        if isinstance(profile, ApplianceTable):
+            return profile.intervals()
+        return profile['Start'].to_numpy(), profile['End'].to_numpy(), profile['Rated Power (kW)'].to_numpy()
+
+    def intervals(self):
+        """
+        Start, end and power of the appliances followed by the discharge steps (with negative
+        power), i.e. every interval that adds to the load of the day, in table order.
+        """
+        if not len(self.discharge_power):
+            return self.start, self.end, self.power
+        return (np.concatenate([self.start, self.discharge_start]), np.concatenate([self.end, self.discharge_end]),
+                np.concatenate([self.power, -self.discharge_power]))
@@ -0,0 +1,134 @@
+"""
+This module provides the on-disk cache for parsed input files.
+
+Parsed columns are stored as NumPy arrays in one .npz file per source file, together with
+the source's modification time, size and SHA-256 content hash. A cache entry is reused when
+the source still has the same modification time and size; if only the modification time
+changed (e.g. the file was copied or touched), the content hash decides, so an unchanged
+file is never parsed twice. Entries are written to a temporary file and moved into place,
+so concurrent runs never read a half-written entry.
+
+The cache lives in the directory named by the SMARTHOME_CACHE_DIR environment variable
+(default: ~/.cache/smarthome). Setting SMARTHOME_CACHE_DIR to an empty string disables it.
+
+Functions:
+    cache_dir(): Directory of the cache, or None when caching is disabled
+    file_digest(path): SHA-256 hash of a file's content
+    load(source_path, kind): Cached arrays of a source file, or None when there is no valid entry
+    store(source_path, kind, arrays): Saves the parsed arrays of a source file
+
+Constants:
+    - CACHE_DIR_ENV: Environment variable holding the cache directory.
+    - DEFAULT_CACHE_DIR: Cache directory used when the variable is not set.
+    - CACHE_VERSION: Format version; entries written by another version are ignored.
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from . import trace
+
+CACHE_DIR_ENV = 'SMARTHOME_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'smarthome')
+CACHE_VERSION = 1
+
+# Keys of the entry metadata, kept apart from the cached columns
+_META_KEY = '__meta__'
+_DIGEST_KEY = '__sha256__'
+
+
+def cache_dir():
+    """Directory of the cache, or None when caching is disabled."""
+    return os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR) or None
+
+
+def file_digest(path):
+    """SHA-256 hash of a file's content, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_path(directory, source_path, kind):
+    """Cache entry of a source file; the name includes a hash of the absolute path to tell apart equal file names."""
+    source_path = os.path.abspath(source_path)
+    path_hash = hashlib.sha1(source_path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, kind, f"{os.path.basename(source_path)}.{path_hash}.npz")
+
+
+def load(source_path, kind):
+    """
+    Return the cached arrays of a source file.
+
+    Args:
+        source_path (str): Path of the source file.
+        kind (str): Kind of parsed data (one cache subdirectory per kind, e.g. 'meteorology').
+
+    Returns:
+        dict: Column name mapped to its array, or None when caching is disabled or there is no
+        valid entry for the current content of the file.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return None
+    entry = _entry_path(directory, source_path, kind)
+    try:
+        with np.load(entry, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None  # No entry yet, or an unreadable one that will be overwritten
+
+    meta = arrays.pop(_META_KEY, None)
+    digest = str(arrays.pop(_DIGEST_KEY, ''))
+    if meta is None or int(meta[0]) != CACHE_VERSION:
+        return None
+
+    stat = os.stat(source_path)
+    if int(meta[1]) == stat.st_mtime_ns and int(meta[2]) == stat.st_size:
+        return arrays
+
+    # Modification time changed: reuse the entry if the content did not
+    if int(meta[2]) == stat.st_size and file_digest(source_path) == digest:
+        store(source_path, kind, arrays, digest)  # Record the new modification time
+        return arrays
+    return None
+
+
+def store(source_path, kind, arrays, digest=None):
+    """
+    Save the parsed arrays of a source file. Failures to write are reported and otherwise
+    ignored, since the cache only saves time.
+
+    Args:
+        source_path (str): Path of the source file.
+        kind (str): Kind of parsed data (one cache subdirectory per kind, e.g. 'meteorology').
+        arrays (dict): Column name mapped to its array; arrays must not hold Python objects.
+        digest (str): SHA-256 hash of the source file, if already known.
+    """
+    directory = cache_dir()
+    if directory is None:
+        return
+    entry = _entry_path(directory, source_path, kind)
+    try:
+        stat = os.stat(source_path)
+        digest = digest or file_digest(source_path)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        meta = np.array([CACHE_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+        # Write next to the entry and move it into place in one step
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays, **{_META_KEY: meta, _DIGEST_KEY: np.array(digest)})
+            os.replace(temp_path, entry)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError as e:
+        trace.warning("Could not write cache entry for %s: %s", source_path, e)
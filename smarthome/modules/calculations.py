@@ -1,175 +1,280 @@
 """
 This module provides utility methods for managing and optimizing energy usage 
 in a load profile system for residential or commercial settings. It includes 
-functions to update the load profile based on battery discharge, shift loads 
-from peak to off-peak hours to reduce energy costs, and calculate total energy 
-costs based on different tariff rates for peak, mid-peak, and off-peak periods.
+functions to shift loads from peak to off-peak hours to reduce energy costs, and 
+calculate total energy costs based on different tariff rates for peak, mid-peak, 
+and off-peak periods.
 
 Classes:
-    - Calculations: A class containing static methods for updating load profiles,
+    - Calculations: A class containing static methods for building load profiles,
       shifting loads, and calculating energy costs.
 Methods:
-    - update_profile(profile_df, battery_discharge_profile): Updates the load profile
-    - shift_loads(profile_df, threshold, peak_hours): Shifts loads within peak hours
-    - calculate_energy_cost(profile_df, peak_hours): Calculates the energy cost
+    - shift_loads(profile, threshold, peak_hours, solver): Shifts loads within peak hours
+    - calculate_energy_cost(profile_df, peak_hours, grid, tariff): Calculates the energy cost
+    - default_tariff(peak_hours): The peak, mid-peak and off-peak tariff as a Tariff
+    - hourly_tariffs(peak_hours): Tariff rate of each hour of the day
+    - generate_hourly_profile(profile): Sums appliance loads into a 24-hour profile
+    - generate_adjusted_profile(profile, battery_profile): Hourly profile net of battery discharge
+
+Appliance profiles are ApplianceTables (see appliances.py); every function also takes the
+appliance DataFrames of ElectricLoad.from_excel, with or without battery discharge rows.
+
+Profiles, load shifting and costs take an optional TimeGrid (see time_grid.py) to work at
+steps shorter than an hour; the default hourly grid gives the 24-hour profiles. Costs use the
+peak, mid-peak and off-peak rates below unless another Tariff (see tariff.py) is given.
 
 Constants:
-    - PEAK_START: The start hour for peak pricing (17:00).
-    - PEAK_END: The end hour for peak pricing (22:00).
     - OFF_PEAK_TARIFF: The tariff rate for off-peak hours.
     - MID_PEAK_TARIFF: The tariff rate for mid-peak hours (6:00 - 17:00).
+    - MID_PEAK_START, MID_PEAK_END: The mid-peak period (6:00 - 17:00).
     - PEAK_TARIFF: The tariff rate for peak hours (17:00 - 22:00).
 """
 
+import numpy as np
 import pandas as pd
 
+from . import trace
+from .appliances import ApplianceTable
+from .load_optimizer import DEFAULT_TIME_BUDGET, LoadOptimizer
+from .tariff import Tariff
+from .time_grid import HOURLY
+
+OFF_PEAK_TARIFF = 0.1
+MID_PEAK_TARIFF = 0.2
+PEAK_TARIFF = 0.3
+MID_PEAK_START = 6
+MID_PEAK_END = 17
+
 
 class Calculations:
     
     @staticmethod
-    def shift_loads(profile_df, threshold, peak_hours):
+    def shift_loads(profile, threshold, peak_hours, solver="greedy", time_budget=DEFAULT_TIME_BUDGET, grid=HOURLY):
         """
         Shifts loads to reduce errors in each peak hour, starting with the highest-priority loads
         that are contributing to excess load during each peak hour.
 
+        With solver="optimal" the greedy schedule is used as the starting point of
+        LoadOptimizer, which searches for the start hours with the lowest tariff cost
+        that keep the load under the threshold.
+
+        The load of every peak hour is kept in a running array and each shift is applied as a
+        delta (the appliance's old interval is subtracted and its new interval added), and the
+        shift candidates of every peak hour are taken from a single pre-sorted index, so the
+        profile is not re-scanned after each move. On a finer grid the same is done for every
+        step of the peak hours.
+
         Parameters:
-        - profile_df: DataFrame containing the load profile of appliances.
+        - profile: ApplianceTable (or appliance DataFrame) of the season, with the battery
+          discharge of each step in its discharge channel.
         - threshold: Maximum allowable load in any hour to prevent overloading the grid.
         - peak_hours: List of hours considered as peak hours.
+        - solver: "greedy" (default) or "optimal".
+        - time_budget: Search time limit of the optimal solver in seconds.
+        - grid: Time steps of the day (hourly by default; the optimal solver needs the hourly grid).
 
         Returns:
-        - Updated profile DataFrame with adjusted load timings.
+        - A table with the adjusted load timings, sharing every other array with the profile;
+          a DataFrame profile is updated in place and returned instead.
         """
-        print("\nShifting Loads...")
+        if isinstance(profile, pd.DataFrame):
+            shifted = Calculations.shift_loads(ApplianceTable.from_frame(profile), threshold, peak_hours, solver, time_budget, grid)
+            return shifted.write_timings(profile)
+        if solver == "optimal" and not grid.is_hourly:
+            raise ValueError("The optimal load shifting solver works on the hourly grid only")
+        if solver == "optimal":
+            greedy = Calculations.shift_loads(profile, threshold, peak_hours)
+            optimized, stats = LoadOptimizer.optimize(profile, threshold, Calculations.default_tariff(peak_hours),
+                                                      greedy.start, time_budget)
+            trace.info("Optimal shift: objective %.3f, %d nodes, proven optimal: %s", stats['objective'], stats['nodes'], stats['proven_optimal'])
+            return optimized
+        if solver != "greedy":
+            raise ValueError(f"Unknown load shifting solver: {solver}")
 
-        PEAK_START = 17
-        PEAK_END = 22
+        trace.info("\nShifting Loads...")
 
-        # Initialize a dictionary to track the summed load for each peak hour
-        peak_hour_loads = {hour: 0 for hour in peak_hours}
-        
-        # Dictionary to track which appliances have been shifted
-        shifted_appliances = {}
+        # Appliances running in a peak hour move to the first hour after the peak period it is in
+        peak = np.isin(np.arange(24), peak_hours)
+        if peak.all():
+            trace.info("Every hour is a peak hour; no loads to shift.")
+            return profile.with_timings(profile.start.copy(), profile.end.copy())
+        after_peak = np.array([next((h + offset) % 24 for offset in range(24) if not peak[(h + offset) % 24])
+                               for h in range(24)])
+
+        names = profile.name
+        rated_power = profile.power
+        priority = profile.priority.astype(float)
+        start = profile.start.copy()    # Updated in place as appliances are shifted
+        end = profile.end.copy()
+        hours = grid.hours[grid.hour_steps(peak_hours)]   # Start of every peak step, in hours
+
+        # Running load of each peak step (appliances count only for Start <= hour < End), battery
+        # discharge included
+        def peak_coverage(start_time, end_time):
+            return (start_time <= hours) & (hours < end_time)
+
+        interval_start, interval_end, interval_power = profile.intervals()
+        interval_covers = peak_coverage(interval_start[:, None], interval_end[:, None])
+        peak_loads = np.add.reduce(np.broadcast_to(interval_power[:, None], interval_covers.shape), axis=0, where=interval_covers, initial=0.0)
+        covers = peak_coverage(start[:, None], end[:, None])
+
+        # Appliances that may be shifted: the table's shiftable flag (no priority 1 or zero-power
+        # loads), except appliances that run all day
+        shiftable = profile.shiftable & ~((start == 0) & (end == 24))
 
-        # Function to calculate the total load for a specific peak hour
-        def calculate_total_load_for_hour(hour, load_profile):
-            total_load = sum(load['Rated Power (kW)'] for load in load_profile if load['Start'] <= hour < load['End'])
-            total_load = round(total_load, 3)
-            print(f"Summed load for hour {hour}: {total_load} kW")
-            return total_load
+        # Pre-sorted candidate index: by contribution to the load (highest first), then by
+        # priority group (highest first), then in table order; candidates for a peak hour keep
+        # this order and are running at that hour in the original profile
+        candidate_order = np.argsort(-priority, kind="stable")
+        if trace.enabled(trace.DEBUG):
+            trace.debug("%s", profile.to_frame().iloc[candidate_order])
+        candidate_order = candidate_order[np.argsort(-rated_power[candidate_order], kind="stable")]
+        candidate_order = candidate_order[shiftable[candidate_order]]
+        candidate_covers = covers[candidate_order]
 
-        # Sort appliances by their priority group (highest priority first)
-        sorted_profile = profile_df.sort_values(by="Priority Group", ascending=False)
-        print(sorted_profile)
+        # Set to track which appliances have been shifted
+        shifted_appliances = set()
 
-        # Iterate over each peak hour to check the load and shift appliances if necessary
-        for hour in peak_hours:
-            print(f"\nProcessing peak hour: {hour}")
+        # Iterate over each peak step to check the load and shift appliances if necessary
+        for position, hour in enumerate(hours.tolist()):
+            trace.debug("\nProcessing peak hour: %s", hour)
 
-            # Calculate the total load for the current peak hour
-            peak_hour_loads[hour] = calculate_total_load_for_hour(hour, profile_df.to_dict(orient='records'))
+            total_load = round(peak_loads[position], 3)
+            trace.debug("Summed load for hour %s: %s kW", hour, total_load)
 
             # If the load exceeds the threshold, we need to shift some appliances
-            excess_load = peak_hour_loads[hour] - threshold
+            excess_load = total_load - threshold
             if excess_load <= 0:
-                print(f"No excess load detected: {excess_load} kW. Skipping appliances...")
+                trace.debug("No excess load detected: %s kW. Skipping appliances...", excess_load)
                 continue  # Skip the shifting for this hour, as the load is within limits
-            else:
-                print(f"Excess load detected: {excess_load} kW. Shifting appliances...")
-
-                # Identify appliances that are contributing to the excess load
-                appliances_to_shift = []
-                for index, row in sorted_profile.iterrows():
-                    name = row["Name"]
-                    start, end = row["Start"], row["End"]
-                    rated_power = row["Rated Power (kW)"]
-                    priority = row["Priority Group"]
-                    
-                    # Skip appliances with priority 1
-                    if priority in [1]: 
-                        continue
-
-                    # Skip zero-power loads, battery discharges, or appliances that run all day
-                    if rated_power == 0 or "Battery Discharge" in name or (start == 0 and end == 24):
-                        continue
-
-                    # Only consider appliances that are running during the current peak hour
-                    if start <= hour < end: 
-                        appliances_to_shift.append((index, name, rated_power))
-
-                # Sort appliances by their contribution to the excess load (highest first)
-                appliances_to_shift = sorted(appliances_to_shift, key=lambda x: x[2], reverse=True)
-
-                # Shift appliances that contribute most to the excess load
-                for index, name, rated_power in appliances_to_shift:
-                    # Skip if this appliance has already been shifted
-                    if name in shifted_appliances:
-                        continue
-
-                    # Calculate new times for shifting the appliance
-                    shift_start = (PEAK_END + 1) % 24  # Move to the next hour after the peak
-                    shift_end = (shift_start + (int(profile_df.at[index, "End"]) - int(profile_df.at[index, "Start"]))) % 24
-
-                    # Update the profile with the new start and end times
-                    print(f"  Shifting appliance '{name}' from ({profile_df.at[index, 'Start']}, {profile_df.at[index, 'End']}) to ({shift_start}, {shift_end})")
-                    profile_df.at[index, "Start"] = shift_start
-                    profile_df.at[index, "End"] = shift_end
-
-                    # Mark this appliance as shifted
-                    shifted_appliances[name] = True
-
-                    # Recalculate peak hour loads after shifting the appliance
-                    peak_hour_loads[hour] = calculate_total_load_for_hour(hour, profile_df.to_dict(orient='records'))
-
-                    # Break if the load is now below threshold after shifting
-                    if peak_hour_loads[hour] <= threshold:
-                        print(f"Load for hour {hour} is now within the threshold: {peak_hour_loads[hour]} kW. Stopping further shifts.")
-                        break
-
-        print(f"\nShifted Load Profile:\n{profile_df}")
-        print("Load shifting completed.")
-        return profile_df
+            trace.debug("Excess load detected: %s kW. Shifting appliances...", excess_load)
+
+            # Shift appliances that contribute most to the excess load
+            for index in candidate_order[candidate_covers[:, position]]:
+                name = names[index]
+                # Skip if this appliance has already been shifted
+                if name in shifted_appliances:
+                    continue
+
+                # Calculate new times for shifting the appliance
+                shift_start = after_peak[int(hour)]  # Move to the next hour after the peak
+                shift_end = (shift_start + (grid.snap(end[index]) - grid.snap(start[index]))) % 24
+
+                # Apply the shift to the running peak loads as a delta
+                trace.debug("  Shifting appliance '%s' from (%s, %s) to (%s, %s)", name, start[index], end[index], shift_start, shift_end)
+                trace.record('shift.move', hour=hour, name=name, old_start=start[index], old_end=end[index],
+                             new_start=shift_start, new_end=shift_end)
+                peak_loads -= np.where(peak_coverage(start[index], end[index]), rated_power[index], 0.0)
+                peak_loads += np.where(peak_coverage(shift_start, shift_end), rated_power[index], 0.0)
+                start[index] = shift_start
+                end[index] = shift_end
+
+                # Mark this appliance as shifted
+                shifted_appliances.add(name)
+
+                total_load = round(peak_loads[position], 3)
+                trace.debug("Summed load for hour %s: %s kW", hour, total_load)
+
+                # Break if the load is now below threshold after shifting
+                if total_load <= threshold:
+                    trace.debug("Load for hour %s is now within the threshold: %s kW. Stopping further shifts.", hour, total_load)
+                    break
+
+        shifted = profile.with_timings(start, end)
+        if trace.enabled(trace.DEBUG):
+            trace.debug("\nShifted Load Profile:\n%s", shifted.to_frame())
+        trace.info("Load shifting completed.")
+        return shifted
 
     @staticmethod
-    def calculate_energy_cost(hourly_df, peak_hours):
+    def calculate_energy_cost(hourly_df, peak_hours, grid=HOURLY, tariff=None, months=None):
         """
         Calculate the energy cost based on consumption during peak, mid-peak, and off-peak hours.
         
         Parameters:
         - profile_df: DataFrame containing the hourly load profile of appliances.
         - peak_hours: List of hours considered peak hours (e.g., 17:00 to 22:00).
+        - grid: Time steps of the profile (hourly by default); each step costs its power times
+          its length times the tariff of its hour.
+        - tariff: Tariff to price the profile with (default: default_tariff(peak_hours)). Exported
+          energy (negative power) is credited at its export rate, and its demand charge applies
+          to the highest load of the day.
+        - months: Months the day stands for, for seasonal tariffs (default: all).
         
         Returns:
         - Total energy cost calculated based on consumption during peak, mid-peak, and off-peak hours.
         """
-        print(f"\nCalculating energy cost...")
-
-        OFF_PEAK_TARIFF = 0.1
-        MID_PEAK_TARIFF = 0.2
-        PEAK_TARIFF = 0.3
-
-        # Initialize the total cost
-        total_cost = 0
-
-        # Loop through each hour to calculate the cost based on the tariff
-        for hour in range(24):
-            consumption = hourly_df.loc[hour, "Power (kW)"]
-            if hour in peak_hours:
-                cost = consumption * PEAK_TARIFF
-                print(f"Hour {hour}: Peak rate {PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
-            elif 6 <= hour < 17:
-                cost = consumption * MID_PEAK_TARIFF
-                print(f"Hour {hour}: Mid-peak rate {MID_PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
-            else:
-                cost = consumption * OFF_PEAK_TARIFF
-                print(f"Hour {hour}: Off-peak rate {OFF_PEAK_TARIFF} -> Cost: {round(cost, 2)}")
-                total_cost += cost
+        trace.info("\nCalculating energy cost...")
+        tariff = tariff or Calculations.default_tariff(peak_hours)
+
+        # Cost of each step at the tariff of its hour, plus the demand charge
+        consumption = hourly_df.loc[grid.index, "Power (kW)"].to_numpy(dtype=float)
+        total_cost = tariff.day_cost(consumption, grid, months)
+
+        if trace.enabled(trace.DEBUG) or trace.capturing():
+            tariffs = tariff.step_prices(consumption, grid, months)
+            costs = consumption * tariffs * grid.step_hours
+            for hour, rate, cost in zip(grid.hours.tolist(), tariffs.tolist(), costs.tolist()):
+                trace.debug("Hour %s: Rate %s -> Cost: %s", hour, rate, round(cost, 2))
+            trace.record('cost.hourly', hour=grid.hours, consumption=consumption, tariff=tariffs, cost=costs)
 
         # Round total cost for better readability
         total_cost = round(total_cost, 2)
-        print(f"\nTotal Energy Cost: {total_cost}")
+        trace.info("\nTotal Energy Cost: %s", total_cost)
 
-        print("Energy cost calculation completed.")
-        return total_cost
\ No newline at end of file
+        trace.info("Energy cost calculation completed.")
+        return total_cost
+
+    @staticmethod
+    def generate_adjusted_profile(df, battery_df=None, grid=HOURLY):
+        """
+        Generate the adjusted profile, considering battery discharge if provided.
+
+        df is an ApplianceTable or appliance DataFrame, and battery_df the profile with the
+        battery discharge of each step (from Battery.simulate_battery).
+        """
+
+        # Generate the hourly profile for the given profile
+        hourly_profile = Calculations.generate_hourly_profile(df, grid)
+
+        # If battery_df is provided, adjust the profile by subtracting battery discharge
+        if battery_df is not None:
+            # Sum up the battery discharge channel for each step
+            battery = ApplianceTable.of(battery_df)
+            battery_discharge = grid.point_load(battery.discharge_start, battery.discharge_power)
+
+            # Subtract battery discharge from the original hourly profile
+            hourly_profile['Power (kW)'] -= battery_discharge
+        
+        return hourly_profile
+
+    @staticmethod
+    def generate_hourly_profile(df, grid=HOURLY):
+        """Generate hourly power profile from appliance usage (one row per step of the grid), battery discharge included."""
+        return pd.DataFrame({'Power (kW)': grid.table_load(df)}, index=grid.index)
+
+    @staticmethod
+    def default_tariff(peak_hours):
+        """
+        The tariff of calculate_energy_cost: off-peak rates, mid-peak rates from MID_PEAK_START
+        to MID_PEAK_END and peak rates in the peak hours, every day of the year. Net load below
+        zero (e.g. after load shifting) is credited at the rate of its hour, so the cost of a day
+        is linear in its load.
+        """
+        tariff = (Tariff('default', OFF_PEAK_TARIFF)
+                  .with_rates(MID_PEAK_TARIFF, hours=range(MID_PEAK_START, MID_PEAK_END))
+                  .with_rates(PEAK_TARIFF, hours=peak_hours))
+        return Tariff(tariff.name, tariff.rates, tariff.rates)
+
+    @staticmethod
+    def hourly_tariffs(peak_hours):
+        """
+        Tariff rate of each hour of the day, matching calculate_energy_cost.
+
+        Parameters:
+        - peak_hours: List of hours considered peak hours.
+
+        Returns:
+        - Array of 24 tariff rates.
+        """
+        return Calculations.default_tariff(peak_hours).day_prices()
@@ -0,0 +1,135 @@
+"""
+This module provides the battery dispatch kernel used by the Battery class.
+
+The kernel is a pure function over NumPy arrays: it takes the load and solar irradiance
+of every time step together with the battery parameters and returns the state of charge
+and the discharge of every step. Time is the last axis of the arrays; any leading axes are
+scenarios (households, battery sizes, thresholds, ...) and are simulated together, with
+parameters given either as scalars or as arrays that broadcast against those axes.
+
+The charge and discharge rules are those of Battery.simulate_battery:
+    - Outside peak hours, solar energy charges the battery up to 80% SoC.
+    - In peak hours, solar energy charges the battery up to 50% SoC, before and after discharging.
+    - In peak hours, the battery discharges the load above the threshold, keeping 30% SoC in reserve.
+    - Charging is limited by the solar power and the charge rate, discharging by the discharge rate.
+
+Steps may be shorter than an hour (step_hours); power limits are then applied as energy per
+step, and the discharge is still reported as power (kW).
+
+Functions:
+    dispatch_battery(load, irradiance, peak, threshold, capacity, charge_rate, discharge_rate, soc,
+                     panel_area, panel_efficiency, step_hours): Simulates the battery over every time step.
+"""
+
+import numpy as np
+
+
+def dispatch_battery(load, irradiance, peak, threshold, capacity, charge_rate, discharge_rate, soc,
+                     panel_area, panel_efficiency, step_hours=1.0):
+    """
+    Simulate the battery over every time step of one or many scenarios.
+
+    Args:
+        load (array-like): Power consumption of each step (kW), shape (..., steps).
+        irradiance (array-like): Solar irradiance of each step (kW/m^2), shape (..., steps).
+        peak (array-like): Whether each step is in peak hours, shape (..., steps).
+        threshold (float or array-like): The threshold for minimum power consumption (kW).
+        capacity (float or array-like): Battery capacity (kWh).
+        charge_rate (float or array-like): Charge rate; a step charges at most charge_rate * capacity.
+        discharge_rate (float or array-like): Discharge rate; a step discharges at most discharge_rate * capacity.
+        soc (float or array-like): Initial state of charge (%).
+        panel_area (float or array-like): Solar panel area (m^2).
+        panel_efficiency (float or array-like): Solar panel efficiency (decimal).
+        step_hours (float): Length of a step in hours.
+
+    Returns:
+        tuple: SoC at the start of each step (%), discharge of each step (kW), both with shape
+        (scenarios..., steps), and the final SoC of each scenario.
+    """
+    load = np.asarray(load, dtype=float)
+    irradiance = np.nan_to_num(np.asarray(irradiance, dtype=float))
+    peak = np.asarray(peak, dtype=bool)
+    params = [np.asarray(value, dtype=float) for value in
+              (threshold, capacity, charge_rate, discharge_rate, soc, panel_area, panel_efficiency)]
+
+    steps = np.broadcast_shapes(load.shape[-1:], irradiance.shape[-1:], peak.shape[-1:])[0]
+    batch_shape = np.broadcast_shapes(load.shape[:-1], irradiance.shape[:-1], peak.shape[:-1],
+                                      *(value.shape for value in params))
+
+    if batch_shape == ():
+        return _dispatch_series(np.broadcast_to(load, (steps,)), np.broadcast_to(irradiance, (steps,)),
+                                np.broadcast_to(peak, (steps,)), *(float(value) for value in params), step_hours)
+
+    # Step-major copies so each step reads one contiguous row of scenarios
+    load, irradiance, peak = (np.ascontiguousarray(np.moveaxis(np.broadcast_to(values, batch_shape + (steps,)), -1, 0))
+                              for values in (load, irradiance, peak))
+    threshold, capacity, charge_rate, discharge_rate, soc, panel_area, panel_efficiency = (
+        np.broadcast_to(value, batch_shape) for value in params)
+
+    # Energy per step (kWh); on the hourly grid these equal the power limits
+    solar_to_energy = panel_area * panel_efficiency * step_hours
+    max_charge = charge_rate * capacity * step_hours
+    max_discharge = discharge_rate * capacity * step_hours
+
+    soc = soc.copy()
+    soc_log = np.empty((steps,) + batch_shape)
+    discharge_log = np.zeros((steps,) + batch_shape)
+
+    for step in range(steps):
+        soc_log[step] = soc
+        power, sun, in_peak = load[step], irradiance[step], peak[step]
+        solar = sun * solar_to_energy
+        sunny = sun > 0
+
+        # Charge with solar energy: up to 50% in peak hours, up to 80% otherwise
+        limit = np.where(in_peak, 50.0, 80.0)
+        charging = sunny & (soc < 80) & (~in_peak | (soc < 50))
+        charge = np.minimum(np.minimum(solar, max_charge), (limit - soc) * capacity / 100.0)
+        soc = np.where(charging, np.clip(soc + charge / capacity * 100, 0, 100), soc)
+
+        # Discharge above the threshold in peak hours, keeping 30% in reserve
+        discharging = in_peak & (soc > 30) & (power > threshold)
+        discharge = np.minimum(np.minimum(max_discharge, (power - threshold) * step_hours), (soc - 30) / 100 * capacity)
+        discharge = np.where(discharging, discharge, 0.0)
+        discharge_log[step] = discharge / step_hours
+        soc = np.where(discharging, np.clip(soc - discharge * 100 / capacity, 0, 100), soc)
+
+        # Recharge up to 50% in peak hours if solar energy is available
+        recharge = np.where(soc < 50, np.minimum(np.minimum(solar, max_charge), (50 - soc) * capacity / 100.0), 0.0)
+        soc = np.where(in_peak & sunny, np.clip(soc + recharge / capacity * 100, 0, 100), soc)
+
+    return np.moveaxis(soc_log, 0, -1), np.moveaxis(discharge_log, 0, -1), soc
+
+
+def _dispatch_series(load, irradiance, peak, threshold, capacity, charge_rate, discharge_rate, soc,
+                     panel_area, panel_efficiency, step_hours):
+    """Single-scenario dispatch; plain floats keep the per-step arithmetic out of NumPy's scalar overhead."""
+    solar_to_energy = panel_area * panel_efficiency * step_hours
+    max_charge = charge_rate * capacity * step_hours
+    max_discharge = discharge_rate * capacity * step_hours
+
+    soc_log = np.empty(len(load))
+    discharge_log = np.zeros(len(load))
+
+    for step, (power, sun, in_peak) in enumerate(zip(load.tolist(), irradiance.tolist(), peak.tolist())):
+        soc_log[step] = soc
+        solar = sun * solar_to_energy
+
+        # Charge with solar energy: up to 50% in peak hours, up to 80% otherwise
+        if sun > 0 and soc < 80 and (not in_peak or soc < 50):
+            limit = 50 if in_peak else 80
+            soc = max(0, min(100, soc + min(solar, max_charge, (limit - soc) * capacity / 100.0) / capacity * 100))
+
+        if in_peak:
+            # Discharge above the threshold, keeping 30% in reserve
+            if soc > 30 and power > threshold:
+                discharge = min(max_discharge, (power - threshold) * step_hours, (soc - 30) / 100 * capacity)
+                discharge_log[step] = discharge / step_hours
+                soc = max(0, min(100, soc - discharge * 100 / capacity))
+
+            # Recharge up to 50% if solar energy is available
+            if sun > 0:
+                charge = min(solar, max_charge, (50 - soc) * capacity / 100.0) if soc < 50 else 0
+                soc = max(0, min(100, soc + charge / capacity * 100))
+
+    return soc_log, discharge_log, soc
@@ -0,0 +1,200 @@
+"""
+This module provides opt-in per-stage instrumentation of the analysis pipeline.
+
+The pipeline wraps each stage (file parsing, battery simulation, load shifting, cost
+calculation, ...) in stage(). Outside a session, stage() returns at once. Inside a session,
+every stage records its wall time, CPU time, peak memory and row count, together with the
+season and the enclosing stage, and the session can be exported as JSON for monitoring or,
+when profiling is enabled, as a cProfile/pstats dump.
+
+Besides sessions, a thread can listen to the stages it runs (listen()): the listener is
+called as each stage starts, which is how a background job reports progress and stops a
+cancelled analysis between stages.
+
+Peak memory is measured with tracemalloc (the Python and NumPy allocations made during the
+stage, above what was allocated when it started), which slows the pipeline down noticeably;
+pass memory=False for timings only.
+
+Classes:
+    Session: The stage records of one instrumented run.
+Functions:
+    session(memory, profile): Context manager that instruments the pipeline for the duration of the block
+    stage(name, season, rows): Context manager that records one pipeline stage inside a session
+    current(): The active session, or None
+    listen(callback): Context manager that calls callback(name, season) as each stage of this thread starts
+
+Example:
+    with instrument.session(profile=True) as run:
+        EnergyAnalysis.analyze_household(load_file_path, met_file_path, threshold)
+    run.to_json('stages.json')
+    run.dump_stats('stages.pstats')
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+_session = None  # Session being recorded
+_local = threading.local()  # Stage listener of each thread (see listen)
+
+
+class Session:
+    """ The stage records of one instrumented run. """
+
+    def __init__(self, memory=True, profile=False):
+        self.memory = memory
+        self.records = []
+        self.profiler = cProfile.Profile() if profile else None
+        self._stack = []    # Open stages, innermost last
+
+    def frame(self):
+        """Return the stage records as a DataFrame, one row per stage in completion order."""
+        return pd.DataFrame(self.records)
+
+    def summary(self):
+        """Total wall time, CPU time and rows, and the largest peak memory of each stage name."""
+        records = self.frame()
+        if records.empty:
+            return records
+        records['rows'] = pd.to_numeric(records['rows'])
+        columns = dict(calls=('wall_s', 'size'), wall_s=('wall_s', 'sum'), cpu_s=('cpu_s', 'sum'), rows=('rows', 'sum'))
+        if 'peak_memory_bytes' in records:
+            columns['peak_memory_bytes'] = ('peak_memory_bytes', 'max')
+        return records.groupby('stage', sort=False).agg(**columns).reset_index()
+
+    def to_json(self, path=None):
+        """
+        Export the records as JSON.
+
+        Args:
+            path (str): File to write; if None, the JSON text is returned instead.
+
+        Returns:
+            str: The JSON text when no path is given.
+        """
+        text = json.dumps({'stages': self.records}, indent=2, default=_json_value)
+        if path is None:
+            return text
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def dump_stats(self, path):
+        """Write the cProfile statistics of the session (readable with pstats); needs profile=True."""
+        if self.profiler is None:
+            raise ValueError("The session was not started with profile=True")
+        self.profiler.dump_stats(path)
+
+
+def _json_value(value):
+    """Convert NumPy scalars in the records for json.dumps."""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+@contextlib.contextmanager
+def session(memory=True, profile=False):
+    """
+    Instrument the pipeline stages run inside the block.
+
+    Args:
+        memory (bool): Measure the peak memory of each stage with tracemalloc.
+        profile (bool): Run cProfile for the whole session (see Session.dump_stats).
+
+    Yields:
+        Session: The records of the run.
+    """
+    global _session
+    previous, _session = _session, Session(memory, profile)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if _session.profiler is not None:
+        _session.profiler.enable()
+    try:
+        yield _session
+    finally:
+        if _session.profiler is not None:
+            _session.profiler.disable()
+        if started_tracing:
+            tracemalloc.stop()
+        _session = previous
+
+
+def current():
+    """Return the active session, or None."""
+    return _session
+
+
+@contextlib.contextmanager
+def _record(run, name, season, rows):
+    """Measure one stage of a session."""
+    parent = run._stack[-1] if run._stack else None
+    record = {
+        'stage': name,
+        'season': season if season is not None else (parent['season'] if parent else None),
+        'parent': parent['stage'] if parent else None,
+        'depth': len(run._stack),
+        'rows': rows,
+        'pid': os.getpid(),
+    }
+    if run.memory:
+        allocated, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent['_peak'] = max(parent['_peak'], peak)  # Keep the parent's peak before resetting it
+        tracemalloc.reset_peak()
+        record['_start_memory'], record['_peak'] = allocated, allocated
+
+    run._stack.append(record)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = time.perf_counter() - wall
+        record['cpu_s'] = time.process_time() - cpu
+        run._stack.pop()
+        if run.memory:
+            peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+            record['peak_memory_bytes'] = peak - record.pop('_start_memory')
+            if parent is not None:
+                parent['_peak'] = max(parent['_peak'], peak)
+        run.records.append(record)
+
+
+@contextlib.contextmanager
+def listen(callback):
+    """
+    Call callback(name, season) at the start of every stage run by this thread inside the block.
+    An exception raised by the callback propagates out of the stage, which stops the pipeline
+    between stages (e.g. to cancel a background analysis).
+    """
+    previous, _local.listener = getattr(_local, 'listener', None), callback
+    try:
+        yield
+    finally:
+        _local.listener = previous
+
+
+def stage(name, season=None, rows=None):
+    """
+    Record one pipeline stage when a session is active.
+
+    Args:
+        name (str): Stage name.
+        season (str): Season of the stage; nested stages inherit the season of the enclosing stage.
+        rows (int): Number of rows processed, if known up front.
+
+    Returns:
+        A context manager yielding the stage record (a dict), so the stage can set 'rows' once
+        known; outside a session the dict is discarded.
+    """
+    listener = getattr(_local, 'listener', None)
+    if listener is not None:
+        listener(name, season)
+    if _session is None:
+        return contextlib.nullcontext({})
+    return _record(_session, name, season, rows)
@@ -0,0 +1,78 @@
+"""
+This module provides background execution of a household analysis.
+
+An AnalysisJob runs EnergyAnalysis.iter_household on a worker thread and reports through a
+queue that the caller drains without blocking (the GUI polls it with root.after), so the
+caller's thread stays free while the pipeline runs:
+    - ('stage', name, season) as each pipeline stage starts,
+    - ('season', season, result) as soon as a season is done,
+    - ('done', results, None) with both seasons, or ('cancelled', None, None), or
+      ('error', exception, None) as the last event.
+Cancellation is checked as each stage starts, so a cancelled job stops between stages.
+With a result store, a run that was analyzed before is read from the store instead.
+
+Classes:
+    Cancelled: Raised in the worker thread to stop a cancelled job.
+    AnalysisJob: One household analysis on a worker thread.
+"""
+
+import queue
+import threading
+
+from . import instrument
+from .analysis import EnergyAnalysis
+from .time_grid import HOURLY
+
+
+class Cancelled(Exception):
+    """ Raised in the worker thread when its job has been cancelled. """
+
+
+class AnalysisJob:
+    """ Runs the analysis of one household on a worker thread, reporting through a queue. """
+
+    def __init__(self, load_file_path, met_file_path, threshold, peak_hours=None, solver='greedy', grid=HOURLY, store=None):
+        self.args = (load_file_path, met_file_path, threshold, peak_hours, solver, grid, store)
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='analysis', daemon=True)
+
+    def start(self):
+        """Start the analysis; returns the job."""
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the job to stop at the start of its next stage."""
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def poll(self):
+        """Return the events reported since the last call, without waiting."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _stage_started(self, name, season):
+        if self._cancel.is_set():
+            raise Cancelled()
+        self.events.put(('stage', name, season))
+
+    def _run(self):
+        try:
+            results = {}
+            with instrument.listen(self._stage_started):
+                for season, result in EnergyAnalysis.iter_household(*self.args):
+                    results[season] = result
+                    self.events.put(('season', season, result))
+            self.events.put(('done', results, None))
+        except Cancelled:
+            self.events.put(('cancelled', None, None))
+        except Exception as e:
+            self.events.put(('error', e, None))
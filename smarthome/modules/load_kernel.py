@@ -0,0 +1,77 @@
+"""
+This module provides the NumPy kernels used to turn appliance tables into load vectors.
+Every hourly profile in the package (the GUI profile, the battery simulation and the
+battery discharge adjustment) is built with these functions instead of walking the
+appliance table row by row.
+
+Functions:
+    interval_load(start, end, power, n_slots): Sums (start, end, power) intervals into a load vector
+    point_load(slot, power, n_slots): Sums single-slot values (e.g. battery discharge) into a load vector
+    table_load(profile, n_slots): Load vector of an ApplianceTable or appliance DataFrame
+
+Intervals follow the convention of the load profile files: an appliance with Start < End
+runs from Start up to (not including) End, otherwise it wraps around midnight and runs
+from Start to the end of the day and from the start of the day up to End.
+"""
+
+import numpy as np
+
+from .appliances import ApplianceTable
+
+
+def interval_load(start, end, power, n_slots=24):
+    """
+    Sum (start, end, power) intervals into a load vector using interval masks.
+
+    Args:
+        start (array-like): Start slot of each interval (truncated to an integer).
+        end (array-like): End slot of each interval, exclusive (truncated to an integer).
+        power (array-like): Power of each interval (kW).
+        n_slots (int): Number of slots in the vector (24 for hourly profiles).
+
+    Returns:
+        ndarray: Load per slot (kW).
+    """
+    start = np.asarray(start, dtype=float).astype(np.int64)[:, None]
+    end = np.asarray(end, dtype=float).astype(np.int64)[:, None]
+    power = np.asarray(power, dtype=float)[:, None]
+    slots = np.arange(n_slots)
+
+    # Wrapping intervals run to the end of the day and restart at slot 0; the mask is built in
+    # place, so the only (intervals, slots) arrays are two boolean ones
+    active = slots >= start
+    before_end = slots < end
+    wrap = start >= end
+    np.logical_or(active, before_end, out=active, where=wrap)
+    np.logical_and(active, before_end, out=active, where=~wrap)
+
+    # Reducing over the appliance axis adds the loads in table order, so every slot holds
+    # exactly the same sum as adding the active appliances one by one; threshold
+    # comparisons downstream depend on that (a difference array would leave rounding residue).
+    # The power column is broadcast rather than copied into a (intervals, slots) matrix
+    return np.add.reduce(np.broadcast_to(power, active.shape), axis=0, where=active, initial=0.0)
+
+
+def point_load(slot, power, n_slots=24):
+    """
+    Sum values that each occupy a single slot into a load vector.
+
+    Args:
+        slot (array-like): Slot of each value (truncated to an integer).
+        power (array-like): Power of each value (kW).
+        n_slots (int): Number of slots in the vector.
+
+    Returns:
+        ndarray: Load per slot (kW).
+    """
+    slot = np.asarray(slot, dtype=float).astype(np.int64)
+    power = np.asarray(power, dtype=float)
+    return np.bincount(slot, weights=power, minlength=n_slots)[:n_slots]
+
+
+def table_load(profile, n_slots=24):
+    """
+    Load vector of an ApplianceTable (including its battery discharge channel) or of an
+    appliance DataFrame with 'Start', 'End' and 'Rated Power (kW)' columns.
+    """
+    return interval_load(*ApplianceTable.intervals_of(profile), n_slots)
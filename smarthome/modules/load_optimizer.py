@@ -0,0 +1,237 @@
+"""
+This module provides an optimal load-shifting solver as an alternative to the greedy
+heuristic in Calculations.shift_loads.
+
+The solver chooses a start hour for every shiftable appliance (keeping its duration) so
+that the tariff cost of the day is minimal while the hourly load stays under the
+threshold. Schedules are priced with Tariff.day_cost, the cost calculate_energy_cost
+reports. The search itself prices the load of every hour at the tariff's energy rate: the
+cost of placing an appliance at a start hour is then its power times the sum of the rates
+over its window, which lets a depth-first branch-and-bound search price every candidate
+start at once. Since export is never credited above the energy rate and demand charges only
+add to the cost, this linear cost is a lower bound of the reported cost (and equal to it for
+the default tariff), so it can bound the search while complete schedules are compared at
+their reported cost. Load above the threshold is penalized heavily, so schedules that
+respect the threshold always win and, when no schedule can respect it, the one with the
+least excess load wins.
+
+Classes:
+    LoadOptimizer: A class containing static methods to find the cheapest schedule.
+Methods:
+    optimize(profile, threshold, tariff, initial_start, time_budget): Returns the optimized profile
+
+Constants:
+    - EXCESS_PENALTY: Cost per kWh above the threshold ($/kWh).
+    - DEFAULT_TIME_BUDGET: Default search time per call (seconds).
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .appliances import ApplianceTable
+from .load_kernel import interval_load
+from .tariff import Tariff
+
+EXCESS_PENALTY = 1000.0
+DEFAULT_TIME_BUDGET = 0.5
+TIME_CHECK_INTERVAL = 256   # Nodes between time budget checks
+
+
+class LoadOptimizer:
+
+    @staticmethod
+    def shiftable_mask(table):
+        """
+        Appliances of an ApplianceTable the solver may move: the same rules as the greedy shift
+        (the table's shiftable flag, no all-day loads), restricted to positive loads that do
+        not run the whole day.
+        """
+        start = table.start.astype(int)
+        end = table.end.astype(int)
+        duration = (end - start) % 24
+        return (
+            table.shiftable
+            & (table.power > 0)
+            & ~((start == 0) & (end == 24))
+            & (duration > 0)
+        )
+
+    @staticmethod
+    def optimize(profile, threshold, tariff, initial_start=None, time_budget=DEFAULT_TIME_BUDGET):
+        """
+        Choose start hours for the shiftable appliances that minimize the tariff cost.
+
+        Parameters:
+        - profile: ApplianceTable (or appliance DataFrame) of the season; its battery discharge
+          channel counts as fixed load.
+        - threshold: Maximum allowable load in any hour.
+        - tariff: Tariff the schedule is priced with, or an array of 24 hourly rates (a
+          tariff crediting export at the same rates).
+        - initial_start: Optional start hours of a known schedule (e.g. the greedy shift), one
+          per appliance of the table, used as the first incumbent so the result is never worse than it.
+        - time_budget: Maximum search time in seconds; the best schedule found so far is
+          returned when it runs out.
+
+        Returns:
+        - A table with the optimized load timings (a copy of a DataFrame profile, for a DataFrame).
+        - dict with the objective, whether optimality was proven and the number of nodes searched.
+        """
+        if isinstance(profile, pd.DataFrame):
+            optimized, stats = LoadOptimizer.optimize(ApplianceTable.from_frame(profile), threshold, tariff, initial_start, time_budget)
+            return optimized.write_timings(profile.copy()), stats
+
+        deadline = time.perf_counter() + time_budget
+        if not isinstance(tariff, Tariff):
+            tariff = Tariff('rates', tariff, tariff)
+        tariffs = tariff.day_prices()   # Energy rates of the linear bound
+
+        shiftable = LoadOptimizer.shiftable_mask(profile)
+        positions = np.flatnonzero(shiftable)
+        start = profile.start
+        end = profile.end
+        power = profile.power
+
+        # Load that the solver cannot move (fixed appliances, then battery discharge)
+        fixed = np.concatenate([~shiftable, np.ones(len(profile.discharge_power), dtype=bool)])
+        interval_start, interval_end, interval_power = profile.intervals()
+        fixed_load = interval_load(interval_start[fixed], interval_end[fixed], interval_power[fixed])
+
+        # Branch on the higher priority groups first, then on the largest energy blocks
+        duration = (end[positions].astype(int) - start[positions].astype(int)) % 24
+        priority = profile.priority.astype(float)[positions]
+        energy = power[positions] * duration
+        order = np.lexsort((-energy, -priority))
+        positions, duration = positions[order], duration[order]
+        item_power = power[positions]
+
+        # windows[k, s] marks the hours used by item k when it starts at hour s (wrapping at midnight)
+        hours = np.arange(24)
+        windows = ((hours[None, None, :] - hours[None, :, None]) % 24) < duration[:, None, None]
+        window_cost = item_power[:, None] * (windows * tariffs).sum(axis=2)
+
+        # Lower bounds for the items not yet placed
+        remaining_cost = np.append(np.cumsum(window_cost.min(axis=1)[::-1])[::-1], 0.0)
+        remaining_energy = np.append(np.cumsum(energy[order][::-1])[::-1], 0.0)
+
+        # Identical items (same power and duration) are placed in non-decreasing start order
+        same_as_previous = np.zeros(len(positions), dtype=bool)
+        same_as_previous[1:] = (item_power[1:] == item_power[:-1]) & (duration[1:] == duration[:-1])
+
+        def objective(load):
+            """Reported cost of a schedule's load, plus the penalty on its excess load."""
+            return tariff.day_cost(load) + EXCESS_PENALTY * np.maximum(load - threshold, 0.0).sum()
+
+        def schedule_load(item_start):
+            load = fixed_load.copy()
+            for k, s in enumerate(item_start):
+                load += item_power[k] * windows[k, s]
+            return load
+
+        # Incumbents: the current schedule and, if given, the known schedule
+        best_start = start[positions].astype(int) % 24
+        best_objective = objective(schedule_load(best_start))
+        if initial_start is not None:
+            candidate = np.asarray(initial_start, dtype=float)[positions].astype(int) % 24
+            candidate_objective = objective(schedule_load(candidate))
+            if candidate_objective < best_objective:
+                best_start, best_objective = candidate, candidate_objective
+
+        # Polish the incumbent with single-item moves so the search starts from a tight bound
+        improved_start, _ = LoadOptimizer.improve(best_start, fixed_load, item_power, windows, window_cost,
+                                                  threshold, tariffs, deadline)
+        improved_objective = objective(schedule_load(improved_start))
+        if improved_objective < best_objective:
+            best_start, best_objective = improved_start, improved_objective
+
+        def expand(k, load, cost):
+            """Price every start hour of item k at once and order them by their lower bound."""
+            candidate_loads = load[None, :] + item_power[k] * windows[k]
+            excess = np.maximum(candidate_loads - threshold, 0.0).sum(axis=1)
+
+            # Bound 1: energy of the remaining items that cannot fit under the threshold must exceed it
+            free_capacity = np.maximum(threshold - candidate_loads, 0.0).sum(axis=1)
+            remaining = remaining_cost[k + 1] + EXCESS_PENALTY * np.maximum(remaining_energy[k + 1] - free_capacity, 0.0)
+
+            # Bound 2: the excess is convex in the load, so the excess added by the remaining items
+            # together is at least the sum of what each adds on its own to the current load
+            if k + 1 < len(positions):
+                rest_loads = load + item_power[k + 1:, None, None] * windows[k + 1:]
+                added_excess = np.maximum(rest_loads - threshold, 0.0).sum(axis=2) - np.maximum(load - threshold, 0.0).sum()
+                separate = (window_cost[k + 1:] + EXCESS_PENALTY * added_excess).min(axis=1).sum()
+                remaining = np.maximum(remaining, separate)
+
+            bound = cost + window_cost[k] + EXCESS_PENALTY * excess + remaining
+            if same_as_previous[k]:
+                bound[:item_start[k - 1]] = np.inf
+            return [k, candidate_loads, cost + window_cost[k], bound, np.argsort(bound, kind='stable'), 0]
+
+        # Depth-first branch and bound with an explicit stack (profiles can have thousands of items)
+        stats = {'nodes': 0, 'proven_optimal': True}
+        item_start = np.zeros(len(positions), dtype=int)
+        stack = [expand(0, fixed_load, (fixed_load * tariffs).sum())] if len(positions) else []
+        while stack:
+            frame = stack[-1]
+            k, candidate_loads, costs, bound, candidates, next_index = frame
+            # Candidates are sorted by bound, so once one is pruned all the remaining ones are
+            if next_index == len(candidates) or bound[candidates[next_index]] >= best_objective - 1e-12:
+                stack.pop()
+                continue
+            s = candidates[next_index]
+            frame[5] += 1
+            item_start[k] = s
+
+            stats['nodes'] += 1
+            if stats['nodes'] % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                stats['proven_optimal'] = False
+                break
+
+            if k + 1 == len(positions):
+                value = objective(candidate_loads[s])
+                if value < best_objective - 1e-12:
+                    best_start, best_objective = item_start.copy(), value
+            else:
+                stack.append(expand(k + 1, candidate_loads[s], costs[s]))
+
+        # The chosen timings, in a table sharing the other arrays of the profile
+        new_start = start.copy()
+        new_end = end.copy()
+        new_start[positions] = best_start
+        stop = best_start + duration
+        new_end[positions] = np.where(stop > 24, stop - 24, stop)
+
+        stats['objective'] = best_objective
+        return profile.with_timings(new_start, new_end), stats
+
+    @staticmethod
+    def improve(item_start, fixed_load, item_power, windows, window_cost, threshold, tariffs, deadline):
+        """
+        Local search: move one item at a time to its best start hour given all the others,
+        until no single move lowers the objective or the deadline passes.
+
+        Returns:
+        - The improved start hours and their objective.
+        """
+        item_start = item_start.copy()
+        load = fixed_load.copy()
+        for k, s in enumerate(item_start):
+            load += item_power[k] * windows[k, s]
+        cost = (fixed_load * tariffs).sum() + window_cost[np.arange(len(item_start)), item_start].sum()
+
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for k in range(len(item_start)):
+                # Objective of every start hour of item k with the other items fixed
+                base_load = load - item_power[k] * windows[k, item_start[k]]
+                candidate_loads = base_load[None, :] + item_power[k] * windows[k]
+                values = (window_cost[k] + EXCESS_PENALTY * np.maximum(candidate_loads - threshold, 0.0).sum(axis=1))
+                s = int(np.argmin(values))
+                if values[s] < values[item_start[k]] - 1e-12:
+                    cost += window_cost[k, s] - window_cost[k, item_start[k]]
+                    item_start[k] = s
+                    load = candidate_loads[s]
+                    improved = True
+
+        return item_start, cost + EXCESS_PENALTY * np.maximum(load - threshold, 0.0).sum()
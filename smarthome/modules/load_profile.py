@@ -6,21 +6,55 @@ Classes:
     ElectricLoad: A class to represent an electric load and provide methods to read data from files.
 Methods:
     from_excel(load_profile_file_path): Reads electric load data from an Excel file and returns a list of ElectricLoad instances.
+    is_cached(load_profile_file_path): Whether the cleaned tables of a file are in the on-disk cache.
+
+The cleaned winter and summer tables are kept in the on-disk cache of the cache module, so a
+workbook is only opened again when it changes (see precompile.py to fill the cache ahead of a run).
 
 NOTE: THIS CODE ONLY WORKS WITH SPECIFIC FILES THAT CONTAIN THE EXPECTED STRUCTURE.
 """
 
 import pandas as pd
 
+from . import cache, trace
+
+# Cache subdirectory and columns of the cleaned tables
+CACHE_KIND = 'load_profile'
+TABLE_COLUMNS = ['Name', 'Rated Power (kW)', 'Priority Group', 'Start', 'End']
+
+
+def _table_arrays(season, table):
+    """Columns and index of a cleaned table as arrays, named '<season>:<column>'."""
+    arrays = {f"{season}:index": table.index.to_numpy()}
+    for column in TABLE_COLUMNS:
+        values = table[column].to_numpy()
+        arrays[f"{season}:{column}"] = values.astype(str) if values.dtype == object or column == 'Name' else values
+    return arrays
+
+
+def _table_from_arrays(season, arrays):
+    """Rebuild a cleaned table from the arrays of _table_arrays."""
+    return pd.DataFrame({column: arrays[f"{season}:{column}"] for column in TABLE_COLUMNS},
+                        index=arrays[f"{season}:index"])
+
+
 class ElectricLoad:
 
     @staticmethod
     def from_excel(load_profile_file_path: str):
         """ Reads an Excel file with electric load profiles and returns a clean DataFrame. """
+        cached = cache.load(load_profile_file_path, CACHE_KIND)
+        if cached is not None:
+            trace.info("\nReading cached load profile for: %s", load_profile_file_path)
+            winter_load, summer_load = _table_from_arrays('winter', cached), _table_from_arrays('summer', cached)
+            trace.debug("\nWinter Load Data:\n%s", winter_load)
+            trace.debug("\nSummer Load Data:\n%s", summer_load)
+            return winter_load, summer_load
+
         # Read Excel file and validate columns
-        print(f"\nReading Excel file: {load_profile_file_path}")
+        trace.info("\nReading Excel file: %s", load_profile_file_path)
         df = pd.read_excel(load_profile_file_path)
-        print(f"Columns found: {df.columns.tolist()}")
+        trace.debug("Columns found: %s", df.columns.tolist())
 
         # Ensure all required columns exist in the dataframe
         required_columns = {'Name', 'Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End'}
@@ -29,32 +63,32 @@ class ElectricLoad:
 
         # Drop rows with missing essential data
         df = df.dropna(subset=['Name', 'Rated Power (kW)'])
-        print(f"Dropped rows with missing 'Name' or 'Rated Power (kW)', remaining rows: {len(df)}")
+        trace.info("Dropped rows with missing 'Name' or 'Rated Power (kW)', remaining rows: %d", len(df))
 
         # Convert columns to numeric values and handle invalid entries
-        print("Converting columns to numeric values...")
+        trace.info("Converting columns to numeric values...")
         numeric_columns = ['Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']
         df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce')
-        print(f"Converted columns to numeric values. Number of rows with numeric values: {len(df)}")
+        trace.info("Converted columns to numeric values. Number of rows with numeric values: %d", len(df))
 
         # Replace invalid hour values (outside 0-24) with 0
-        print("Checking for invalid hour values...")
+        trace.info("Checking for invalid hour values...")
         invalid_rows = []
         for col in ['Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']:
             invalid_values = ~df[col].between(0, 24)
             invalid_rows.append(df[invalid_values])
         invalid_df = pd.concat(invalid_rows)
         invalid_df = invalid_df.drop_duplicates()
-        if not invalid_df.empty:
-            print(f"\nInvalid values found in the following rows:\n{invalid_df}")
-            print(f"Replaced invalid hour values with 0. Number of rows replaced: {replaced_count}")
-        else:
-            print("No invalid hour values found.")
         replaced_count = 0
         for col in ['Winter Hours Start', 'Winter Hours End', 'Summer Hours Start', 'Summer Hours End']:
             invalid_values = ~df[col].between(0, 24)
             replaced_count += invalid_values.sum()
             df[col] = df[col].where(df[col].between(0, 24), 0)
+        if not invalid_df.empty:
+            trace.warning("\nInvalid values found in the following rows:\n%s", invalid_df)
+            trace.warning("Replaced invalid hour values with 0. Number of rows replaced: %s", replaced_count)
+        else:
+            trace.info("No invalid hour values found.")
 
         # Separate DataFrames for winter and summer loads
         winter_load = df[['Name', 'Rated Power (kW)', 'Priority Group', 'Winter Hours Start', 'Winter Hours End']].copy()
@@ -65,7 +99,7 @@ class ElectricLoad:
         summer_load.rename(columns={'Summer Hours Start': 'Start', 'Summer Hours End': 'End'}, inplace=True)
 
         # Replace rows where both 'Start' and 'End' are 0 with NaN
-        print("Replacing rows with 'Start' = 0 and 'End' = 0 with NaN and dropping them...")
+        trace.info("Replacing rows with 'Start' = 0 and 'End' = 0 with NaN and dropping them...")
         winter_load.loc[(winter_load['Start'] == 0) & (winter_load['End'] == 0), ['Start', 'End']] = None
         summer_load.loc[(summer_load['Start'] == 0) & (summer_load['End'] == 0), ['Start', 'End']] = None
 
@@ -79,12 +113,22 @@ class ElectricLoad:
         dropped_winter = initial_winter_count - len(winter_load)
         dropped_summer = initial_summer_count - len(summer_load)
 
-        print(f"Dropped {dropped_winter} rows from winter load where 'Start' and 'End' are 0.")
-        print(f"Dropped {dropped_summer} rows from summer load where 'Start' and 'End' are 0.")
+        trace.info("Dropped %s rows from winter load where 'Start' and 'End' are 0.", dropped_winter)
+        trace.info("Dropped %s rows from summer load where 'Start' and 'End' are 0.", dropped_summer)
+
+        # Cache the cleaned tables and return them as rebuilt from the cache, so later runs see the same tables
+        arrays = {**_table_arrays('winter', winter_load), **_table_arrays('summer', summer_load)}
+        cache.store(load_profile_file_path, CACHE_KIND, arrays)
+        winter_load, summer_load = _table_from_arrays('winter', arrays), _table_from_arrays('summer', arrays)
 
-        print(f"\nCleaned Electric Load Data Table:\n{df}")
-        print(f"\nWinter Load Data:\n{winter_load}")
-        print(f"\nSummer Load Data:\n{summer_load}")
+        trace.debug("\nCleaned Electric Load Data Table:\n%s", df)
+        trace.debug("\nWinter Load Data:\n%s", winter_load)
+        trace.debug("\nSummer Load Data:\n%s", summer_load)
 
-        print("\nElectric Load Data Processing Complete.")
-        return winter_load, summer_load
\ No newline at end of file
+        trace.info("\nElectric Load Data Processing Complete.")
+        return winter_load, summer_load
+
+    @staticmethod
+    def is_cached(load_profile_file_path: str):
+        """ Whether the cleaned tables of a load profile file are in the on-disk cache and up to date. """
+        return cache.load(load_profile_file_path, CACHE_KIND) is not None
@@ -7,20 +7,53 @@ Classes:
 Methods:
     from_excel(meteorological_file_path): Reads meteorological data from an Excel file and returns a list of MeteorologicalData instances.
     from_csv(meteorological_file_path): Reads meteorological data from a CSV file and returns a list of MeteorologicalData instances.
+    read_hourly(meteorological_file_path): Reads every hour of a CSV file for the full-year simulation.
+    irradiance_vector(meteorological_df): Returns a seasonal profile as a 24-hour irradiance array.
+    is_cached(meteorological_file_path): Whether the parsed columns of a file are in the on-disk cache.
+
+Parsed files are kept in the on-disk cache of the cache module, so a file is only parsed again
+when its content changes.
 
 NOTE: THIS CODE ONLY WORKS WITH SPECICIF FILES. ITS COMPATIBLE WITH CSV METEOROLOGY FILES FROM: https://re.jrc.ec.europa.eu/pvg_tools/en/#TMY
 """
 
+import numpy as np
 import pandas as pd
 
+from . import cache, trace
+
+# Months averaged into the seasonal profiles
+WINTER_MONTHS = [12, 1, 2]
+SUMMER_MONTHS = [6, 7, 8]
+
+# Months that use the summer appliance hours in the full-year simulation; the rest use winter hours
+SUMMER_SCHEDULE_MONTHS = [4, 5, 6, 7, 8, 9]
+
+# Cache subdirectory of the parsed files
+CACHE_KIND = 'meteorology'
+
+# Numeric PVGIS columns kept by read_pvgis (and in the parsed-file cache), besides 'time'
+PVGIS_COLUMNS = ['P', 'G(i)', 'H_sun', 'T2m']
+
+
 class MeteorologicalData:
 
-    def from_csv(meteorological_file_path: str):
-        """ Reads a CSV file with meteorological data and returns a DataFrame with hourly average solar irradiance for both winter and summer seasons. """
+    @staticmethod
+    def read_pvgis(meteorological_file_path: str):
+        """
+        Reads a PVGIS hourly CSV file and returns its rows with a parsed 'time' column and the numeric
+        PVGIS_COLUMNS found in the file. The parsed columns are cached on disk and reused while the
+        file is unchanged.
+        """
+        cached = cache.load(meteorological_file_path, CACHE_KIND)
+        if cached is not None:
+            trace.info("\nReading cached meteorological data for: %s", meteorological_file_path)
+            return pd.DataFrame(cached)
+
         # Read CSV file and validate columns
-        print(f"\nReading CSV file: {meteorological_file_path}")
+        trace.info("\nReading CSV file: %s", meteorological_file_path)
         df = pd.read_csv(meteorological_file_path, skiprows=10, low_memory=False, on_bad_lines='warn')  
-        print(f"Columns found in the CSV file: {df.columns.tolist()}")
+        trace.debug("Columns found in the CSV file: %s", df.columns.tolist())
 
         # Ensure all required columns exist in the dataframe
         required_columns = {'time', 'H_sun'}  
@@ -29,31 +62,78 @@ class MeteorologicalData:
 
         # Drop rows with invalid 'time' values
         df = df.dropna(subset=['time'])  
-        print(f"Dropped rows with invalid 'time', remaining rows: {len(df)}")
+        trace.info("Dropped rows with invalid 'time', remaining rows: %d", len(df))
         
         # Convert 'time' column to datetime for easier manipulation
-        print("Converting 'time' column to datetime format...")
+        trace.info("Converting 'time' column to datetime format...")
         df['time'] = pd.to_datetime(df['time'], format='%Y%m%d:%H%M', errors='coerce')  
-        print(f"Time conversion complete. Number of rows with 'time': {df['time'].notna().sum()}")
+        trace.info("Time conversion complete. Number of rows with 'time': %s", df['time'].notna().sum())
+
+        # Keep the parsed columns; text in the footer rows becomes NaN
+        columns = {'time': df['time'].to_numpy()}
+        for column in PVGIS_COLUMNS:
+            if column in df.columns:
+                columns[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+        cache.store(meteorological_file_path, CACHE_KIND, columns)
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def is_cached(meteorological_file_path: str):
+        """ Whether the parsed columns of a PVGIS file are in the on-disk cache and up to date. """
+        return cache.load(meteorological_file_path, CACHE_KIND) is not None
+
+    @staticmethod
+    def read_hourly(meteorological_file_path: str):
+        """
+        Reads a PVGIS CSV file and returns every hour of the file for the full-year simulation.
+
+        Returns:
+            DataFrame: One row per hour with 'time', 'Hour', 'Season' ('winter' or 'summer' appliance
+            hours, see SUMMER_SCHEDULE_MONTHS) and 'Irradiation (kW/m^2)' columns.
+        """
+        df = MeteorologicalData.read_pvgis(meteorological_file_path)
+        df = df.dropna(subset=['time'])
+        hourly_df = pd.DataFrame({
+            'time': df['time'].to_numpy(),
+            'Hour': df['time'].dt.hour.to_numpy(),
+            'Season': np.where(df['time'].dt.month.isin(SUMMER_SCHEDULE_MONTHS), 'summer', 'winter'),
+            'Irradiation (kW/m^2)': pd.to_numeric(df['H_sun'], errors='coerce').fillna(0).to_numpy(),
+        })
+        trace.info("Read %d hourly rows.", len(hourly_df))
+        return hourly_df
+
+    @staticmethod
+    def irradiance_vector(meteorological_df):
+        """
+        Returns the 'Irradiation (kW/m^2)' column of a seasonal profile as an array indexed by hour.
+        Hours missing from the profile get 0, and the first row wins for repeated hours.
+        """
+        irradiance = np.zeros(24)
+        hours = meteorological_df['Hour'].to_numpy()
+        known = (hours >= 0) & (hours < 24)
+        values = meteorological_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)[known]
+        irradiance[hours[known].astype(int)[::-1]] = values[::-1]
+        return irradiance
+
+    @staticmethod
+    def from_csv(meteorological_file_path: str):
+        """ Reads a CSV file with meteorological data and returns a DataFrame with hourly average solar irradiance for both winter and summer seasons. """
+        df = MeteorologicalData.read_pvgis(meteorological_file_path)
 
         # Extract hour, day, month
         df['hour'] = df['time'].dt.hour
         df['day'] = df['time'].dt.day
         df['month'] = df['time'].dt.month
-        print("Extracted hour, day, and month from 'time' column.")
-
-        # Define winter and summer months
-        winter_months = [12, 1, 2]
-        summer_months = [6, 7, 8]
+        trace.info("Extracted hour, day, and month from 'time' column.")
 
         # Filter data for winter and summer months
-        winter_data = df[df['month'].isin(winter_months)]
-        summer_data = df[df['month'].isin(summer_months)]
-        print(f"Filtered winter data: {len(winter_data)} rows, summer data: {len(summer_data)} rows.")
+        winter_data = df[df['month'].isin(WINTER_MONTHS)]
+        summer_data = df[df['month'].isin(SUMMER_MONTHS)]
+        trace.info("Filtered winter data: %d rows, summer data: %d rows.", len(winter_data), len(summer_data))
 
         # Convert 'H_sun' to numeric
         df['H_sun'] = pd.to_numeric(df['H_sun'], errors='coerce')
-        print("Converted 'H_sun' to numeric.")
+        trace.info("Converted 'H_sun' to numeric.")
 
         # Calculate average solar irradiation per hour for winter and summer months
         winter_irradiation_avg = winter_data.groupby('hour')['H_sun'].mean().to_dict()
@@ -63,8 +143,8 @@ class MeteorologicalData:
         winter_df = pd.DataFrame(list(winter_irradiation_avg.items()), columns=['Hour', 'Irradiation (kW/m^2)'])
         summer_df = pd.DataFrame(list(summer_irradiation_avg.items()), columns=['Hour', 'Irradiation (kW/m^2)'])
 
-        print(f"\nWinter Profile:\n{winter_df.head(24)}")
-        print(f"\nSummer Profile:\n{summer_df.head(24)}")
+        trace.debug("\nWinter Profile:\n%s", winter_df.head(24))
+        trace.debug("\nSummer Profile:\n%s", summer_df.head(24))
         
-        print("\nMeteorological Data Processing Complete.")
+        trace.info("\nMeteorological Data Processing Complete.")
         return winter_df, summer_df
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+This module provides a streaming, bounded-memory reader for PVGIS hourly CSV files.
+
+MeteorologicalData reads a whole file into pandas before grouping it; for multi-year files
+of many sites that does not scale. Here a file is read in fixed-size blocks of rows, and
+everything is computed online from the blocks, so memory use depends on the block size
+and not on the length of the file:
+    - The metadata header (site, panel, database) is parsed and the column header is
+      located instead of assuming a fixed number of header lines.
+    - HourlyStatistics keeps, for every (month, hour) group, the count, running mean and
+      variance (Welford/Chan updates), minimum, maximum and a fixed-bin histogram used as a
+      percentile sketch. Groups are merged per season afterwards, so any season definition
+      can be summarized from the same pass.
+    - iter_hourly yields the rows of MeteorologicalData.read_hourly block by block for the
+      full-timeseries battery simulation (Battery.simulate_year carries the SoC from one
+      block to the next).
+
+Classes:
+    HourlyStatistics: Online per-month, per-hour statistics of PVGIS columns.
+    PVGISStream: A class containing static methods to stream PVGIS files.
+Methods:
+    read_header(path): Site metadata and the line of the column header
+    iter_blocks(path, block_size, columns): Blocks of parsed columns as NumPy arrays
+    iter_hourly(path, block_size): Blocks of hourly rows in the read_hourly layout
+    statistics(path, block_size, columns): HourlyStatistics of a whole file
+    seasonal_profiles(path, block_size): Winter and summer profiles in the from_csv layout
+
+Constants:
+    - DEFAULT_BLOCK_SIZE: Rows per block (one year of hours).
+    - HISTOGRAM_BINS: Bins of the percentile sketch of each group.
+    - HISTOGRAM_RANGES: Value range of the sketch of each PVGIS column.
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import trace
+from .met_data import PVGIS_COLUMNS, SUMMER_MONTHS, SUMMER_SCHEDULE_MONTHS, WINTER_MONTHS
+
+DEFAULT_BLOCK_SIZE = 8760
+HISTOGRAM_BINS = 256
+
+# Range of the percentile sketch; values outside fall into the first or last bin
+HISTOGRAM_RANGES = {
+    'P': (0.0, 20000.0),    # W
+    'G(i)': (0.0, 1500.0),  # W/m2
+    'H_sun': (0.0, 90.0),   # degrees
+    'T2m': (-50.0, 60.0),   # degrees Celsius
+}
+
+N_GROUPS = 12 * 24  # (month, hour) groups
+
+
+class HourlyStatistics:
+    """ Online statistics of PVGIS columns per (month, hour) group, mergeable across blocks and files. """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = {column: np.zeros(N_GROUPS) for column in self.columns}
+        self.mean = {column: np.zeros(N_GROUPS) for column in self.columns}
+        self.m2 = {column: np.zeros(N_GROUPS) for column in self.columns}
+        self.minimum = {column: np.full(N_GROUPS, np.inf) for column in self.columns}
+        self.maximum = {column: np.full(N_GROUPS, -np.inf) for column in self.columns}
+        self.histogram = {column: np.zeros((N_GROUPS, HISTOGRAM_BINS)) for column in self.columns}
+
+    def update(self, block):
+        """
+        Add a block of rows.
+
+        Args:
+            block (dict): 'time' (datetime64 array) and an array for each statistics column.
+        """
+        time = pd.DatetimeIndex(block['time'])
+        known_time = ~time.isna()
+        group = np.where(known_time, (time.month.to_numpy() - 1) * 24 + time.hour.to_numpy(), 0)
+
+        for column in self.columns:
+            values = block[column]
+            valid = known_time & ~np.isnan(values)
+            groups, values = group[valid], values[valid]
+
+            # Block statistics per group, merged into the running ones (Chan et al.)
+            count_b = np.bincount(groups, minlength=N_GROUPS).astype(float)
+            seen = count_b > 0
+            mean_b = np.divide(np.bincount(groups, values, N_GROUPS), count_b, out=np.zeros(N_GROUPS), where=seen)
+            m2_b = np.bincount(groups, (values - mean_b[groups]) ** 2, N_GROUPS)
+
+            count_a, mean_a = self.count[column], self.mean[column]
+            total = count_a + count_b
+            delta = mean_b - mean_a
+            weight = np.divide(count_b, total, out=np.zeros(N_GROUPS), where=total > 0)
+            self.m2[column] += m2_b + delta ** 2 * count_a * weight
+            self.mean[column] = np.where(seen, mean_a + delta * weight, mean_a)
+            self.count[column] = total
+
+            np.minimum.at(self.minimum[column], groups, values)
+            np.maximum.at(self.maximum[column], groups, values)
+
+            low, high = HISTOGRAM_RANGES.get(column, (0.0, 1000.0))
+            bins = np.clip(((values - low) / (high - low) * HISTOGRAM_BINS).astype(int), 0, HISTOGRAM_BINS - 1)
+            self.histogram[column] += np.bincount(groups * HISTOGRAM_BINS + bins,
+                                                  minlength=N_GROUPS * HISTOGRAM_BINS).reshape(N_GROUPS, HISTOGRAM_BINS)
+
+    def merge(self, other):
+        """Add the statistics of another HourlyStatistics (e.g. of another file of the same site)."""
+        for column in self.columns:
+            count_a, count_b = self.count[column], other.count[column]
+            total = count_a + count_b
+            delta = other.mean[column] - self.mean[column]
+            weight = np.divide(count_b, total, out=np.zeros(N_GROUPS), where=total > 0)
+            self.m2[column] += other.m2[column] + delta ** 2 * count_a * weight
+            self.mean[column] = self.mean[column] + delta * weight
+            self.count[column] = total
+            self.minimum[column] = np.minimum(self.minimum[column], other.minimum[column])
+            self.maximum[column] = np.maximum(self.maximum[column], other.maximum[column])
+            self.histogram[column] += other.histogram[column]
+
+    def frame(self, column, months, percentiles=(10, 50, 90)):
+        """
+        Summarize a column per hour of the day over the given months.
+
+        Args:
+            column (str): Statistics column.
+            months (list): Months merged into the summary (e.g. WINTER_MONTHS).
+            percentiles (tuple): Percentiles estimated from the histogram sketch; their error
+              is at most one bin width of HISTOGRAM_RANGES[column] / HISTOGRAM_BINS.
+
+        Returns:
+            DataFrame: One row per hour with data, with Hour, count, mean, std, min, max and
+            one column per percentile (e.g. 'p50').
+        """
+        rows = (np.asarray(months)[:, None] - 1) * 24 + np.arange(24)  # (months, 24) group indices
+        count = self.count[column][rows]
+        mean = self.mean[column][rows]
+        total = count.sum(axis=0)
+        known = total > 0
+        hour_mean = np.divide((count * mean).sum(axis=0), total, out=np.full(24, np.nan), where=known)
+        m2 = (self.m2[column][rows] + count * (mean - hour_mean) ** 2).sum(axis=0)
+
+        summary = pd.DataFrame({
+            'Hour': np.arange(24),
+            'count': total.astype(int),
+            'mean': hour_mean,
+            'std': np.sqrt(np.divide(m2, total - 1, out=np.full(24, np.nan), where=total > 1)),
+            'min': self.minimum[column][rows].min(axis=0),
+            'max': self.maximum[column][rows].max(axis=0),
+        })
+
+        # Percentiles: interpolate within the bin where the cumulative count crosses the rank
+        low, high = HISTOGRAM_RANGES.get(column, (0.0, 1000.0))
+        width = (high - low) / HISTOGRAM_BINS
+        cumulative = np.cumsum(self.histogram[column][rows].sum(axis=0), axis=1)
+        for q in percentiles:
+            rank = q / 100 * total
+            bin_index = np.minimum((cumulative < rank[:, None]).sum(axis=1), HISTOGRAM_BINS - 1)
+            below = np.where(bin_index > 0, cumulative[np.arange(24), bin_index - 1], 0.0)
+            in_bin = cumulative[np.arange(24), bin_index] - below
+            fraction = np.divide(rank - below, in_bin, out=np.zeros(24), where=in_bin > 0)
+            estimate = low + (bin_index + fraction) * width
+            summary[f'p{q}'] = np.clip(estimate, summary['min'], summary['max'])
+
+        return summary[known].reset_index(drop=True)
+
+
+class PVGISStream:
+
+    @staticmethod
+    def read_header(path):
+        """
+        Parse the metadata block at the top of a PVGIS file.
+
+        Returns:
+            dict: Metadata values by name (numbers as floats, e.g. 'Latitude (decimal degrees)'),
+            with 'header_line', the 0-based line of the column header.
+        """
+        metadata = {}
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line_number, line in enumerate(f):
+                if line.startswith('time,'):
+                    metadata['header_line'] = line_number
+                    return metadata
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    value = value.strip()
+                    try:
+                        metadata[name.strip()] = float(value.split()[0])
+                    except (ValueError, IndexError):
+                        metadata[name.strip()] = value
+        raise ValueError(f"No 'time,...' column header found in {path}")
+
+    @staticmethod
+    def iter_blocks(path, block_size=DEFAULT_BLOCK_SIZE, columns=None):
+        """
+        Read a PVGIS file in blocks of rows.
+
+        Args:
+            path (str): Path of the PVGIS hourly CSV file.
+            block_size (int): Rows per block.
+            columns (list): Numeric columns to read (default: the PVGIS_COLUMNS in the file).
+
+        Yields:
+            dict: 'time' (datetime64 array) and a float array per column; rows without a valid
+            time (e.g. the text footer) are dropped.
+        """
+        header_line = PVGISStream.read_header(path)['header_line']
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for _ in range(header_line):
+                f.readline()
+            file_columns = f.readline().strip().split(',')
+        columns = [column for column in (columns or PVGIS_COLUMNS) if column in file_columns]
+        if 'H_sun' not in file_columns:
+            raise ValueError("CSV file must contain the following columns: {'time', 'H_sun'}")
+
+        reader = pd.read_csv(path, skiprows=header_line, usecols=['time'] + columns, dtype=str,
+                             chunksize=block_size, on_bad_lines='skip')
+        for chunk in reader:
+            time = pd.to_datetime(chunk['time'], format='%Y%m%d:%H%M', errors='coerce')
+            valid = time.notna().to_numpy()
+            if not valid.any():
+                continue
+            block = {'time': time.to_numpy()[valid]}
+            for column in columns:
+                block[column] = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)[valid]
+            yield block
+
+    @staticmethod
+    def iter_hourly(path, block_size=DEFAULT_BLOCK_SIZE):
+        """Yield the rows of MeteorologicalData.read_hourly block by block."""
+        for block in PVGISStream.iter_blocks(path, block_size, ['H_sun']):
+            time = pd.DatetimeIndex(block['time'])
+            yield pd.DataFrame({
+                'time': block['time'],
+                'Hour': time.hour.to_numpy(),
+                'Season': np.where(time.month.isin(SUMMER_SCHEDULE_MONTHS), 'summer', 'winter'),
+                'Irradiation (kW/m^2)': np.nan_to_num(block['H_sun']),
+            })
+
+    @staticmethod
+    def statistics(path, block_size=DEFAULT_BLOCK_SIZE, columns=None):
+        """Compute the HourlyStatistics of a whole file in one pass over its blocks."""
+        stats = None
+        rows = 0
+        for block in PVGISStream.iter_blocks(path, block_size, columns):
+            if stats is None:
+                stats = HourlyStatistics([column for column in block if column != 'time'])
+            stats.update(block)
+            rows += len(block['time'])
+        if stats is None:
+            raise ValueError(f"No rows with a valid time in {path}")
+        trace.info("Streamed %d rows of %s.", rows, path)
+        return stats
+
+    @staticmethod
+    def seasonal_profiles(path, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Winter and summer average profiles in the layout of MeteorologicalData.from_csv (equal to
+        it up to floating-point rounding), computed without loading the whole file.
+        """
+        stats = PVGISStream.statistics(path, block_size, ['H_sun'])
+        profiles = []
+        for months in (WINTER_MONTHS, SUMMER_MONTHS):
+            summary = stats.frame('H_sun', months, percentiles=())
+            profiles.append(pd.DataFrame({'Hour': summary['Hour'].astype(float), 'Irradiation (kW/m^2)': summary['mean']}))
+        return tuple(profiles)
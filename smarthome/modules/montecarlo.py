@@ -0,0 +1,223 @@
+"""
+This module provides a Monte Carlo engine for the cost uncertainty of a household.
+
+The analysis evaluates one deterministic day per season: the fixed Start/End hours of the
+load profile and the irradiance averaged over the season. Here every draw is a possible day
+instead:
+    - Appliance schedules are jittered: each appliance starts a normally distributed number
+      of hours earlier or later and runs a normally distributed number of hours longer or
+      shorter (rounded to whole hours, at least one hour). Appliances that run all day are
+      left as they are.
+    - The weather is a day of the season drawn from the PVGIS year (the hourly sun height of
+      MeteorologicalData.read_hourly, or with a PVSpec the PV yield of PVModel.hourly).
+All draws are evaluated together as arrays: the load of every draw is one masked reduction
+over (draws, appliances, hours), and the battery of every (scenario, draw) pair is dispatched
+by one call of the dispatch kernel, so thousands of draws take well under a second.
+
+The draws come from two random streams derived from the seed, one for the weather days and
+one for the schedules, and every scenario (battery parameter set, see sweep.py) is evaluated
+on the same draws. With these common random numbers the differences between scenarios are
+paired, so their standard errors are far smaller than with independent draws of each scenario,
+and fewer draws are needed to compare them; compare reports both.
+
+Classes:
+    MonteCarlo: A class containing static methods to draw and evaluate uncertain days.
+Methods:
+    draw_schedules(profile, n_draws, rng, start_sigma, duration_sigma): Jittered start and end hours
+    season_days(hourly_met_df, months): Irradiance of every day of a season
+    draw_load(start, end, power): Hourly load of every draw
+    simulate(profile, hourly_met_df, parameters_df, peak_hours, months, n_draws, seed): Costs and peaks of every draw
+    summarize(simulation, percentiles): Percentiles of the costs and peak-exceedance probabilities
+    compare(simulation, baseline): Paired differences of the battery cost to a baseline scenario
+
+Constants:
+    - START_SIGMA: Default standard deviation of the start hour jitter (hours).
+    - DURATION_SIGMA: Default standard deviation of the duration jitter (hours).
+    - PERCENTILES: Default percentiles of the summary.
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import analysis
+from .appliances import ApplianceTable
+from .calculations import Calculations
+from .dispatch import dispatch_battery
+from .sweep import BatterySweep
+
+START_SIGMA = 1.0
+DURATION_SIGMA = 0.5
+PERCENTILES = (5, 50, 95)
+
+_HOURS = np.arange(24)
+
+
+class MonteCarlo:
+
+    @staticmethod
+    def draw_schedules(profile, n_draws, rng, start_sigma=START_SIGMA, duration_sigma=DURATION_SIGMA):
+        """
+        Draw jittered schedules of a profile.
+
+        Args:
+            profile (ApplianceTable or DataFrame): Appliance profile.
+            n_draws (int): Number of schedules.
+            rng (Generator): Random stream of the schedules.
+            start_sigma (float): Standard deviation of the start hour jitter (hours).
+            duration_sigma (float): Standard deviation of the duration jitter (hours).
+
+        Returns:
+            tuple: Start and end hour of every appliance in every draw, each of shape (draws, appliances).
+        """
+        table = ApplianceTable.of(profile)
+        start, end = table.start, table.end
+        duration = np.where(end > start, end - start, end - start + 24)
+        all_day = duration >= 24
+
+        shift = np.rint(rng.normal(0.0, start_sigma, (n_draws, len(table))))
+        stretch = np.rint(rng.normal(0.0, duration_sigma, (n_draws, len(table))))
+        new_start = (start + shift) % 24
+        new_duration = np.clip(duration + stretch, 1, 23)
+        new_end = (new_start + new_duration) % 24
+        return np.where(all_day, start, new_start), np.where(all_day, end, new_end)
+
+    @staticmethod
+    def season_days(hourly_met_df, months):
+        """
+        Irradiance of every day of a season in an hourly meteorological table.
+
+        Args:
+            hourly_met_df (DataFrame): Hourly rows in the layout of MeteorologicalData.read_hourly.
+            months (list): Months of the season.
+
+        Returns:
+            ndarray: One row of 24 hourly irradiance values (kW/m^2) per day; hours missing from a day get 0.
+        """
+        time = pd.DatetimeIndex(hourly_met_df['time'])
+        selected = np.isin(time.month, months)
+        if not selected.any():
+            raise ValueError(f"The meteorological data has no days in the months {list(months)}")
+        day, _ = pd.factorize(time[selected].normalize())
+        days = np.zeros((day.max() + 1, 24))
+        hours = hourly_met_df['Hour'].to_numpy()[selected].astype(int)
+        days[day, hours] = np.nan_to_num(hourly_met_df['Irradiation (kW/m^2)'].to_numpy(dtype=float)[selected])
+        return days
+
+    @staticmethod
+    def simulate(profile, hourly_met_df, parameters_df, peak_hours, months, n_draws=1000, seed=0, threshold=None,
+                 start_sigma=START_SIGMA, duration_sigma=DURATION_SIGMA):
+        """
+        Evaluate every battery parameter set on the same random days.
+
+        Args:
+            profile (ApplianceTable or DataFrame): Appliance profile of the season.
+            hourly_met_df (DataFrame): Hourly rows in the layout of MeteorologicalData.read_hourly.
+            parameters_df (DataFrame): One battery parameter set per row (see BatterySweep.grid); missing
+              parameters take the analysis engine defaults for the profile.
+            peak_hours (list): List of hours considered as peak hours.
+            months (list): Months of the season the weather days are drawn from.
+            n_draws (int): Number of random days.
+            seed (int): Seed of the draws; calls with the same seed and profile use the same draws.
+            threshold (float): Threshold for parameter sets without a 'threshold' column.
+            start_sigma, duration_sigma (float): Standard deviations of the schedule jitter (hours).
+
+        Returns:
+            dict: 'parameters' (DataFrame of the scenarios), 'original_cost' and 'original_peak'
+            (one value per draw), 'battery_cost' and 'battery_peak' (scenarios x draws), and
+            'threshold' (one value per scenario).
+        """
+        if threshold is None and 'threshold' not in parameters_df:
+            raise ValueError("A threshold must be given as a parameter or as the threshold argument")
+        table = ApplianceTable.of(profile)
+        weather_rng, schedule_rng = (np.random.default_rng(stream) for stream in np.random.SeedSequence(seed).spawn(2))
+
+        days = MonteCarlo.season_days(hourly_met_df, months)
+        irradiance = days[weather_rng.integers(0, len(days), n_draws)]
+        start, end = MonteCarlo.draw_schedules(table, n_draws, schedule_rng, start_sigma, duration_sigma)
+        load = MonteCarlo.draw_load(start, end, table.power)
+
+        # Scenarios on the first axis, draws on the second; the battery is sized for the profile as given
+        points = {
+            name: (parameters_df[name].to_numpy(dtype=float) if name in parameters_df
+                   else np.full(len(parameters_df), value, dtype=float))
+            for name, value in BatterySweep.defaults(table, threshold).items()
+        }
+        column = {name: values[:, None] for name, values in points.items()}
+        _, discharge, _ = dispatch_battery(
+            load, irradiance, np.isin(_HOURS, peak_hours), column['threshold'], column['capacity'],
+            column['charge_rate'], column['discharge_rate'], column['capacity'] * analysis.INITIAL_SOC_FACTOR,
+            column['panel_area'], column['panel_efficiency'],
+        )
+
+        tariffs = Calculations.hourly_tariffs(peak_hours)
+        net_load = load - discharge
+        return {
+            'parameters': pd.DataFrame(points),
+            'original_cost': load @ tariffs,
+            'original_peak': load.max(axis=1),
+            'battery_cost': net_load @ tariffs,
+            'battery_peak': net_load.max(axis=2),
+            'threshold': points['threshold'],
+        }
+
+    @staticmethod
+    def draw_load(start, end, power):
+        """
+        Hourly load of every draw of jittered schedules (see load_kernel.interval_load).
+
+        Args:
+            start, end (ndarray): Start and end hour of every appliance in every draw, shape (draws, appliances).
+            power (ndarray): Rated power of every appliance (kW).
+
+        Returns:
+            ndarray: Load per draw and hour (kW), shape (draws, 24).
+        """
+        start = start.astype(np.int64)[..., None]
+        end = end.astype(np.int64)[..., None]
+        active = _HOURS >= start
+        before_end = _HOURS < end
+        wrap = start >= end
+        np.logical_or(active, before_end, out=active, where=wrap)
+        np.logical_and(active, before_end, out=active, where=~wrap)
+        # Adding over the appliance axis in table order, as the deterministic profiles do
+        power = np.asarray(power, dtype=float)[None, :, None]
+        return np.add.reduce(np.broadcast_to(power, active.shape), axis=1, where=active, initial=0.0)
+
+    @staticmethod
+    def summarize(simulation, percentiles=PERCENTILES):
+        """
+        Summarize a simulation: one row per scenario with the percentiles and mean of the original
+        and battery costs and of the savings, and the probability that the daily peak load exceeds
+        the threshold without and with the battery.
+        """
+        results = simulation['parameters'].copy()
+        results['Draws'] = len(simulation['original_cost'])
+        savings = simulation['original_cost'] - simulation['battery_cost']
+        for label, values in (('Original Cost', np.broadcast_to(simulation['original_cost'], savings.shape)),
+                              ('Battery Cost', simulation['battery_cost']), ('Savings', savings)):
+            results[f'{label} Mean'] = np.round(values.mean(axis=1), 2)
+            for q, value in zip(percentiles, np.percentile(values, percentiles, axis=1)):
+                results[f'{label} p{q:g}'] = np.round(value, 2)
+        threshold = simulation['threshold'][:, None]
+        results['Original Peak Exceedance'] = (simulation['original_peak'] > threshold).mean(axis=1)
+        results['Peak Exceedance'] = (simulation['battery_peak'] > threshold).mean(axis=1)
+        return results
+
+    @staticmethod
+    def compare(simulation, baseline=0):
+        """
+        Compare the battery cost of every scenario with a baseline scenario on the same draws.
+
+        Returns:
+            DataFrame: The scenarios with the mean cost difference to the baseline, its standard
+            error from the paired (common) draws, and the standard error independent draws of
+            the two scenarios would have given.
+        """
+        costs = simulation['battery_cost']
+        n_draws = costs.shape[1]
+        difference = costs - costs[baseline]
+        results = simulation['parameters'].copy()
+        results['Cost Difference Mean'] = difference.mean(axis=1)
+        results['Std Error (common draws)'] = difference.std(axis=1, ddof=1) / np.sqrt(n_draws)
+        results['Std Error (independent draws)'] = np.sqrt((costs.var(axis=1, ddof=1) + costs[baseline].var(ddof=1)) / n_draws)
+        return results
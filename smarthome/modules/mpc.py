@@ -0,0 +1,193 @@
+"""
+This module provides a rolling-horizon (model-predictive) battery dispatch as an alternative
+to the fixed charge and discharge rules of dispatch.py.
+
+At every step the controller plans the battery over the next horizon steps, using forecasts
+of the load and solar output and the tariff price of each step, applies the first step of the
+plan and plans again at the next step from the state of charge the battery actually reached.
+A plan maximizes the value of the discharged energy (the price of the grid import it
+replaces), with the battery charged from solar power only and kept between MIN_SOC and
+MAX_SOC, so energy is saved for the most expensive steps the horizon can see instead of
+being spent whenever the load is above the threshold.
+
+Each plan is a dynamic program over the stored energy. Its value function is concave and
+nondecreasing in the stored energy, so the best discharge of a step is the stored energy
+clipped to where the marginal value of keeping energy falls below the step's price: the
+backward pass is a few array operations per stage, and the forward decision is a clip.
+The backward pass of a plan depends only on the forecasts, not on the state of charge the
+battery reached, so the value functions of all the plans are computed together, stage by
+stage, as arrays over every step, and a year of hourly steps takes well under a second.
+
+Forecasts are either perfect (the actual load and solar output) or persistence forecasts
+(the same step one period, e.g. one day, earlier); the current step is always known. The
+prices are those of the tariff the dispatch is given, by default the tariff of the analysis.
+
+Classes:
+    MPCDispatch: Settings of the rolling-horizon dispatch (horizon, forecast, resolution, tariff).
+Functions:
+    mpc_dispatch(load, irradiance, prices, capacity, charge_rate, discharge_rate, soc, panel_area,
+                 panel_efficiency, step_hours, horizon, forecast, period, cyclic, levels): Dispatches a battery.
+
+Constants:
+    - HORIZON_HOURS: Default planning horizon.
+    - FORECASTS: The forecasts of the future steps of a plan.
+    - LEVELS: Default number of stored-energy levels of the value functions.
+    - MIN_SOC: Reserve the battery is never discharged below (%), as in the rules.
+    - MAX_SOC: Highest state of charge the battery is charged to (%), as in the rules.
+"""
+
+import hashlib
+
+import numpy as np
+
+HORIZON_HOURS = 24
+FORECASTS = ('perfect', 'persistence')
+LEVELS = 51
+MIN_SOC = 30.0
+MAX_SOC = 80.0
+
+
+class MPCDispatch:
+    """ Settings of the rolling-horizon battery dispatch. """
+
+    def __init__(self, horizon_hours=HORIZON_HOURS, forecast='perfect', levels=LEVELS, tariff=None):
+        """
+        Args:
+            horizon_hours (float): Hours planned at every step, including the current step.
+            forecast (str): 'perfect' or 'persistence' forecasts of the future steps.
+            levels (int): Stored-energy levels between MIN_SOC and MAX_SOC of the value functions.
+            tariff (Tariff): Tariff whose energy rates the plans use as prices (default: the
+              peak, mid-peak and off-peak tariff of the analysis).
+        """
+        if forecast not in FORECASTS:
+            raise ValueError(f"Unknown forecast {forecast!r}; expected one of {', '.join(FORECASTS)}")
+        if horizon_hours <= 0 or levels < 2:
+            raise ValueError("The horizon must be positive and the value functions need at least two levels")
+        self.horizon_hours = float(horizon_hours)
+        self.forecast = forecast
+        self.levels = int(levels)
+        self.tariff = tariff
+
+    def __repr__(self):
+        return (f"MPCDispatch(horizon_hours={self.horizon_hours}, forecast={self.forecast!r}, levels={self.levels}, "
+                f"tariff={self.tariff!r})")
+
+    def horizon_steps(self, step_hours):
+        """Steps planned at every step on a grid of steps of step_hours."""
+        return max(1, int(round(self.horizon_hours / step_hours)))
+
+    def to_dict(self):
+        """The settings as a dictionary (part of the key of stored runs); a tariff is identified by its rates."""
+        settings = {'horizon_hours': self.horizon_hours, 'forecast': self.forecast, 'levels': self.levels}
+        if self.tariff is not None:
+            settings['tariff'] = {'name': self.tariff.name, 'rates': hashlib.sha256(self.tariff.rates.tobytes()).hexdigest()}
+        return settings
+
+
+def mpc_dispatch(load, irradiance, prices, capacity, charge_rate, discharge_rate, soc, panel_area, panel_efficiency,
+                 step_hours=1.0, horizon=24, forecast='perfect', period=24, cyclic=False, levels=LEVELS):
+    """
+    Dispatch a battery over a series of time steps with a rolling horizon.
+
+    Args:
+        load (array-like): Power consumption of each step (kW).
+        irradiance (array-like): Solar irradiance of each step (kW/m^2).
+        prices (array-like): Price of grid energy in each step.
+        capacity (float): Battery capacity (kWh).
+        charge_rate (float): Charge rate; a step charges at most charge_rate * capacity.
+        discharge_rate (float): Discharge rate; a step discharges at most discharge_rate * capacity.
+        soc (float): Initial state of charge (%).
+        panel_area (float): Solar panel area (m^2).
+        panel_efficiency (float): Solar panel efficiency (decimal).
+        step_hours (float): Length of a step in hours.
+        horizon (int): Steps planned at every step, including the current step.
+        forecast (str): 'perfect' or 'persistence' (the step one period earlier) forecasts.
+        period (int): Steps of a period of the persistence forecast (a day).
+        cyclic (bool): Whether the series repeats (a representative day), so that the horizon
+          wraps around to its start; otherwise the steps after the end have no value.
+        levels (int): Stored-energy levels of the value functions.
+
+    Returns:
+        tuple: SoC at the start of each step (%), discharge of each step (kW) and the final SoC.
+    """
+    load = np.nan_to_num(np.asarray(load, dtype=float))
+    irradiance = np.nan_to_num(np.asarray(irradiance, dtype=float))
+    prices = np.broadcast_to(np.asarray(prices, dtype=float), load.shape)
+    steps = len(load)
+    if capacity <= 0 or steps == 0:
+        return np.full(steps, float(soc)), np.zeros(steps), float(soc)
+
+    # Energy (kWh) the battery can take in and give out in each step
+    charge = np.minimum(irradiance * panel_area * panel_efficiency * step_hours, charge_rate * capacity * step_hours)
+    discharge_limit = np.minimum(discharge_rate * capacity * step_hours, np.maximum(load, 0.0) * step_hours)
+    value = prices  # Value of a kWh discharged in each step: the grid energy it replaces
+
+    # Forecasts of the steps the plans look ahead at
+    if forecast == 'persistence' and not cyclic and steps > period:
+        earlier = np.concatenate([np.arange(period), np.arange(steps - period)])
+        forecast_charge, forecast_limit = charge[earlier], discharge_limit[earlier]
+    else:
+        forecast_charge, forecast_limit = charge, discharge_limit   # A repeating day is its own persistence forecast
+
+    # The steps after the end: the start again for a repeating day, steps without value otherwise
+    extended = steps + horizon
+    if cyclic:
+        wrap = np.arange(extended) % steps
+        forecast_charge, forecast_limit, future_value = forecast_charge[wrap], forecast_limit[wrap], value[wrap]
+    else:
+        pad = np.zeros(horizon)
+        forecast_charge = np.concatenate([forecast_charge, pad])
+        forecast_limit = np.concatenate([forecast_limit, pad])
+        future_value = np.concatenate([value, pad])
+
+    e_min, e_max = MIN_SOC / 100 * capacity, MAX_SOC / 100 * capacity
+    step = (e_max - e_min) / (levels - 1)   # Stored energy between two levels (kWh)
+
+    # In levels above the reserve: the stored energy after charging from every level in every
+    # step, and the lowest level discharging can reach from there
+    after_charge = np.minimum(np.arange(levels) + forecast_charge[:, None] / step, levels - 1)
+    lowest = np.maximum(after_charge - forecast_limit[:, None] / step, 0)
+    level_value = future_value * step   # Value of discharging one level in each step
+
+    # values[s] is the value function at the start of step s of the stored level, for plans
+    # that end a number of steps later; it grows by one step per stage, from no value at the end
+    values = np.zeros((extended + 1, levels))
+    following = np.empty((extended + 1, levels))
+    rows = np.arange(extended)[:, None] * levels
+    for _ in range(horizon - 1):
+        values, following = following, values
+        target = np.clip(_hold_level(following[1:], level_value)[:, None], lowest, after_charge)
+        values[:-1] = level_value[:, None] * (after_charge - target) + _interpolate(following[1:], target, rows)
+        values[-1] = 0.0
+
+    # Best energy to hold after each step, given the value function of the rest of its plan
+    hold = (e_min + step * _hold_level(values[1:steps + 1], value * step)).tolist()
+
+    soc_log = np.empty(steps)
+    discharge_log = np.zeros(steps)
+    stored = float(soc) / 100 * capacity
+    for t, (gain, limit, keep) in enumerate(zip(charge.tolist(), discharge_limit.tolist(), hold)):
+        soc_log[t] = stored / capacity * 100
+        if stored < e_max:
+            stored = min(stored + gain, e_max)
+        if stored > e_min:
+            target = min(max(keep, stored - limit, e_min), stored)
+            discharge_log[t] = (stored - target) / step_hours
+            stored = target
+    return soc_log, discharge_log, stored / capacity * 100
+
+
+def _hold_level(values, level_value):
+    """
+    Level beyond which the marginal value of keeping energy (the slope of the concave value
+    function of each row) falls below the value of discharging it in the row's step.
+    """
+    return (np.diff(values, axis=1) >= level_value[:, None]).sum(axis=1)
+
+
+def _interpolate(values, position, rows):
+    """Linear interpolation of each row's value function at fractional levels of the row."""
+    index = np.minimum(position.astype(int), values.shape[1] - 2)   # Levels are not negative
+    flat = values.ravel()
+    low = flat[rows + index]
+    return low + (position - index) * (flat[rows + index + 1] - low)
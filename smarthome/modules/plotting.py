@@ -0,0 +1,214 @@
+"""
+This module provides the plots of the analysis results.
+
+It imports matplotlib, so the analysis modules never import it; the GUI imports this module
+only when it has results to plot, and headless runs do not pay matplotlib's startup cost.
+
+The charts of one season (solar irradiation, battery SoC, load profiles and costs) are drawn
+by SeasonCharts, which creates its bars, lines and labels once and afterwards only updates
+their data. The GUI draws them into four pyplot windows; ReportRenderer draws both seasons on
+one report page of a figure that is not attached to any window or interactive backend, and
+reuses the page for every household it renders, so report files can be written in bulk and
+in worker processes (see reports.py).
+
+Classes:
+    SeasonCharts: The four charts of one season, drawn once and updated with new results.
+    ReportRenderer: Renders the results of a household to report files (PNG, SVG, PDF, ...).
+    ProfilePlots: A class containing static methods to plot results in the GUI.
+Methods:
+    plot_seasonal_profiles(...): Plots the winter and summer irradiance, SoC, load profiles and costs
+
+Constants:
+    - REPORT_FORMATS: The report file formats.
+    - REPORT_SIZE: Size of a report page in inches.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+from .met_data import MeteorologicalData
+from .time_grid import HOURLY, TimeGrid
+
+REPORT_FORMATS = ('png', 'svg', 'pdf')
+REPORT_SIZE = (16, 18)  # inches
+COST_LABELS = ['Original\nProfile', 'Battery\nProfile', 'Shifted\nProfile']
+
+
+class SeasonCharts:
+    """ Irradiation, SoC, load profile and cost charts of one season, updated in place. """
+
+    def __init__(self, season, axes, grid=HOURLY):
+        """
+        Draw the empty charts.
+
+        Args:
+            season (str): Season name, for the titles.
+            axes (list): The irradiation, SoC, load profile and cost axes.
+            grid (TimeGrid): Time steps of the profiles to plot.
+        """
+        self.grid = grid
+        self.axes = axes
+        irradiance_ax, soc_ax, load_ax, cost_ax = axes
+        season = season.capitalize()
+        hours = np.arange(24)
+        x = grid.hours
+        step = grid.step_hours
+
+        self.irradiance = irradiance_ax.bar(hours, np.zeros(24), 0.50, label='Solar Irradiation', color='yellow', alpha=0.7)
+        self._hour_axis(irradiance_ax, f'{season} Meteorological Data', 'Irradiation (kW/m^2)')
+
+        self.soc = soc_ax.bar(x, np.zeros(grid.steps), 0.50 * step, label='Battery SoC', color='orange', alpha=0.7)
+        self._hour_axis(soc_ax, f'{season} SoC', 'State of Charge (%)')
+
+        width = 0.3 * step
+        self.loads = [
+            load_ax.bar(x - width, np.zeros(grid.steps), width, label='Original Profile', color='blue', alpha=0.7),
+            load_ax.bar(x, np.zeros(grid.steps), width, label='Battery Profile', color='green', alpha=0.7),
+            load_ax.bar(x + width, np.zeros(grid.steps), width, label='Shifted Profile', color='red', alpha=0.7),
+        ]
+        # Spans the whole height of the axes whatever its y limits (x in data, y in axes coordinates)
+        self.peak_span = Rectangle((0, 0), 0, 1, transform=load_ax.get_xaxis_transform(), color='yellow', alpha=0.2, label='Peak Hours')
+        load_ax.add_patch(self.peak_span)
+        self.threshold = load_ax.axhline(0, color='black', linestyle='--', linewidth=1.5, label='Threshold')
+        self._hour_axis(load_ax, f'{season} Load Profiles', 'Power (kW)')
+
+        x, width = 3, 0.3
+        self.costs = [
+            cost_ax.bar(x - width, 0, width, label='Original Profile', color='blue', alpha=0.7)[0],
+            cost_ax.bar(x, 0, width, label='Battery Profile', color='green', alpha=0.7)[0],
+            cost_ax.bar(x + width, 0, width, label='Shifted Profile', color='red', alpha=0.7)[0],
+        ]
+        cost_ax.set_title(f'{season} Cost Calculations')
+        cost_ax.set_ylabel('Cost ($)')
+        cost_ax.set_xticks([x - width, x, x + width])
+        cost_ax.set_xticklabels(COST_LABELS)
+        cost_ax.legend()
+        cost_ax.grid(True, alpha=0.3)
+
+    @staticmethod
+    def _hour_axis(ax, title, ylabel):
+        """Title, labels, hour ticks, legend and grid of a chart over the hours of the day."""
+        ax.set_title(title)
+        ax.set_xlabel('Hour of Day')
+        ax.set_ylabel(ylabel)
+        ax.set_xticks(np.arange(24))
+        ax.set_xticklabels([str(i) for i in range(24)])
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def update(self, original_hourly, battery_hourly, shifted_hourly, meteorological_df, soc_df, costs, threshold, peak_hours):
+        """
+        Show new results in the charts.
+
+        Args:
+            original_hourly, battery_hourly, shifted_hourly (DataFrame): Load profiles ('Power (kW)' per step).
+            meteorological_df (DataFrame): Seasonal solar irradiation profile.
+            soc_df (DataFrame): SoC at the start of each step.
+            costs (tuple): Original, battery and shifted costs.
+            threshold (float): Threshold line of the load profiles.
+            peak_hours (list): Peak hours, shaded in the load profiles.
+        """
+        irradiance_ax, soc_ax, load_ax, cost_ax = self.axes
+        irradiance = MeteorologicalData.irradiance_vector(meteorological_df)
+        self._set_heights(irradiance_ax, self.irradiance, irradiance)
+        self._set_heights(soc_ax, self.soc, soc_df['State of Charge (%)'].to_numpy())
+
+        loads = [hourly['Power (kW)'].to_numpy() for hourly in (original_hourly, battery_hourly, shifted_hourly)]
+        for bars, load in zip(self.loads, loads):
+            self._set_heights(load_ax, bars, load)
+        self.peak_span.set_x(min(peak_hours) - 0.5)
+        self.peak_span.set_width(max(peak_hours) - min(peak_hours) + 1)
+        self.threshold.set_ydata([threshold, threshold])
+        self._fit(load_ax, np.concatenate(loads + [[threshold]]))
+
+        self._set_heights(cost_ax, self.costs, np.asarray(costs, dtype=float))
+
+    @staticmethod
+    def _set_heights(ax, bars, heights):
+        """Set the heights of a set of bars and fit the y axis to them."""
+        for bar, height in zip(bars, heights.tolist()):
+            bar.set_height(height)
+        SeasonCharts._fit(ax, heights)
+
+    @staticmethod
+    def _fit(ax, values):
+        """
+        Set the y limits as autoscaling bars from zero would, without re-scanning every artist
+        of the axes: zero stays on the axis and the far ends get a 5% margin.
+        """
+        low, high = min(0.0, float(np.min(values))), max(0.0, float(np.max(values)))
+        margin = 0.05 * (high - low) or 0.05
+        ax.set_ylim(low - margin if low < 0 else 0.0, high + margin if high > 0 else margin)
+
+    def update_result(self, result, threshold, peak_hours):
+        """Show a result of EnergyAnalysis.analyze_season in the charts."""
+        self.update(result['original_hourly'], result['battery_hourly'], result['shifted_hourly'], result['meteorological'],
+                    result['soc'], (result['original_cost'], result['battery_cost'], result['shifted_cost']), threshold, peak_hours)
+
+
+class ReportRenderer:
+    """
+    Renders both seasons of a household on one report page, reusing the page for every household.
+
+    The page is a plain Figure, drawn by the file format's own canvas (Agg for PNG), so no
+    display or interactive backend is needed and several renderers can run in separate processes.
+    """
+
+    def __init__(self, grid=HOURLY, dpi=100):
+        self.dpi = dpi
+        self.figure = Figure(figsize=REPORT_SIZE)
+        axes = self.figure.subplots(4, 2)
+        self.charts = {season: SeasonCharts(season, list(axes[:, column]), grid)
+                       for column, season in enumerate(('winter', 'summer'))}
+        self.title = self.figure.suptitle(' ', fontsize=14)
+        # Lay the page out once; a layout engine left on the figure would redo it (and draw twice) on every save
+        self.figure.tight_layout(rect=(0, 0, 1, 0.97))
+        self.figure.set_layout_engine(None)
+
+    def render(self, path, results, threshold, peak_hours, title=''):
+        """
+        Write the report page of a household.
+
+        Args:
+            path (str): Report file; its extension selects the format (see REPORT_FORMATS).
+            results (dict): 'winter' and 'summer' results of EnergyAnalysis.analyze_season.
+            threshold (float): Threshold of the analysis.
+            peak_hours (list): Peak hours of the analysis.
+            title (str): Page title (e.g. the household and meteorological file).
+
+        Returns:
+            str: The report file.
+        """
+        for season, charts in self.charts.items():
+            charts.update_result(results[season], threshold, peak_hours)
+        self.title.set_text(title)
+        # Fast zlib compression: PNG encoding is a large part of a page's time at the default level
+        options = {'pil_kwargs': {'compress_level': 1}} if path.lower().endswith('.png') else {}
+        self.figure.savefig(path, dpi=self.dpi, **options)
+        return path
+
+
+class ProfilePlots:
+
+    @staticmethod
+    def plot_seasonal_profiles(winter_hourly, battery_winter_hourly, shifted_winter_hourly, winter_meteorological_df, winter_soc, winter_cost, battery_winter_cost, shifted_winter_cost,
+                               summer_hourly, battery_summer_hourly, shifted_summer_hourly, summer_meteorological_df, summer_soc, summer_cost, battery_summer_cost, shifted_summer_cost,
+                               threshold, peak_hours):
+        """Plot winter and summer profiles as bar charts, in four windows shown together."""
+
+        # One window per chart (meteorological data, SoC, load profiles, costs), winter above summer
+        figures = [plt.subplots(2, 1, figsize=(15, 10)) for _ in range(4)]
+        grid = TimeGrid(24 * 60 // len(winter_hourly))  # Time steps of the profiles
+
+        winter = SeasonCharts('winter', [axes[0] for _, axes in figures], grid)
+        summer = SeasonCharts('summer', [axes[1] for _, axes in figures], grid)
+        winter.update(winter_hourly, battery_winter_hourly, shifted_winter_hourly, winter_meteorological_df, winter_soc,
+                      (winter_cost, battery_winter_cost, shifted_winter_cost), threshold, peak_hours)
+        summer.update(summer_hourly, battery_summer_hourly, shifted_summer_hourly, summer_meteorological_df, summer_soc,
+                      (summer_cost, battery_summer_cost, shifted_summer_cost), threshold, peak_hours)
+
+        for fig, _ in figures:
+            fig.tight_layout()
+        plt.show()
@@ -0,0 +1,135 @@
+"""
+This module provides a parallel runner for multi-household portfolio analyses.
+
+Load profile files are split into chunks and analyzed by a pool of worker processes.
+The meteorological files are parsed once in the parent process and handed to every
+worker when it starts, so each worker holds them for its whole lifetime instead of
+receiving or re-parsing them with every task. Each task analyzes a chunk of households
+and returns its result rows, which are gathered into one table. When the runner is called
+inside an instrumentation session, the workers record their stages too and the records are
+added to that session. With a result store, each worker opens its own connection to the
+store's database, and runs already stored by any process are not recomputed.
+
+Classes:
+    PortfolioRunner: A class containing static methods to run a portfolio in parallel.
+Methods:
+    run(load_files, met_files, thresholds, peak_hours, solver, year, workers, chunk_size, grid, tariffs, store_path, pv, mpc): Results table
+    map_chunks(task, chunks, workers, initializer, initargs): Runs a task on chunks in worker processes
+"""
+
+import contextlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from . import instrument, trace
+from .analysis import EnergyAnalysis
+from .store import ResultStore
+from .time_grid import HOURLY
+
+# Parsed meteorological data and settings of the current worker process (set by _init_worker)
+_worker_state = {}
+
+
+def _init_worker(meteorological, settings, level, instrument_memory):
+    """Keep the parsed meteorological data and run settings for every task of this worker."""
+    trace.set_level(level)
+    _worker_state['meteorological'] = meteorological
+    if settings.get('store') is not None:
+        settings = {**settings, 'store': ResultStore(settings['store'])}  # Connections are per process
+    _worker_state['settings'] = settings
+    _worker_state['instrument_memory'] = instrument_memory  # None: not instrumented
+
+
+def _analyze_chunk(load_paths):
+    """
+    Analyze a chunk of load profile files in a worker; failures are reported as rows.
+    Returns the result rows and the stage records of the chunk (empty when not instrumented).
+    """
+    memory = _worker_state['instrument_memory']
+    with instrument.session(memory=memory) if memory is not None else contextlib.nullcontext() as run:
+        rows = []
+        for load_path in load_paths:
+            try:
+                rows.extend(EnergyAnalysis.analyze_load_file(load_path, _worker_state['meteorological'], **_worker_state['settings']))
+            except Exception as e:
+                rows.append({'Household': os.path.splitext(os.path.basename(load_path))[0], 'Load File': load_path, 'Error': str(e)})
+    return rows, run.records if run is not None else []
+
+
+class PortfolioRunner:
+
+    @staticmethod
+    def run(load_files, met_files, thresholds, peak_hours=None, solver='greedy', year=False,
+            workers=None, chunk_size=16, grid=HOURLY, tariffs=None, store_path=None, pv=None, mpc=None):
+        """
+        Analyze every load profile file against every meteorological file in parallel.
+        The workers trace at the trace level of the calling process.
+
+        Args:
+            load_files (list): Paths to the load profile Excel files.
+            met_files (list): Paths to the PVGIS meteorological CSV files.
+            thresholds (list): Threshold values to evaluate.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            year (bool): Run the full-year hourly simulation instead of the two seasons.
+            workers (int): Number of worker processes (default: number of CPUs).
+            chunk_size (int): Number of households per task.
+            grid (TimeGrid): Time steps of the simulated day.
+            tariffs (list): Tariffs to price every result with, in addition to the default tariff.
+            store_path (str): Database of a ResultStore that memoizes the seasonal runs.
+            pv (PVSpec): Charge the battery from the PV yield of this array instead of the sun height.
+            mpc (MPCDispatch): Dispatch the battery with a rolling horizon instead of the rules.
+
+        Returns:
+            DataFrame: One row per household, meteorological file, threshold and season, plus one
+            row with an 'Error' column for every household that failed.
+        """
+        peak_hours = peak_hours or EnergyAnalysis.default_peak_hours()
+        workers = workers or os.cpu_count() or 1
+
+        # Parse the shared inputs once, in the parent
+        meteorological = EnergyAnalysis.read_meteorology(met_files, year, pv)
+        settings = {'thresholds': list(thresholds), 'peak_hours': list(peak_hours), 'solver': solver, 'year': year, 'grid': grid,
+                    'tariffs': tariffs, 'store': store_path, 'pv': pv, 'mpc': mpc}
+
+        chunks = [load_files[i:i + chunk_size] for i in range(0, len(load_files), chunk_size)]
+        results = [None] * len(chunks)
+        run = instrument.current()
+        instrument_memory = run.memory if run is not None else None
+
+        initargs = (meteorological, settings, trace.get_level(), instrument_memory)
+        for index, (rows, records) in PortfolioRunner.map_chunks(_analyze_chunk, chunks, workers, _init_worker, initargs):
+            results[index] = rows
+            if run is not None:
+                run.records.extend(records)
+
+        return pd.DataFrame([row for rows in results for row in rows])
+
+    @staticmethod
+    def map_chunks(task, chunks, workers, initializer, initargs):
+        """
+        Run a task on every chunk in a pool of worker processes.
+
+        Args:
+            task (callable): Module-level function called with one chunk in a worker.
+            chunks (list): The chunks (e.g. lists of load profile files).
+            workers (int): Number of worker processes.
+            initializer (callable): Module-level function that sets up each worker.
+            initargs (tuple): Arguments of the initializer.
+
+        Yields:
+            tuple: Index of a chunk and the result of the task for it, in completion order.
+        """
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+            # Keep a bounded number of chunks in flight so a large portfolio is not queued at once
+            pending = {}
+            next_chunk = 0
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < 2 * workers:
+                    pending[executor.submit(task, chunks[next_chunk])] = next_chunk
+                    next_chunk += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
@@ -0,0 +1,212 @@
+"""
+This module provides the PV production stage: the hourly output of a solar array computed from
+the irradiance, temperature and power columns of a PVGIS file.
+
+MeteorologicalData averages the H_sun column (the sun height in degrees) into the irradiance
+the battery charges from. PVModel uses the plane-of-array irradiance G(i) (W/m^2) and the air
+temperature T2m of every hour of the year instead:
+    - The cell temperature follows the NOCT model, T_cell = T2m + (NOCT - 20) / 800 * G(i).
+    - The output of the array is derated by the temperature coefficient of power above 25 °C,
+      P = G(i) / 1000 * panel_area * panel_efficiency * (1 + temperature_coefficient * (T_cell - 25)).
+With the 'pvgis' source, the P column (the output PVGIS computed for the system of the file,
+whose peak power is in the header) is scaled to the peak power of the array instead.
+
+G(i) and P are computed by PVGIS for the panel orientation of the query (the Slope and
+Azimuth of the header), so the orientation is part of the site file. The whole year is one
+array expression; the yield of a (site file, PVSpec) pair is kept in memory and in the
+on-disk cache (one cache kind per specification), so every household on a site reuses it.
+
+The analysis consumes the yield as effective irradiance: the output of the array per m^2 of
+panel and per unit of efficiency (kW/m^2), i.e. the derated G(i), which the battery turns
+back into the output of its panel. seasonal_profiles and hourly return it in the layouts of
+MeteorologicalData.from_csv and read_hourly, so it can take the place of H_sun in every stage.
+
+Classes:
+    PVSpec: The panel specification of a PV array.
+    PVModel: A class containing static methods to compute the PV yield of a PVGIS file.
+Methods:
+    yield_series(path, spec): Hourly effective irradiance and output of the array over the file
+    seasonal_profiles(path, spec): Winter and summer profiles in the from_csv layout
+    hourly(path, spec): Hourly rows in the read_hourly layout
+
+Constants:
+    - SOURCES: The ways of computing the yield, 'model' (G(i) and T2m) or 'pvgis' (scaled P).
+    - TEMPERATURE_COEFFICIENT: Default temperature coefficient of power (1/°C, crystalline silicon).
+    - NOCT: Default nominal operating cell temperature (°C).
+    - MEMORY_ENTRIES: Yield series kept in memory.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import cache, trace
+from .met_data import SUMMER_MONTHS, SUMMER_SCHEDULE_MONTHS, WINTER_MONTHS, MeteorologicalData
+from .met_stream import PVGISStream
+
+SOURCES = ('model', 'pvgis')
+TEMPERATURE_COEFFICIENT = -0.004
+NOCT = 45.0
+MEMORY_ENTRIES = 256
+
+# Standard test conditions: irradiance (W/m^2) and cell temperature (°C) of the rated output
+STC_IRRADIANCE = 1000.0
+STC_TEMPERATURE = 25.0
+# Irradiance (W/m^2) and air temperature (°C) at which the NOCT is measured
+NOCT_IRRADIANCE = 800.0
+NOCT_AIR_TEMPERATURE = 20.0
+
+NOMINAL_POWER = 'Nominal power of the PV system (c-Si) (kWp)'
+
+# (path, modification time, size, specification) -> yield arrays, least recently used first
+_memory = OrderedDict()
+
+
+class PVSpec:
+    """ The panel specification of a PV array. """
+
+    def __init__(self, panel_area, panel_efficiency, temperature_coefficient=TEMPERATURE_COEFFICIENT, noct=NOCT,
+                 source='model'):
+        """
+        Args:
+            panel_area (float): Panel area (m^2).
+            panel_efficiency (float): Panel efficiency (decimal); the peak power is panel_area * panel_efficiency kW.
+            temperature_coefficient (float): Change of the output per °C of cell temperature above 25 °C.
+            noct (float): Nominal operating cell temperature (°C).
+            source (str): 'model' to compute the output from G(i) and T2m, 'pvgis' to scale the P column.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unknown PV source {source!r}; expected one of {', '.join(SOURCES)}")
+        self.panel_area = float(panel_area)
+        self.panel_efficiency = float(panel_efficiency)
+        self.temperature_coefficient = float(temperature_coefficient)
+        self.noct = float(noct)
+        self.source = source
+
+    def __repr__(self):
+        return ("PVSpec(" + ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items()) + ")")
+
+    def __eq__(self, other):
+        return isinstance(other, PVSpec) and other.to_dict() == self.to_dict()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    @property
+    def peak_power(self):
+        """Output of the array at standard test conditions (kW)."""
+        return self.panel_area * self.panel_efficiency
+
+    def to_dict(self):
+        """The specification as a dictionary (part of the key of stored runs)."""
+        return {
+            'panel_area': self.panel_area,
+            'panel_efficiency': self.panel_efficiency,
+            'temperature_coefficient': self.temperature_coefficient,
+            'noct': self.noct,
+            'source': self.source,
+        }
+
+    def key(self):
+        """Short hash of the specification, naming its cache entries."""
+        return hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class PVModel:
+
+    @staticmethod
+    def yield_series(path, spec):
+        """
+        Compute the hourly PV yield of a PVGIS file.
+
+        Args:
+            path (str): Path of the PVGIS hourly CSV file (with G(i) and T2m, or P for the 'pvgis' source).
+            spec (PVSpec): The panel specification.
+
+        Returns:
+            dict: 'time' (datetime64 array), 'irradiance' (effective irradiance, kW/m^2) and
+            'yield' (output of the array, kW) of every hour of the file.
+        """
+        stat = os.stat(path)
+        memory_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, spec.key())
+        series = _memory.get(memory_key)
+        if series is not None:
+            _memory.move_to_end(memory_key)
+            return series
+
+        kind = f'pv_yield/{spec.key()}'
+        series = cache.load(path, kind)
+        if series is None:
+            series = PVModel._compute(path, spec)
+            cache.store(path, kind, series)
+        _memory[memory_key] = series
+        if len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+        return series
+
+    @staticmethod
+    def _compute(path, spec):
+        """Compute the yield arrays of yield_series from the parsed columns of a file."""
+        df = MeteorologicalData.read_pvgis(path).dropna(subset=['time'])
+        trace.info("Computing the PV yield of %s (%s)", path, spec)
+        if spec.source == 'pvgis':
+            nominal_power = PVGISStream.read_header(path).get(NOMINAL_POWER)
+            if 'P' not in df.columns or not isinstance(nominal_power, float) or nominal_power <= 0:
+                raise ValueError(f"The 'pvgis' PV source needs the P column and the nominal power in the header of {path}")
+            # P (W) of the file's system per kW of its peak power is the output per kW of peak power of any array
+            irradiance = np.nan_to_num(df['P'].to_numpy(dtype=float)) / 1000 / nominal_power
+        else:
+            missing = {'G(i)', 'T2m'} - set(df.columns)
+            if missing:
+                raise ValueError(f"The PV model needs the columns {sorted(missing)} in {path}")
+            g_i = np.nan_to_num(df['G(i)'].to_numpy(dtype=float))
+            cell_temperature = df['T2m'].to_numpy(dtype=float) + (spec.noct - NOCT_AIR_TEMPERATURE) / NOCT_IRRADIANCE * g_i
+            derating = np.maximum(1 + spec.temperature_coefficient * np.nan_to_num(cell_temperature - STC_TEMPERATURE), 0)
+            irradiance = g_i / STC_IRRADIANCE * derating
+        return {
+            'time': df['time'].to_numpy(),
+            'irradiance': irradiance,
+            'yield': irradiance * spec.peak_power,
+        }
+
+    @staticmethod
+    def seasonal_profiles(path, spec):
+        """
+        Winter and summer average PV profiles of a file, in the layout of MeteorologicalData.from_csv
+        with the effective irradiance in 'Irradiation (kW/m^2)', plus a 'PV Yield (kW)' column.
+        """
+        series = PVModel.yield_series(path, spec)
+        time = pd.DatetimeIndex(series['time'])
+        hours, months = time.hour.to_numpy(), time.month.to_numpy()
+        profiles = []
+        for season_months in (WINTER_MONTHS, SUMMER_MONTHS):
+            selected = np.isin(months, season_months)
+            count = np.bincount(hours[selected], minlength=24)
+            known = count > 0
+            irradiance = np.bincount(hours[selected], series['irradiance'][selected], minlength=24)[known] / count[known]
+            profiles.append(pd.DataFrame({
+                'Hour': np.flatnonzero(known),
+                'Irradiation (kW/m^2)': irradiance,
+                'PV Yield (kW)': irradiance * spec.peak_power,
+            }))
+        return tuple(profiles)
+
+    @staticmethod
+    def hourly(path, spec):
+        """
+        Every hour of a file in the layout of MeteorologicalData.read_hourly, with the effective
+        irradiance in 'Irradiation (kW/m^2)', plus a 'PV Yield (kW)' column.
+        """
+        series = PVModel.yield_series(path, spec)
+        time = pd.DatetimeIndex(series['time'])
+        return pd.DataFrame({
+            'time': series['time'],
+            'Hour': time.hour.to_numpy(),
+            'Season': np.where(time.month.isin(SUMMER_SCHEDULE_MONTHS), 'summer', 'winter'),
+            'Irradiation (kW/m^2)': series['irradiance'],
+            'PV Yield (kW)': series['yield'],
+        })
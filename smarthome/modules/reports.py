@@ -0,0 +1,127 @@
+"""
+This module provides bulk rendering of household report pages.
+
+For every load profile file, meteorological file and threshold, both seasons are analyzed
+and drawn on one report page (see plotting.ReportRenderer) that is written to a file.
+Each process keeps a single renderer and only updates its data from one household to the
+next. Households are split into chunks as in PortfolioRunner: with several workers, the
+meteorological files are parsed once in the parent, and each worker sets up its renderer
+when it starts. matplotlib is imported by the renderers only, not by this module.
+
+Classes:
+    ReportRunner: A class containing static methods to render report pages.
+Methods:
+    run(load_files, met_files, thresholds, output_dir, fmt, ...): Renders every report page; returns their index
+    report_path(output_dir, load_path, met_path, threshold, fmt): File of a report page
+"""
+
+import os
+
+import pandas as pd
+
+from . import trace
+from .analysis import SEASONS, EnergyAnalysis
+from .portfolio import PortfolioRunner
+from .time_grid import HOURLY
+
+# Parsed meteorological data, settings and renderer of the current process (set by _init_worker)
+_worker_state = {}
+
+
+def _init_worker(meteorological, settings, level):
+    """Keep the parsed meteorological data and settings, and set up the renderer of this process."""
+    from .plotting import ReportRenderer
+
+    trace.set_level(level)
+    _worker_state['meteorological'] = meteorological
+    _worker_state['settings'] = settings
+    _worker_state['renderer'] = ReportRenderer(settings['grid'], settings['dpi'])
+
+
+def _render_chunk(load_paths):
+    """Analyze and render a chunk of load profile files; failures are reported as rows."""
+    settings = _worker_state['settings']
+    rows = []
+    for load_path in load_paths:
+        try:
+            rows.extend(_render_household(load_path, _worker_state['meteorological'], settings, _worker_state['renderer']))
+        except Exception as e:
+            rows.append({'Household': os.path.splitext(os.path.basename(load_path))[0], 'Load File': load_path, 'Error': str(e)})
+    return rows
+
+
+def _render_household(load_path, meteorological, settings, renderer):
+    """Render the pages of one load profile file; returns their index rows."""
+    household = os.path.splitext(os.path.basename(load_path))[0]
+    peak_hours = settings['peak_hours']
+    profiles = EnergyAnalysis.read_load_profile(load_path)
+    rows = []
+    for met_path, met_data in meteorological.items():
+        for threshold in settings['thresholds']:
+            results = {
+                season: EnergyAnalysis.analyze_season(profile_df, meteorological_df, threshold, peak_hours,
+                                                      settings['solver'], settings['grid'])
+                for season, profile_df, meteorological_df in zip(SEASONS, profiles, met_data)
+            }
+            path = ReportRunner.report_path(settings['output_dir'], load_path, met_path, threshold, settings['fmt'])
+            title = f"{household} | {os.path.basename(met_path)} | Threshold: {threshold:g} kW"
+            renderer.render(path, results, threshold, peak_hours, title)
+            rows.append({'Household': household, 'Load File': load_path, 'Meteorological File': met_path,
+                         'Threshold': threshold, 'Report': path})
+    return rows
+
+
+class ReportRunner:
+
+    @staticmethod
+    def run(load_files, met_files, thresholds, output_dir, fmt='png', peak_hours=None, solver='greedy',
+            grid=HOURLY, dpi=100, workers=None, chunk_size=16):
+        """
+        Render a report page for every load profile file, meteorological file and threshold.
+
+        Args:
+            load_files (list): Paths to the load profile Excel files.
+            met_files (list): Paths to the PVGIS meteorological CSV files.
+            thresholds (list): Threshold values to evaluate.
+            output_dir (str): Directory of the report files (created if missing).
+            fmt (str): Report file format: 'png', 'svg' or 'pdf'.
+            peak_hours (list): List of hours considered as peak hours.
+            solver (str): Load shifting solver, 'greedy' or 'optimal'.
+            grid (TimeGrid): Time steps of the simulated day.
+            dpi (int): Resolution of PNG pages.
+            workers (int): Number of worker processes (default: number of CPUs); 1 renders in this process.
+            chunk_size (int): Number of households per task.
+
+        Returns:
+            DataFrame: One row per report page with its file, plus one row with an 'Error'
+            column for every household that failed.
+        """
+        from .plotting import REPORT_FORMATS
+
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format {fmt!r}; expected one of {', '.join(REPORT_FORMATS)}")
+        os.makedirs(output_dir, exist_ok=True)
+        peak_hours = peak_hours or EnergyAnalysis.default_peak_hours()
+        workers = workers or os.cpu_count() or 1
+        meteorological = EnergyAnalysis.read_meteorology(met_files)
+        settings = {'thresholds': list(thresholds), 'peak_hours': list(peak_hours), 'solver': solver, 'grid': grid,
+                    'output_dir': output_dir, 'fmt': fmt, 'dpi': dpi}
+        initargs = (meteorological, settings, trace.get_level())
+
+        chunks = [load_files[i:i + chunk_size] for i in range(0, len(load_files), chunk_size)]
+        if workers == 1:
+            _init_worker(*initargs)
+            results = [_render_chunk(chunk) for chunk in chunks]
+        else:
+            results = [None] * len(chunks)
+            for index, rows in PortfolioRunner.map_chunks(_render_chunk, chunks, workers, _init_worker, initargs):
+                results[index] = rows
+
+        return pd.DataFrame([row for rows in results for row in rows])
+
+    @staticmethod
+    def report_path(output_dir, load_path, met_path, threshold, fmt):
+        """Return the report file of a household, meteorological file and threshold."""
+        household = os.path.splitext(os.path.basename(load_path))[0]
+        met_name = os.path.splitext(os.path.basename(met_path))[0]
+        return os.path.join(output_dir, f"{household}__{met_name}__{threshold:g}.{fmt}")
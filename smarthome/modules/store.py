@@ -0,0 +1,307 @@
+"""
+This module provides a persistent store of analysis results, used to memoize scenario runs.
+
+A run is the analysis of both seasons of one load profile file against one meteorological
+file for one threshold. Runs are kept in a SQLite database under a key that hashes the
+SHA-256 content hashes of the two input files together with every parameter of the
+analysis (threshold, peak hours, solver, time step and battery sizing), so a renamed or
+copied file still hits its stored run and an edited one never does. A hit returns the
+stored profiles, SoC series and costs without parsing or simulating anything.
+
+The costs of every run are plain columns of the database, so past runs can be listed and
+compared with runs() or any SQL query. The stored profiles are kept as NumPy arrays in one
+blob per season; once the blobs exceed the size limit, the least recently used runs are
+evicted. Writes that fail (e.g. a read-only or locked database) are reported and otherwise
+ignored, since the store only saves time.
+
+Classes:
+    ResultStore: A SQLite store of analysis runs.
+Functions:
+    default_path(): Database in the cache directory, or None when caching is disabled
+
+Constants:
+    - STORE_VERSION: Version of the stored results, bumped whenever the analysis computes different results
+      or the format changes; it is part of every key, so runs of another version are never returned.
+    - DEFAULT_MAX_BYTES: Default limit on the size of the stored profiles.
+    - FRAMES: The DataFrames of a season result that are stored.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import cache, trace
+
+STORE_VERSION = 3     # Bump on every change of the analysis results (costs, dispatch, shifting) or of the format
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+STORE_FILE = 'results.sqlite'
+FRAMES = ('original_hourly', 'battery_hourly', 'shifted_hourly', 'shifted_profile', 'meteorological', 'soc')
+COSTS = ('original_cost', 'battery_cost', 'shifted_cost')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    load_file TEXT, load_sha256 TEXT, met_file TEXT, met_sha256 TEXT,
+    threshold REAL, peak_hours TEXT, solver TEXT, step_minutes INTEGER, battery TEXT,
+    created REAL, last_used REAL, hits INTEGER DEFAULT 0, size INTEGER
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    key TEXT REFERENCES runs(key) ON DELETE CASCADE,
+    season TEXT, original_cost REAL, battery_cost REAL, shifted_cost REAL, data BLOB,
+    PRIMARY KEY (key, season)
+);
+CREATE INDEX IF NOT EXISTS runs_last_used ON runs(last_used);
+"""
+
+
+def default_path():
+    """Database in the cache directory (see cache.cache_dir), or None when caching is disabled."""
+    directory = cache.cache_dir()
+    return os.path.join(directory, STORE_FILE) if directory else None
+
+
+def _pack(result):
+    """Serialize the DataFrames of a season result to an .npz blob (no pickled objects)."""
+    arrays, layout = {}, {}
+    for name in FRAMES:
+        df = result[name]
+        default_index = isinstance(df.index, pd.RangeIndex) and df.index.equals(pd.RangeIndex(len(df)))
+        if not default_index:
+            arrays[f'{name}.index'] = df.index.to_numpy()
+        for i, column in enumerate(df.columns):
+            values = df[column].to_numpy()
+            arrays[f'{name}.{i}'] = values.astype(str) if values.dtype == object else values
+        layout[name] = {'columns': list(df.columns), 'rows': len(df)}
+    arrays['__layout__'] = np.array(json.dumps(layout))
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _unpack(blob):
+    """Rebuild the DataFrames of a season result from an .npz blob."""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        layout = json.loads(str(data['__layout__']))
+        frames = {}
+        for name, spec in layout.items():
+            index = data[f'{name}.index'] if f'{name}.index' in data.files else pd.RangeIndex(spec['rows'])
+            frames[name] = pd.DataFrame({column: data[f'{name}.{i}'] for i, column in enumerate(spec['columns'])}, index=index)
+    return frames
+
+
+class ResultStore:
+    """ A SQLite store of analysis runs, keyed by the content of their inputs and their parameters. """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Open (or create) a store.
+
+        Args:
+            path (str): Database file.
+            max_bytes (int): Limit on the size of the stored profiles; the least recently used
+              runs are evicted beyond it.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Shared by the GUI and its worker thread, so every use of the connection holds the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.execute('PRAGMA journal_mode = WAL')  # Readers are not blocked by a writing worker
+        self._connection.executescript(_SCHEMA)
+        self._digests = {}
+
+    @staticmethod
+    def open_default(max_bytes=DEFAULT_MAX_BYTES):
+        """Open the store in the cache directory; None when caching is disabled or it cannot be opened."""
+        path = default_path()
+        if path is None:
+            return None
+        try:
+            return ResultStore(path, max_bytes)
+        except (OSError, sqlite3.Error) as e:
+            trace.warning("Could not open the result store %s: %s", path, e)
+            return None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def digest(self, path):
+        """SHA-256 hash of a file's content, computed once per modification of the file."""
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if signature not in self._digests:
+            self._digests[signature] = cache.file_digest(path)
+        return self._digests[signature]
+
+    def key(self, load_file, met_file, threshold, peak_hours, solver, grid, battery):
+        """
+        Key of a run.
+
+        Args:
+            load_file, met_file (str): The input files (only their content counts).
+            threshold (float): Threshold of the analysis.
+            peak_hours (list): Peak hours of the analysis.
+            solver (str): Load shifting solver.
+            grid (TimeGrid): Time steps of the simulated day.
+            battery (dict): Battery sizing parameters (see EnergyAnalysis.battery_parameters).
+
+        Returns:
+            dict: The key ('key') and the inputs and parameters it was built from.
+        """
+        params = {
+            'load_sha256': self.digest(load_file), 'met_sha256': self.digest(met_file),
+            'threshold': float(threshold), 'peak_hours': sorted(int(hour) for hour in peak_hours),
+            'solver': solver, 'step_minutes': grid.step_minutes, 'battery': battery, 'version': STORE_VERSION,
+        }
+        key = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+        return {'key': key, 'load_file': load_file, 'met_file': met_file, **params}
+
+    def get(self, key):
+        """
+        Return the stored results of a run and mark it as used.
+
+        Args:
+            key (dict): Key of the run (see key).
+
+        Returns:
+            dict: Season name mapped to its result (as EnergyAnalysis.analyze_season returns it),
+            or None when the run is not stored.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT season, original_cost, battery_cost, shifted_cost, data FROM seasons WHERE key = ? ORDER BY rowid', (key['key'],)
+            ).fetchall()
+            if not rows:
+                return None
+            self._touch(key['key'])
+        results = {}
+        for season, *costs, blob in rows:
+            result = _unpack(blob)
+            result.update({name: np.float64(cost) for name, cost in zip(COSTS, costs)})
+            results[season] = result
+        return results
+
+    def put(self, key, results):
+        """
+        Store the results of a run, then evict the least recently used runs beyond the size limit.
+
+        Args:
+            key (dict): Key of the run (see key).
+            results (dict): Season name mapped to the result of EnergyAnalysis.analyze_season.
+        """
+        blobs = {season: _pack(result) for season, result in results.items()}
+        now = time.time()
+        try:
+            with self._lock, self._connection:
+                self._connection.execute('DELETE FROM runs WHERE key = ?', (key['key'],))
+                self._connection.execute(
+                    'INSERT INTO runs (key, load_file, load_sha256, met_file, met_sha256, threshold, peak_hours, solver,'
+                    ' step_minutes, battery, created, last_used, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key['key'], os.path.abspath(key['load_file']), key['load_sha256'], os.path.abspath(key['met_file']),
+                     key['met_sha256'], key['threshold'], json.dumps(key['peak_hours']), key['solver'], key['step_minutes'],
+                     json.dumps(key['battery'], sort_keys=True), now, now, sum(len(blob) for blob in blobs.values())),
+                )
+                self._connection.executemany(
+                    'INSERT INTO seasons (key, season, original_cost, battery_cost, shifted_cost, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(key['key'], season, *(float(result[name]) for name in COSTS), blobs[season])
+                     for season, result in results.items()],
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            trace.warning("Could not store the results of %s in %s: %s", key['load_file'], self.path, e)
+
+    def _touch(self, key):
+        try:
+            with self._connection:
+                self._connection.execute('UPDATE runs SET last_used = ?, hits = hits + 1 WHERE key = ?', (time.time(), key))
+        except sqlite3.Error:
+            pass  # A locked database only loses the recency of this hit
+
+    def _evict(self):
+        """Delete the least recently used runs until the stored profiles fit the size limit."""
+        total = 0
+        evicted = []
+        for key, size in self._connection.execute('SELECT key, size FROM runs ORDER BY last_used DESC'):
+            total += size
+            if total > self.max_bytes:
+                evicted.append((key,))
+        if evicted:
+            self._connection.executemany('DELETE FROM runs WHERE key = ?', evicted)
+            trace.info("Evicted %s runs from the result store", len(evicted))
+
+    def size(self):
+        """Number of stored runs and size of their profiles in bytes."""
+        with self._lock:
+            count, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM runs').fetchone()
+        return count, size
+
+    def clear(self):
+        """Delete every stored run."""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM runs')
+        with self._lock:
+            self._connection.execute('VACUUM')
+
+    def runs(self, household=None, met_file=None, threshold=None, season=None, solver=None):
+        """
+        List the stored runs, one row per run and season, most recently used first.
+
+        Args:
+            household (str): Only runs of this load profile (file name without extension).
+            met_file (str): Only runs with this meteorological file (path or file name).
+            threshold (float): Only runs with this threshold.
+            season (str): Only this season.
+            solver (str): Only runs with this load shifting solver.
+
+        Returns:
+            DataFrame: The inputs, parameters, costs and use of each run.
+        """
+        conditions, params = [], []
+        if met_file is not None:
+            conditions.append('(r.met_file = ? OR r.met_file LIKE ?)')
+            params += [os.path.abspath(met_file), f'%{os.sep}{os.path.basename(met_file)}']
+        if threshold is not None:
+            conditions.append('r.threshold = ?')
+            params.append(float(threshold))
+        if season is not None:
+            conditions.append('s.season = ?')
+            params.append(season)
+        if solver is not None:
+            conditions.append('r.solver = ?')
+            params.append(solver)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        runs = self.query(
+            'SELECT r.load_file AS "Load File", r.met_file AS "Meteorological File", r.threshold AS "Threshold",'
+            ' s.season AS "Season", r.solver AS "Solver", r.step_minutes AS "Step (min)", r.peak_hours AS "Peak Hours",'
+            ' s.original_cost AS "Original Cost", s.battery_cost AS "Battery Cost", s.shifted_cost AS "Shifted Cost",'
+            ' r.created AS "Created", r.last_used AS "Last Used", r.hits AS "Hits", r.key AS "Key"'
+            f' FROM runs r JOIN seasons s ON s.key = r.key {where} ORDER BY r.last_used DESC, r.key, s.season DESC',
+            params,
+        )
+        runs.insert(0, 'Household', [os.path.splitext(os.path.basename(path))[0] for path in runs['Load File']])
+        if household is not None:
+            runs = runs[runs['Household'] == household].reset_index(drop=True)
+        for column in ('Created', 'Last Used'):
+            runs[column] = pd.to_datetime(runs[column], unit='s').dt.floor('s')
+        return runs
+
+    def query(self, sql, params=()):
+        """
+        Run any SQL query on the store (tables 'runs' and 'seasons', see _SCHEMA).
+
+        Returns:
+            DataFrame: The rows of the query.
+        """
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=params)
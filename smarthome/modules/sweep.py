@@ -0,0 +1,145 @@
+"""
+This module provides a parameter-sweep API for battery sizing studies.
+
+A sweep evaluates many battery configurations and thresholds against one load profile
+and one meteorological profile. All configurations are simulated together by the
+dispatch kernel (one scenario per configuration), and their costs are computed with a
+single matrix product against the hourly tariffs, so no Battery object is built per point.
+
+Classes:
+    BatterySweep: A class containing static methods to build and evaluate parameter sets.
+Methods:
+    grid(**values): Every combination of the given parameter values
+    latin_hypercube(bounds, n_samples, seed): Latin hypercube sample within parameter bounds
+    evaluate(profile_df, meteorological_df, parameters_df, peak_hours, threshold, tariffs, months): Cost of every parameter set
+
+Constants:
+    - PARAMETERS: The parameters of a sweep point.
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import analysis
+from .calculations import Calculations
+from .dispatch import dispatch_battery
+from .load_kernel import table_load
+from .met_data import MeteorologicalData
+from .tariff import TariffMatrix
+
+PARAMETERS = ('threshold', 'capacity', 'charge_rate', 'discharge_rate', 'panel_area', 'panel_efficiency')
+
+
+class BatterySweep:
+
+    @staticmethod
+    def defaults(profile_df, threshold):
+        """Parameters used by the analysis engine for a profile, for any parameter a sweep leaves out."""
+        return {
+            'threshold': threshold,
+            'capacity': table_load(profile_df).max() * analysis.CAPACITY_FACTOR,
+            'charge_rate': analysis.CHARGE_RATE,
+            'discharge_rate': analysis.DISCHARGE_RATE,
+            'panel_area': analysis.PANEL_AREA,
+            'panel_efficiency': analysis.PANEL_EFFICIENCY,
+        }
+
+    @staticmethod
+    def grid(**values):
+        """
+        Build every combination of the given parameter values.
+
+        Args:
+            **values: Parameter name (see PARAMETERS) mapped to a list of values.
+
+        Returns:
+            DataFrame: One row per combination.
+        """
+        BatterySweep.check_names(values)
+        if not values:
+            return pd.DataFrame(index=[0])
+        mesh = np.meshgrid(*(np.asarray(v, dtype=float) for v in values.values()), indexing='ij')
+        return pd.DataFrame({name: axis.ravel() for name, axis in zip(values, mesh)})
+
+    @staticmethod
+    def latin_hypercube(bounds, n_samples, seed=None):
+        """
+        Draw a Latin hypercube sample: each parameter range is cut into n_samples equal strata
+        and every stratum is sampled exactly once.
+
+        Args:
+            bounds (dict): Parameter name mapped to its (low, high) range.
+            n_samples (int): Number of parameter sets.
+            seed (int): Random seed.
+
+        Returns:
+            DataFrame: One row per parameter set.
+        """
+        BatterySweep.check_names(bounds)
+        rng = np.random.default_rng(seed)
+        samples = {}
+        for name, (low, high) in bounds.items():
+            strata = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+            samples[name] = low + strata * (high - low)
+        return pd.DataFrame(samples)
+
+    @staticmethod
+    def evaluate(profile_df, meteorological_df, parameters_df, peak_hours, threshold=None, tariffs=None, months=None):
+        """
+        Simulate every parameter set and compute its cost.
+
+        Args:
+            profile_df (DataFrame): Appliance profile for the season.
+            meteorological_df (DataFrame): Hourly solar irradiance for the season.
+            parameters_df (DataFrame): One parameter set per row (from grid or latin_hypercube);
+              missing parameters take the analysis engine defaults.
+            peak_hours (list): List of hours considered as peak hours.
+            threshold (float): Threshold for parameter sets without a 'threshold' column.
+            tariffs (list): Tariffs to price every parameter set with as well; each adds a
+              '<name> Battery Cost' column, from one batched evaluation of all sets and tariffs.
+            months (list): Months the season stands for, for seasonal tariffs (see analysis.SEASON_MONTHS).
+
+        Returns:
+            DataFrame: The parameter sets with their cost, discharged energy and final SoC.
+        """
+        if threshold is None and 'threshold' not in parameters_df:
+            raise ValueError("A threshold must be given as a sweep parameter or as the threshold argument")
+
+        load = table_load(profile_df)
+        irradiance = MeteorologicalData.irradiance_vector(meteorological_df)
+        peak = np.isin(np.arange(24), peak_hours)
+
+        # One column per parameter, defaults filled in for the ones not swept
+        points = {
+            name: (parameters_df[name].to_numpy(dtype=float) if name in parameters_df
+                   else np.full(len(parameters_df), value, dtype=float))
+            for name, value in BatterySweep.defaults(profile_df, threshold).items()
+        }
+        initial_soc = points['capacity'] * analysis.INITIAL_SOC_FACTOR
+
+        soc, discharge, final_soc = dispatch_battery(
+            load, irradiance, peak, points['threshold'], points['capacity'], points['charge_rate'],
+            points['discharge_rate'], initial_soc, points['panel_area'], points['panel_efficiency'],
+        )
+
+        # Hourly profile net of discharge for every point, priced with one matrix product
+        battery_hourly = load - discharge
+        cost = battery_hourly @ Calculations.hourly_tariffs(peak_hours)
+
+        results = pd.DataFrame(points)
+        results['Battery Cost'] = np.round(cost, 2)
+        results['Original Cost'] = round(float(load @ Calculations.hourly_tariffs(peak_hours)), 2)
+        results['Discharge (kWh)'] = discharge.sum(axis=1)
+        results['Final SoC (%)'] = final_soc
+        if tariffs:
+            costs = TariffMatrix.day(tariffs, months=months).cost(battery_hourly)
+            for j, tariff in enumerate(tariffs):
+                results[f'{tariff.name} Battery Cost'] = np.round(costs[:, j], 2)
+        return results
+
+    @staticmethod
+    def check_names(parameters):
+        """Raise ValueError for names that are not sweep parameters."""
+        unknown = set(parameters) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}; expected some of {PARAMETERS}")
@@ -0,0 +1,286 @@
+"""
+This module provides a tariff model that compiles into price vectors.
+
+A Tariff holds an energy rate for every (month, weekday, hour), which covers time-of-use,
+per-weekday and seasonal tariffs alike, an export credit rate in the same layout for energy
+fed back to the grid, and a demand charge on the highest load of each billing period
+(optionally counted in some hours only). Tariffs are compiled for a time axis, either the
+steps of a representative day or the timestamps of a full-year simulation, into a
+TariffMatrix with one row of prices per tariff. The cost of any number of load profiles
+under every tariff is then one broadcast product and sum over the steps, plus a masked
+maximum per billing period for the demand charges.
+
+Classes:
+    Tariff: Energy, export and demand rates of one tariff, with the cost of a representative day.
+    TariffMatrix: Tariffs compiled for one time axis, with batched cost evaluation.
+Functions:
+    load_tariffs(path): Reads tariff definitions from a JSON file
+
+Example:
+    tou = Tariff('tou', 0.1).with_rates(0.2, hours=range(6, 17)).with_rates(0.3, hours=range(17, 23))
+    weekend = tou.with_rates(0.1, weekdays=[5, 6]).renamed('tou-weekend')
+    matrix = TariffMatrix.day([tou, weekend], months=[6, 7, 8])
+    costs = matrix.cost(loads)  # loads: (profiles, 24) -> costs: (profiles, 2)
+
+Constants:
+    - MONTHS, WEEKDAYS, HOURS: The axes of the rate tables (weekdays are Monday = 0, as in pandas).
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from .time_grid import HOURLY
+
+MONTHS, WEEKDAYS, HOURS = 12, 7, 24
+
+
+def _table(rates):
+    """Broadcast a rate (scalar, 24 hours, 7 x 24 or 12 x 7 x 24) to a (month, weekday, hour) table."""
+    rates = np.asarray(rates, dtype=float)
+    return np.broadcast_to(rates, (MONTHS, WEEKDAYS, HOURS)).copy()
+
+
+def _selection(months=None, weekdays=None, hours=None):
+    """Index of the (month, weekday, hour) cells selected by 1-based months, weekdays and hours (None: all)."""
+    months = np.arange(MONTHS) if months is None else np.asarray(list(months), dtype=int) - 1
+    weekdays = np.arange(WEEKDAYS) if weekdays is None else np.asarray(list(weekdays), dtype=int)
+    hours = np.arange(HOURS) if hours is None else np.asarray(list(hours), dtype=int)
+    return np.ix_(months, weekdays, hours)
+
+
+def _day(table, months, weekdays):
+    """
+    Average day of a rate table over the selected months and weekdays. Hours with the same rate
+    in every selected day keep that rate exactly (no averaging round-off).
+    """
+    days = table[_selection(months, weekdays)].reshape(-1, HOURS)
+    return np.where((days == days[0]).all(axis=0), days[0], days.mean(axis=0))
+
+
+class Tariff:
+    """ Energy, export and demand rates of one tariff. """
+
+    def __init__(self, name, rates, export_rates=0.0, demand_charge=0.0, demand_hours=None):
+        """
+        Args:
+            name (str): Tariff name (used in result columns).
+            rates: Energy rate ($/kWh): a scalar, 24 hourly rates, a 7 x 24 weekday table or a 12 x 7 x 24 table.
+            export_rates: Credit for exported energy ($/kWh), in the same layouts.
+            demand_charge (float): Charge per kW of the highest load of each billing period ($/kW).
+            demand_hours (list): Hours in which the demand is measured (default: all).
+        """
+        self.name = name
+        self.rates = _table(rates)
+        self.export_rates = _table(export_rates)
+        self.demand_charge = float(demand_charge)
+        self.demand_hours = np.arange(HOURS) if demand_hours is None else np.asarray(list(demand_hours), dtype=int)
+
+    def __repr__(self):
+        return f"Tariff({self.name!r})"
+
+    def _copy(self):
+        return Tariff(self.name, self.rates, self.export_rates, self.demand_charge, self.demand_hours)
+
+    def renamed(self, name):
+        """Return a copy of the tariff with another name."""
+        tariff = self._copy()
+        tariff.name = name
+        return tariff
+
+    def with_rates(self, rate, months=None, weekdays=None, hours=None):
+        """
+        Return a copy with the energy rate of the selected cells replaced.
+
+        Args:
+            rate (float): The new rate ($/kWh).
+            months (list): Months 1-12 (default: all), e.g. for a seasonal rate.
+            weekdays (list): Weekdays 0-6, Monday first (default: all), e.g. [5, 6] for weekends.
+            hours (list): Hours 0-23 (default: all), e.g. the peak hours of a time-of-use rate.
+        """
+        tariff = self._copy()
+        tariff.rates[_selection(months, weekdays, hours)] = rate
+        return tariff
+
+    def with_export_rates(self, rate, months=None, weekdays=None, hours=None):
+        """Return a copy with the export credit of the selected cells replaced (see with_rates)."""
+        tariff = self._copy()
+        tariff.export_rates[_selection(months, weekdays, hours)] = rate
+        return tariff
+
+    def day_prices(self, grid=HOURLY, months=None, weekdays=None):
+        """
+        Energy rate of every step of a representative day.
+
+        Args:
+            grid (TimeGrid): Time steps of the day.
+            months (list): Months the day stands for (default: all), e.g. the months of a season.
+            weekdays (list): Weekdays the day stands for (default: all).
+
+        Returns:
+            ndarray: One rate per step, averaged over the selected days.
+        """
+        return grid.from_hourly(_day(self.rates, months, weekdays))
+
+    def day_export_prices(self, grid=HOURLY, months=None, weekdays=None):
+        """Export credit of every step of a representative day (see day_prices)."""
+        return grid.from_hourly(_day(self.export_rates, months, weekdays))
+
+    def step_prices(self, load, grid=HOURLY, months=None, weekdays=None):
+        """
+        Price of every step of a representative day's net load: the energy rate, or the export
+        credit where the load is negative (see day_prices).
+        """
+        load = np.asarray(load, dtype=float)
+        prices = self.day_prices(grid, months, weekdays)
+        if (load < 0).any():
+            prices = np.where(load < 0, self.day_export_prices(grid, months, weekdays), prices)
+        return prices
+
+    def day_cost(self, load, grid=HOURLY, months=None, weekdays=None):
+        """
+        Cost of the net load of a representative day (unrounded): every step at its price (see
+        step_prices), added in order as a running total would, plus the demand charge on the
+        highest load of the day's demand hours.
+
+        Args:
+            load (ndarray): Net load of each step of the day (kW).
+            grid (TimeGrid): Time steps of the day.
+            months (list): Months the day stands for (default: all).
+            weekdays (list): Weekdays the day stands for (default: all).
+
+        Returns:
+            float: The cost of the day.
+        """
+        load = np.asarray(load, dtype=float)
+        cost = float(np.cumsum(load * self.step_prices(load, grid, months, weekdays) * grid.step_hours)[-1])
+        if self.demand_charge:
+            cost += self.demand_charge * max(load[grid.hour_mask(self.demand_hours)].max(initial=0.0), 0.0)
+        return cost
+
+    def prices(self, times):
+        """Energy rate at each timestamp (datetime64 array or DatetimeIndex)."""
+        return self.rates[self._cells(times)]
+
+    @staticmethod
+    def _cells(times):
+        times = pd.DatetimeIndex(times)
+        return times.month.to_numpy() - 1, times.weekday.to_numpy(), times.hour.to_numpy()
+
+    @staticmethod
+    def from_dict(spec):
+        """
+        Build a tariff from a definition such as:
+            {"name": "tou", "rate": 0.1,
+             "periods": [{"rate": 0.3, "hours": [17, 18, 19, 20, 21, 22], "weekdays": [0, 1, 2, 3, 4]}],
+             "export_rate": 0.05, "export_periods": [...], "demand_charge": 4.0, "demand_hours": [17, 18]}
+        Periods are applied in order, so later periods override earlier ones; each period may set
+        'months' (1-12), 'weekdays' (0-6, Monday first) and 'hours' (0-23).
+        """
+        tariff = Tariff(spec['name'], spec.get('rate', 0.0), spec.get('export_rate', 0.0),
+                        spec.get('demand_charge', 0.0), spec.get('demand_hours'))
+        for period in spec.get('periods', []):
+            tariff = tariff.with_rates(period['rate'], period.get('months'), period.get('weekdays'), period.get('hours'))
+        for period in spec.get('export_periods', []):
+            tariff = tariff.with_export_rates(period['rate'], period.get('months'), period.get('weekdays'), period.get('hours'))
+        return tariff
+
+
+class TariffMatrix:
+    """ Tariffs compiled for one time axis: a row of import and export prices per tariff. """
+
+    def __init__(self, tariffs, import_prices, export_prices, demand_mask, periods, step_hours):
+        self.tariffs = list(tariffs)
+        self.names = [tariff.name for tariff in self.tariffs]
+        self.import_prices = import_prices  # (tariffs, steps), $/kWh
+        self.export_prices = export_prices  # (tariffs, steps), $/kWh
+        self.demand_charges = np.array([tariff.demand_charge for tariff in self.tariffs])
+        self.demand_mask = demand_mask  # (tariffs, steps), steps in which the demand is measured
+        self.periods = periods  # Billing period of each step
+        self.step_hours = step_hours
+
+    @staticmethod
+    def day(tariffs, grid=HOURLY, months=None, weekdays=None):
+        """
+        Compile tariffs for the steps of a representative day (see Tariff.day_prices). The day is one
+        billing period, so demand charges apply once to its highest load.
+        """
+        import_prices = np.array([tariff.day_prices(grid, months, weekdays) for tariff in tariffs])
+        export_prices = np.array([tariff.day_export_prices(grid, months, weekdays) for tariff in tariffs])
+        demand_mask = np.array([grid.hour_mask(tariff.demand_hours) for tariff in tariffs])
+        return TariffMatrix(tariffs, import_prices, export_prices, demand_mask, np.zeros(grid.steps, dtype=int), grid.step_hours)
+
+    @staticmethod
+    def timeline(tariffs, times, step_hours=1.0):
+        """
+        Compile tariffs for a series of timestamps (e.g. the 'time' column of Battery.simulate_year).
+        Each calendar month is a billing period.
+        """
+        cells = Tariff._cells(times)
+        import_prices = np.array([tariff.rates[cells] for tariff in tariffs])
+        export_prices = np.array([tariff.export_rates[cells] for tariff in tariffs])
+        demand_mask = np.array([np.isin(cells[2], tariff.demand_hours) for tariff in tariffs])
+        times = pd.DatetimeIndex(times)
+        periods = times.year.to_numpy() * 12 + times.month.to_numpy()
+        return TariffMatrix(tariffs, import_prices, export_prices, demand_mask, periods, step_hours)
+
+    def cost(self, load):
+        """
+        Cost of load profiles under every tariff.
+
+        Args:
+            load (ndarray): Net load of each step (kW; negative for export), one profile or a
+              (profiles, steps) matrix.
+
+        Returns:
+            ndarray: Cost of each profile under each tariff, (profiles, tariffs), or (tariffs,)
+            for a single profile.
+        """
+        load = np.asarray(load, dtype=float)
+        energy = load[..., None, :] * self.step_hours
+        # Each step at its import price, or its export price when the load is negative, so a tariff
+        # that credits export at the import rate prices the load linearly. Products summed per
+        # (profile, tariff) rather than through a BLAS matrix product, whose summation order
+        # depends on the batch size: a profile's cost must not change by a cent when it is priced
+        # together with other profiles or tariffs
+        cost = (energy * np.where(energy < 0, self.export_prices, self.import_prices)).sum(axis=-1)
+
+        charged = np.flatnonzero(self.demand_charges)
+        if len(charged):
+            cost[..., charged] += self.peak_demand(load, charged) * self.demand_charges[charged]
+        return cost
+
+    def peak_demand(self, load, tariffs=None):
+        """
+        Sum over the billing periods of the highest load in each period's demand hours.
+
+        Args:
+            load (ndarray): One profile or a (profiles, steps) matrix (kW).
+            tariffs (list): Indices of the tariffs (default: all).
+
+        Returns:
+            ndarray: (profiles, tariffs), or (tariffs,) for a single profile.
+        """
+        tariffs = np.arange(len(self.tariffs)) if tariffs is None else np.asarray(tariffs)
+        # Runs of consecutive steps in the same period; peaks of runs of one period are combined after
+        starts = np.flatnonzero(np.r_[True, self.periods[1:] != self.periods[:-1]])
+        _, run_period = np.unique(self.periods[starts], return_inverse=True)
+
+        masked = np.where(self.demand_mask[tariffs], load[..., None, :], -np.inf)  # (..., tariffs, steps)
+        run_peak = np.maximum.reduceat(masked, starts, axis=-1)
+        peak = np.full(run_peak.shape[:-1] + (run_period.max() + 1,), -np.inf)
+        for run, period in enumerate(run_period):
+            peak[..., period] = np.maximum(peak[..., period], run_peak[..., run])
+        return np.where(np.isfinite(peak), np.maximum(peak, 0.0), 0.0).sum(axis=-1)
+
+
+def load_tariffs(path):
+    """Read a JSON list of tariff definitions (see Tariff.from_dict)."""
+    with open(path) as f:
+        specs = json.load(f)
+    tariffs = [Tariff.from_dict(spec) for spec in specs]
+    names = [tariff.name for tariff in tariffs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Tariff names must be unique in {path}")
+    return tariffs
@@ -0,0 +1,89 @@
+"""
+This module provides the time grid of a simulated day.
+
+A TimeGrid splits the day into equal steps (60 minutes by default, or e.g. 15 or 5 minutes)
+and maps everything the pipeline expresses in hours onto those steps: appliance intervals
+become load vectors with one value per step, hourly data (solar irradiance, tariff rates)
+is repeated over the steps of each hour, and power is converted to energy with the step
+length. All mappings are array operations, so a finer grid only makes the arrays longer.
+
+The hourly grid gives exactly the results of the 24-slot profiles, so HOURLY is the
+default everywhere.
+
+Classes:
+    TimeGrid: The steps of a day at a given resolution.
+
+Constants:
+    - MINUTES_PER_HOUR: Minutes in an hour; the step length must divide it.
+    - HOURLY: The 60-minute grid.
+"""
+
+import numpy as np
+
+from .appliances import ApplianceTable
+from .load_kernel import interval_load, point_load
+
+MINUTES_PER_HOUR = 60
+
+
+class TimeGrid:
+    """ The steps of a day at a resolution of step_minutes. """
+
+    def __init__(self, step_minutes=60):
+        if step_minutes <= 0 or MINUTES_PER_HOUR % step_minutes:
+            raise ValueError(f"The step must divide an hour, got {step_minutes} minutes")
+        self.step_minutes = int(step_minutes)
+        self.steps_per_hour = MINUTES_PER_HOUR // self.step_minutes
+        self.steps = 24 * self.steps_per_hour   # Steps per day
+        self.step_hours = self.step_minutes / MINUTES_PER_HOUR  # Step length (h), converts kW to kWh
+        self.index = np.arange(self.steps)
+        self.hour_index = self.index // self.steps_per_hour    # Hour of the day of each step
+        # Start of each step in hours (integers on the hourly grid)
+        self.hours = self.hour_index if self.steps_per_hour == 1 else self.index * self.step_hours
+
+    def __repr__(self):
+        return f"TimeGrid(step_minutes={self.step_minutes})"
+
+    def __eq__(self, other):
+        return isinstance(other, TimeGrid) and other.step_minutes == self.step_minutes
+
+    def __hash__(self):
+        return hash(self.step_minutes)
+
+    @property
+    def is_hourly(self):
+        """Whether the grid has one step per hour."""
+        return self.steps_per_hour == 1
+
+    def slots(self, hours):
+        """Step positions of times given in hours (fractional; truncated by the load kernels)."""
+        return np.asarray(hours, dtype=float) * self.steps_per_hour
+
+    def snap(self, hours):
+        """Round times given in hours down to the start of their step."""
+        return np.floor(np.asarray(hours, dtype=float) * self.steps_per_hour) / self.steps_per_hour
+
+    def table_load(self, profile):
+        """Load of every step of an ApplianceTable or an appliance DataFrame (see load_kernel.table_load)."""
+        start, end, power = ApplianceTable.intervals_of(profile)
+        return interval_load(self.slots(start), self.slots(end), power, self.steps)
+
+    def point_load(self, hours, power):
+        """Sum values that each occupy the step starting at the given time (hours) into a load vector."""
+        return point_load(self.slots(hours), power, self.steps)
+
+    def from_hourly(self, values):
+        """Repeat a 24-value hourly array (irradiance, tariffs, ...) over the steps of each hour."""
+        return np.asarray(values)[self.hour_index]
+
+    def hour_mask(self, hours):
+        """Whether each step falls in one of the given hours (e.g. the peak hours)."""
+        return np.isin(self.hour_index, hours)
+
+    def hour_steps(self, hours):
+        """Steps of the given hours, in the order of the hours."""
+        hours = np.asarray(hours, dtype=int)
+        return (hours[:, None] * self.steps_per_hour + np.arange(self.steps_per_hour)).ravel()
+
+
+HOURLY = TimeGrid(60)
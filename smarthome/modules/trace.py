@@ -0,0 +1,162 @@
+"""
+This module provides the tracing used by the analysis modules in place of print().
+
+Messages have a level and are printed only when the current trace level is at least that
+level. Their arguments are %-formatted only when the message is printed, so a disabled
+message (including one that would render a whole DataFrame) costs a single comparison.
+
+Per-step decisions (battery dispatch, load shifts, hourly costs, ...) can also be recorded
+as events into an in-memory columnar TraceBuffer while a capture is active, to be inspected
+as DataFrames afterwards instead of being rendered as text. Outside a capture, record()
+returns immediately, and call sites that need extra work to build an event check
+capturing() first.
+
+The initial level is read from the SMARTHOME_TRACE environment variable ('off', 'warning',
+'info' or 'debug'; default: 'warning'). The command line tools show more with -v.
+
+Classes:
+    TraceBuffer: In-memory columnar store of recorded events.
+Functions:
+    set_level(level): Sets the trace level (a level constant or its name)
+    get_level(): Returns the trace level
+    enabled(level): Whether messages of a level are printed
+    warning(message, *args), info(message, *args), debug(message, *args): Print a message
+    capture(): Context manager that records events into a new TraceBuffer
+    capturing(): Whether a capture is active
+    record(event, **columns): Records an event into the active capture
+
+Constants:
+    - OFF, WARNING, INFO, DEBUG: Trace levels, from least to most verbose.
+    - TRACE_ENV: Environment variable holding the initial level.
+"""
+
+import contextlib
+import os
+
+import numpy as np
+import pandas as pd
+
+OFF = 0
+WARNING = 1
+INFO = 2
+DEBUG = 3
+LEVEL_NAMES = {'off': OFF, 'warning': WARNING, 'info': INFO, 'debug': DEBUG}
+
+TRACE_ENV = 'SMARTHOME_TRACE'
+
+_level = LEVEL_NAMES.get(os.environ.get(TRACE_ENV, 'warning').lower(), WARNING)
+_buffer = None  # TraceBuffer of the active capture
+
+
+class TraceBuffer:
+    """ Recorded events, stored per event as chunks of equally long column arrays. """
+
+    def __init__(self):
+        self._chunks = {}
+
+    def append(self, event, columns):
+        """
+        Append one record to an event. Scalars are repeated to the length of the array columns,
+        so a whole series of steps can be recorded at once.
+
+        Args:
+            event (str): Event name.
+            columns (dict): Column name mapped to a scalar or a 1-D array.
+        """
+        arrays = {name: np.atleast_1d(np.asarray(value)) for name, value in columns.items()}
+        length = max((len(values) for values in arrays.values()), default=0)
+        self._chunks.setdefault(event, []).append(
+            {name: np.broadcast_to(values, (length,)) for name, values in arrays.items()})
+
+    def events(self):
+        """Names of the recorded events."""
+        return list(self._chunks)
+
+    def frame(self, event):
+        """
+        Return the records of an event as a DataFrame, one row per recorded step. Columns missing
+        from some records are None in those rows.
+        """
+        chunks = self._chunks.get(event, [])
+        names = list(dict.fromkeys(name for chunk in chunks for name in chunk))
+        columns = {}
+        for name in names:
+            parts = [chunk[name] if name in chunk else np.full(len(next(iter(chunk.values()), ())), None, dtype=object)
+                     for chunk in chunks]
+            columns[name] = np.concatenate(parts)
+        return pd.DataFrame(columns)
+
+    def clear(self):
+        """Drop every recorded event."""
+        self._chunks.clear()
+
+
+def set_level(level):
+    """Set the trace level, given as a level constant or its name ('off', 'warning', 'info', 'debug')."""
+    global _level
+    if isinstance(level, str):
+        if level.lower() not in LEVEL_NAMES:
+            raise ValueError(f"Unknown trace level: {level}; expected one of {list(LEVEL_NAMES)}")
+        level = LEVEL_NAMES[level.lower()]
+    _level = level
+
+
+def get_level():
+    """Return the trace level."""
+    return _level
+
+
+def enabled(level):
+    """Whether messages of the given level are printed."""
+    return _level >= level
+
+
+def _emit(message, args):
+    print(message % args if args else message)
+
+
+def warning(message, *args):
+    """Print a warning; args are %-formatted into the message."""
+    if _level >= WARNING:
+        _emit(message, args)
+
+
+def info(message, *args):
+    """Print a progress message; args are %-formatted into the message."""
+    if _level >= INFO:
+        _emit(message, args)
+
+
+def debug(message, *args):
+    """Print a detail message (per-step decisions, DataFrames); args are %-formatted into the message."""
+    if _level >= DEBUG:
+        _emit(message, args)
+
+
+@contextlib.contextmanager
+def capture():
+    """
+    Record events into a new TraceBuffer for the duration of the block.
+
+    Example:
+        with trace.capture() as buffer:
+            battery.simulate_battery(profile_df, meteorological_df, threshold, peak_hours)
+        dispatch_df = buffer.frame('battery.dispatch')
+    """
+    global _buffer
+    previous, _buffer = _buffer, TraceBuffer()
+    try:
+        yield _buffer
+    finally:
+        _buffer = previous
+
+
+def capturing():
+    """Whether a capture is active."""
+    return _buffer is not None
+
+
+def record(event, **columns):
+    """Record an event into the active capture; does nothing outside a capture."""
+    if _buffer is not None:
+        _buffer.append(event, columns)
@@ -0,0 +1,323 @@
+"""
+This module provides a library of PVGIS meteorological files indexed by the location of their sites.
+
+Every PVGIS file records the latitude, longitude and elevation of its site in its metadata
+header. WeatherLibrary reads only these headers when it is built, puts the sites into a
+k-d tree and parses the file of a site the first time a location resolves to it; the parsed
+profiles and their irradiance arrays are kept in memory from then on (and the parsed columns in the on-disk cache of
+MeteorologicalData), so later lookups are a tree search and a dictionary lookup and never
+read a file.
+
+A location resolves to its nearest site or, with k > 1, to the inverse-distance weighted
+(IDW) average of its k nearest sites. Sites are indexed as points on the unit sphere: the
+straight-line (chord) distance between two such points orders sites like the great-circle
+distance, so the tree needs no special cases for the poles or the antimeridian.
+
+Classes:
+    SiteIndex: A static k-d tree of points, queried for the k nearest points.
+    WeatherLibrary: The PVGIS files of a directory indexed by site location.
+Functions:
+    unit_vectors(latitude, longitude): Points on the unit sphere of latitudes and longitudes (degrees)
+    chord_to_km(chord): Great-circle distance (km) of a chord distance on the unit sphere
+
+Constants:
+    - EARTH_RADIUS_KM: Mean radius of the Earth.
+    - LEAF_SIZE: Most points in a leaf of the k-d tree.
+    - IDW_POWER: Default power of the inverse-distance weights.
+"""
+
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import trace
+from .met_data import MeteorologicalData
+from .met_stream import PVGISStream
+from .pv import PVModel
+
+EARTH_RADIUS_KM = 6371.0
+LEAF_SIZE = 16
+IDW_POWER = 2.0
+
+# Metadata of the PVGIS header holding the site location
+LATITUDE = 'Latitude (decimal degrees)'
+LONGITUDE = 'Longitude (decimal degrees)'
+ELEVATION = 'Elevation (m)'
+
+# Sites closer than this are the location itself and get all of the weight
+_SAME_SITE_KM = 1e-6
+
+
+def unit_vectors(latitude, longitude):
+    """Points on the unit sphere (n x 3 array) of latitudes and longitudes in degrees."""
+    latitude = np.radians(np.asarray(latitude, dtype=float))
+    longitude = np.radians(np.asarray(longitude, dtype=float))
+    cos_latitude = np.cos(latitude)
+    return np.stack([cos_latitude * np.cos(longitude), cos_latitude * np.sin(longitude), np.sin(latitude)], axis=-1)
+
+
+def chord_to_km(chord):
+    """Great-circle distance (km) of a chord distance between points on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+class SiteIndex:
+    """ A k-d tree of points, built once and queried for the nearest points of a location. """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        """
+        Args:
+            points (ndarray): Points to index (n x d).
+            leaf_size (int): Most points in a leaf; leaves are searched with one array operation.
+        """
+        points = np.asarray(points, dtype=float)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(points))
+        # Nodes as parallel lists; a node with left == -1 is a leaf of the points order[start:stop]
+        self.start, self.stop, self.dim, self.split, self.left, self.right = [], [], [], [], [], []
+        if len(points):
+            self._build(points, 0, len(points))
+        self.points = points[self.order]    # Points in tree order, so every leaf is a contiguous slice
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, points, start, stop):
+        """Add the node of order[start:stop] and its children; returns the node."""
+        node = len(self.start)
+        self.start.append(start)
+        self.stop.append(stop)
+        self.dim.append(0)
+        self.split.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        if stop - start <= self.leaf_size:
+            return node
+
+        # Split at the median of the widest dimension
+        members = self.order[start:stop]
+        coordinates = points[members]
+        dim = int(np.argmax(coordinates.max(axis=0) - coordinates.min(axis=0)))
+        middle = (stop - start) // 2
+        self.order[start:stop] = members[np.argpartition(coordinates[:, dim], middle)]
+        self.dim[node] = dim
+        self.split[node] = float(points[self.order[start + middle], dim])
+        self.left[node] = self._build(points, start, start + middle)
+        self.right[node] = self._build(points, start + middle, stop)
+        return node
+
+    def query(self, point, k=1):
+        """
+        Find the k points nearest to a point.
+
+        Args:
+            point (ndarray): The point (d values).
+            k (int): Number of points to find (at most the number of indexed points).
+
+        Returns:
+            tuple: Indices of the points (in the order they were given) and their distances, nearest first.
+        """
+        point = np.asarray(point, dtype=float)
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        coordinates = point.tolist()
+        best = []   # Max-heap of (-squared distance, tree position) of the k nearest points so far
+        stack = [(0, 0.0)]   # Nodes to search, with the squared distance to their splitting plane
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue    # Every point of the node is farther than the k nearest found so far
+            if self.left[node] < 0:
+                start, stop = self.start[node], self.stop[node]
+                squared = ((self.points[start:stop] - point) ** 2).sum(axis=1)
+                for position, distance in enumerate(squared.tolist(), start):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, position))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, position))
+                continue
+            offset = coordinates[self.dim[node]] - self.split[node]
+            near, far = (self.left[node], self.right[node]) if offset < 0 else (self.right[node], self.left[node])
+            # The near side is searched first; the far side only if its plane is nearer than the k-th point by then
+            stack.append((far, offset * offset))
+            stack.append((near, 0.0))
+        best.sort(key=lambda item: (-item[0], item[1]))
+        positions = np.array([position for _, position in best], dtype=int)
+        return self.order[positions], np.sqrt([-distance for distance, _ in best])
+
+
+class WeatherLibrary:
+    """ PVGIS files indexed by site location, parsed the first time a location resolves to them. """
+
+    def __init__(self, paths, latitude, longitude, elevation=None, pv=None):
+        """
+        Args:
+            paths (list): PVGIS file of each site.
+            latitude, longitude (ndarray): Location of each site (degrees).
+            elevation (ndarray): Elevation of each site (m), if known.
+            pv (PVSpec): Resolve locations to the PV yield of this array (see pv.py) instead of the sun height.
+        """
+        self.paths = list(paths)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.longitude = np.asarray(longitude, dtype=float)
+        self.elevation = np.full(len(self.paths), np.nan) if elevation is None else np.asarray(elevation, dtype=float)
+        self.pv = pv
+        self.index = SiteIndex(unit_vectors(self.latitude, self.longitude))
+        self._profiles = {}     # Site -> (winter, summer) profiles of MeteorologicalData.from_csv
+        self._vectors = {}      # Site -> winter and summer irradiance of each hour (2 x 24 array)
+        self._hourly = {}       # Site -> rows of MeteorologicalData.read_hourly
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return f"WeatherLibrary({len(self)} sites)"
+
+    @staticmethod
+    def from_files(paths, pv=None):
+        """
+        Index PVGIS files by the location in their headers; only the headers are read. Files
+        without a location are left out with a warning.
+        """
+        sites = []
+        for path in paths:
+            metadata = PVGISStream.read_header(path)
+            location = [metadata.get(name) for name in (LATITUDE, LONGITUDE, ELEVATION)]
+            if not all(isinstance(value, float) for value in location[:2]):
+                trace.warning("No site location in the header of %s; left out of the weather library", path)
+                continue
+            if not isinstance(location[2], float):
+                location[2] = np.nan
+            sites.append([path] + location)
+        if not sites:
+            raise ValueError("None of the meteorological files has a site location in its header")
+        paths, latitude, longitude, elevation = zip(*sites)
+        trace.info("Indexed %d weather sites.", len(paths))
+        return WeatherLibrary(paths, latitude, longitude, elevation, pv)
+
+    @staticmethod
+    def from_directory(directory, pv=None):
+        """Index the PVGIS (.csv) files of a directory (see from_files)."""
+        return WeatherLibrary.from_files(sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith('.csv') and not name.startswith('~$')
+        ), pv)
+
+    def sites(self):
+        """The indexed sites as a table."""
+        return pd.DataFrame({
+            'Site': np.arange(len(self)),
+            'Meteorological File': self.paths,
+            'Latitude': self.latitude,
+            'Longitude': self.longitude,
+            'Elevation (m)': self.elevation,
+        })
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        Find the sites nearest to a location.
+
+        Args:
+            latitude, longitude (float): The location (degrees).
+            k (int): Number of sites to find.
+
+        Returns:
+            tuple: Site numbers and great-circle distances (km), nearest first.
+        """
+        sites, chords = self.index.query(unit_vectors(latitude, longitude), k)
+        return sites, chord_to_km(chords)
+
+    def weights(self, latitude, longitude, k=1, power=IDW_POWER):
+        """
+        Sites of a location and their inverse-distance weights (summing to 1). A location on
+        a site, or k = 1, gets its nearest site alone.
+
+        Returns:
+            tuple: Site numbers, their weights and their distances (km), nearest first.
+        """
+        sites, distances = self.nearest(latitude, longitude, k)
+        if len(sites) == 1 or distances[0] < _SAME_SITE_KM:
+            return sites[:1], np.ones(1), distances[:1]
+        weights = distances ** -power
+        return sites, weights / weights.sum(), distances
+
+    def site_profiles(self, site):
+        """
+        Winter and summer profiles of a site (MeteorologicalData.from_csv, or PVModel.seasonal_profiles
+        with a PVSpec), parsed on first use.
+        """
+        profiles = self._profiles.get(site)
+        if profiles is None:
+            path = self.paths[site]
+            profiles = PVModel.seasonal_profiles(path, self.pv) if self.pv else MeteorologicalData.from_csv(path)
+            self._profiles[site] = profiles
+        return profiles
+
+    def site_vectors(self, site):
+        """Winter and summer irradiance of a site as a 2 x 24 array (see MeteorologicalData.irradiance_vector)."""
+        vectors = self._vectors.get(site)
+        if vectors is None:
+            vectors = self._vectors[site] = np.array([MeteorologicalData.irradiance_vector(df) for df in self.site_profiles(site)])
+        return vectors
+
+    def site_hourly(self, site):
+        """Hourly rows of a site (MeteorologicalData.read_hourly, or PVModel.hourly with a PVSpec), parsed on first use."""
+        hourly = self._hourly.get(site)
+        if hourly is None:
+            path = self.paths[site]
+            hourly = self._hourly[site] = PVModel.hourly(path, self.pv) if self.pv else MeteorologicalData.read_hourly(path)
+        return hourly
+
+    def profiles(self, latitude, longitude, k=1, power=IDW_POWER):
+        """
+        Winter and summer profiles of a location, in the layout of MeteorologicalData.from_csv.
+
+        Args:
+            latitude, longitude (float): The location (degrees).
+            k (int): Sites to interpolate between (1: the profiles of the nearest site).
+            power (float): Power of the inverse-distance weights.
+
+        Returns:
+            tuple: Winter and summer DataFrames with 'Hour' and 'Irradiation (kW/m^2)' columns.
+        """
+        sites, weights, _ = self.weights(latitude, longitude, k, power)
+        if len(sites) == 1:
+            return self.site_profiles(int(sites[0]))
+        irradiance = np.tensordot(weights, np.array([self.site_vectors(int(site)) for site in sites]), axes=1)
+        profiles = tuple(pd.DataFrame({'Hour': np.arange(24), 'Irradiation (kW/m^2)': vector}) for vector in irradiance)
+        if self.pv:
+            for df in profiles:
+                df['PV Yield (kW)'] = df['Irradiation (kW/m^2)'] * self.pv.peak_power
+        return profiles
+
+    def hourly(self, latitude, longitude, k=1, power=IDW_POWER):
+        """
+        Hourly rows of a location, in the layout of MeteorologicalData.read_hourly. Interpolated
+        sites must cover the same hours.
+        """
+        sites, weights, _ = self.weights(latitude, longitude, k, power)
+        frames = [self.site_hourly(int(site)) for site in sites]
+        if len(frames) == 1:
+            return frames[0]
+        time = frames[0]['time'].to_numpy()
+        if any(len(df) != len(time) or (df['time'].to_numpy() != time).any() for df in frames[1:]):
+            raise ValueError(f"Sites {', '.join(self.paths[site] for site in sites)} cover different hours; "
+                             "interpolate between one site (k=1) instead")
+        hourly_df = frames[0].copy()
+        for column in ('Irradiation (kW/m^2)', 'PV Yield (kW)'):
+            if column in hourly_df:
+                hourly_df[column] = weights @ np.array([df[column].to_numpy(dtype=float) for df in frames])
+        return hourly_df
+
+    def label(self, latitude, longitude, k=1, power=IDW_POWER):
+        """
+        The 'Meteorological File' of a location in the results tables: the file of its site,
+        or its sites and weights when interpolated.
+        """
+        sites, weights, _ = self.weights(latitude, longitude, k, power)
+        if len(sites) == 1:
+            return self.paths[int(sites[0])]
+        return ' + '.join(f"{weight:.3f}*{self.paths[int(site)]}" for site, weight in zip(sites, weights))
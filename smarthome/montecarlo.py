@@ -0,0 +1,81 @@
+"""
+Command line entry point for Monte Carlo cost uncertainty.
+
+Evaluates battery parameter sets against one load profile on thousands of random days: the
+appliance start times and durations are jittered and the weather is a day of the season drawn
+from the PVGIS year. Writes the cost percentiles and peak-exceedance probabilities of every
+parameter set, and with --compare the paired cost differences to the first set.
+
+Usage:
+    python montecarlo.py LOAD_FILE MET_FILE --draws 5000 --capacity 2 4 8 -o montecarlo.csv
+    python montecarlo.py LOAD_FILE MET_FILE --season winter --start-sigma 2 --pv model --compare compare.csv
+"""
+
+import argparse
+
+import pandas as pd
+
+from modules import trace
+from modules.analysis import EnergyAnalysis, PANEL_AREA, PANEL_EFFICIENCY, SEASON_MONTHS, SEASONS
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from modules.montecarlo import DURATION_SIGMA, PERCENTILES, START_SIGMA, MonteCarlo
+from modules.pv import PVModel, PVSpec, SOURCES
+from modules.sweep import BatterySweep, PARAMETERS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate battery parameters on random appliance schedules and weather days.")
+    parser.add_argument('load_file', help="Load profile (.xlsx) file")
+    parser.add_argument('met_file', help="PVGIS meteorological (.csv) file")
+    parser.add_argument('-o', '--output', default='montecarlo.csv', help="Output table (.csv)")
+    parser.add_argument('--season', choices=SEASONS, action='append', help="Season(s) to evaluate (default: both)")
+    for name in PARAMETERS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs='+', dest=name, help=f"Values of {name}")
+    parser.add_argument('--draws', type=int, default=1000, help="Random days per season (default: 1000)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; runs with the same seed use the same days")
+    parser.add_argument('--start-sigma', type=float, default=START_SIGMA,
+                        help=f"Standard deviation of the appliance start hours (default: {START_SIGMA})")
+    parser.add_argument('--duration-sigma', type=float, default=DURATION_SIGMA,
+                        help=f"Standard deviation of the appliance durations in hours (default: {DURATION_SIGMA})")
+    parser.add_argument('--percentiles', type=float, nargs='+', default=list(PERCENTILES), help="Cost percentiles to report")
+    parser.add_argument('--pv', choices=SOURCES, help="Draw the days from the PV yield of the panel instead of the sun height")
+    parser.add_argument('--compare', metavar='CSV', help="Also write the paired cost differences to the first parameter set")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="Show the per-stage analysis output (-vv: also per-hour details and tables)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    values = {name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None}
+    threshold = None if 'threshold' in values else 3.0
+    parameters_df = BatterySweep.grid(**values)
+
+    peak_hours = EnergyAnalysis.default_peak_hours()
+    trace.set_level((trace.WARNING, trace.INFO, trace.DEBUG)[min(args.verbose, 2)])
+    profiles = dict(zip(SEASONS, ElectricLoad.from_excel(args.load_file)))
+    if args.pv:
+        hourly_met_df = PVModel.hourly(args.met_file, PVSpec(PANEL_AREA, PANEL_EFFICIENCY, source=args.pv))
+    else:
+        hourly_met_df = MeteorologicalData.read_hourly(args.met_file)
+
+    results, comparisons = [], []
+    for season in args.season or SEASONS:
+        simulation = MonteCarlo.simulate(profiles[season], hourly_met_df, parameters_df, peak_hours, SEASON_MONTHS[season],
+                                         args.draws, args.seed, threshold, args.start_sigma, args.duration_sigma)
+        for frames, frame in ((results, MonteCarlo.summarize(simulation, args.percentiles)),
+                              (comparisons, MonteCarlo.compare(simulation))):
+            frame.insert(0, 'Season', season)
+            frames.append(frame)
+
+    results = pd.concat(results, ignore_index=True)
+    results.to_csv(args.output, index=False)
+    print(f"Wrote {len(results)} rows to {args.output}")
+    if args.compare:
+        pd.concat(comparisons, ignore_index=True).to_csv(args.compare, index=False)
+        print(f"Wrote the paired differences to {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
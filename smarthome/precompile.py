@@ -0,0 +1,61 @@
+"""
+Command line entry point to fill the parsed-file cache ahead of a run.
+
+Reads every load profile workbook (.xlsx) and PVGIS meteorological file (.csv) in the given
+directories once, so that later runs of main.py, batch.py or sweep.py load the cleaned tables
+from the cache instead of opening the files. Files that are already cached and unchanged are
+skipped.
+
+Usage:
+    python precompile.py data/load_profile_data data/meteorological_data
+    python precompile.py LOAD_DIR -v
+"""
+
+import argparse
+import sys
+
+from modules import trace
+from modules.analysis import EnergyAnalysis
+from modules.cache import cache_dir
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+# Reader and cache check for each file type
+READERS = {
+    '.xlsx': (ElectricLoad.from_excel, ElectricLoad.is_cached),
+    '.csv': (MeteorologicalData.read_pvgis, MeteorologicalData.is_cached),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parse load profile and meteorological files into the cache.")
+    parser.add_argument('directories', nargs='+', help="Directories containing .xlsx and/or .csv files")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the per-file parsing output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if cache_dir() is None:
+        raise SystemExit("The cache is disabled (SMARTHOME_CACHE_DIR is empty)")
+
+    trace.set_level(trace.INFO if args.verbose else trace.WARNING)
+    compiled, skipped, failed = 0, 0, 0
+    for directory in args.directories:
+        for extension, (read, is_cached) in READERS.items():
+            for path in EnergyAnalysis.list_files(directory, extension):
+                try:
+                    if is_cached(path):
+                        skipped += 1
+                        continue
+                    read(path)
+                    compiled += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Failed to parse {path}: {e}", file=sys.stderr)
+
+    print(f"Compiled {compiled} files, {skipped} already up to date, {failed} failed (cache: {cache_dir()})")
+
+
+if __name__ == "__main__":
+    main()
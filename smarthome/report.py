@@ -0,0 +1,69 @@
+"""
+Command line entry point for rendering household report pages without a display.
+
+Analyzes every combination of load profile workbook, PVGIS meteorological file and threshold
+found in two directories, writes one report page per combination (both seasons' irradiation,
+SoC, load profiles and costs) and an index of the pages.
+
+Usage:
+    python report.py data/load_profile_data data/meteorological_data -o reports
+    python report.py LOAD_DIR MET_DIR --format pdf --threshold 2.5 --threshold 3.0 -o reports
+    python report.py LOAD_DIR MET_DIR --workers 0 --chunk-size 32 -o reports
+"""
+
+import argparse
+import os
+import time
+
+from modules import trace
+from modules.analysis import EnergyAnalysis, PEAK_END, PEAK_START
+from modules.reports import ReportRunner
+from modules.time_grid import TimeGrid
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render a report page for every load profile and meteorological file.")
+    parser.add_argument('load_dir', help="Directory containing load profile (.xlsx) files")
+    parser.add_argument('met_dir', help="Directory containing PVGIS meteorological (.csv) files")
+    parser.add_argument('-o', '--output-dir', default='reports', help="Directory of the report pages and their index")
+    parser.add_argument('-f', '--format', choices=['png', 'svg', 'pdf'], default='png', help="Report page format")
+    parser.add_argument('--dpi', type=int, default=100, help="Resolution of PNG pages")
+    parser.add_argument('-t', '--threshold', type=float, action='append',
+                        help="Threshold value (kW); repeat to evaluate several thresholds (default: 3.0)")
+    parser.add_argument('--peak-start', type=int, default=PEAK_START, help="First peak hour")
+    parser.add_argument('--peak-end', type=int, default=PEAK_END, help="Last peak hour")
+    parser.add_argument('--solver', choices=['greedy', 'optimal'], default='greedy', help="Load shifting solver")
+    parser.add_argument('--step-minutes', type=int, default=60,
+                        help="Simulation step in minutes; must divide an hour (default: 60)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="Worker processes (0: one per CPU)")
+    parser.add_argument('--chunk-size', type=int, default=16, help="Households per worker task")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="Show the per-stage analysis output (-vv: also per-hour details and tables)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        grid = TimeGrid(args.step_minutes)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    trace.set_level((trace.WARNING, trace.INFO, trace.DEBUG)[min(args.verbose, 2)])
+
+    started = time.perf_counter()
+    index = ReportRunner.run(
+        EnergyAnalysis.list_files(args.load_dir, '.xlsx'), EnergyAnalysis.list_files(args.met_dir, '.csv'),
+        args.threshold or [3.0], args.output_dir, args.format, list(range(args.peak_start, args.peak_end + 1)),
+        args.solver, grid, args.dpi, args.workers or None, args.chunk_size,
+    )
+    index_path = os.path.join(args.output_dir, 'index.csv')
+    index.to_csv(index_path, index=False)
+
+    pages = int(index['Report'].notna().sum()) if 'Report' in index else 0
+    print(f"Wrote {pages} report pages to {args.output_dir} in {time.perf_counter() - started:.1f} s (index: {index_path})")
+    if 'Error' in index:
+        print(f"{int(index['Error'].notna().sum())} households failed; see the 'Error' column of the index")
+
+
+if __name__ == "__main__":
+    main()
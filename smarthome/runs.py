@@ -0,0 +1,59 @@
+"""
+Command line entry point for querying the result store of past runs.
+
+Lists the stored runs (one row per run and season, most recently used first), optionally
+filtered, or runs any SQL query on the store's 'runs' and 'seasons' tables.
+
+Usage:
+    python runs.py
+    python runs.py --household load_profile_v1 --season winter -o runs.csv
+    python runs.py --sql "SELECT threshold, AVG(battery_cost) FROM runs JOIN seasons USING (key) GROUP BY threshold"
+    python runs.py --clear
+"""
+
+import argparse
+
+from modules.store import ResultStore, default_path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="List or query the stored analysis runs.")
+    parser.add_argument('--store', metavar='SQLITE', default=default_path(),
+                        help="Result store (default: results.sqlite in the cache directory)")
+    parser.add_argument('--household', help="Only runs of this load profile (file name without extension)")
+    parser.add_argument('--met-file', help="Only runs with this meteorological file")
+    parser.add_argument('-t', '--threshold', type=float, help="Only runs with this threshold")
+    parser.add_argument('--season', choices=['winter', 'summer'], help="Only this season")
+    parser.add_argument('--solver', choices=['greedy', 'optimal'], help="Only runs with this load shifting solver")
+    parser.add_argument('--sql', help="Run this SQL query instead of listing the runs")
+    parser.add_argument('--clear', action='store_true', help="Delete every stored run")
+    parser.add_argument('-o', '--output', help="Write the rows to a table (.csv) instead of printing them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.store:
+        raise SystemExit("No result store: the cache directory is disabled; give the store with --store")
+    store = ResultStore(args.store)
+    if args.clear:
+        count, size = store.size()
+        store.clear()
+        print(f"Deleted {count} runs ({size / 1e6:.1f} MB) from {args.store}")
+        return
+
+    if args.sql:
+        rows = store.query(args.sql)
+    else:
+        rows = store.runs(args.household, args.met_file, args.threshold, args.season, args.solver).drop(columns='Key')
+    if args.output:
+        rows.to_csv(args.output, index=False)
+        print(f"Wrote {len(rows)} rows to {args.output}")
+    else:
+        print(rows.to_string(index=False))
+        count, size = store.size()
+        print(f"\n{count} runs stored ({size / 1e6:.1f} MB) in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Command line entry point for battery sizing sweeps.
+
+Evaluates a grid (or a Latin hypercube sample) of battery parameters and thresholds against
+one load profile and one meteorological file and writes the cost surface.
+
+Usage:
+    python sweep.py LOAD_FILE MET_FILE --capacity 1 2 4 8 --threshold 2 3 5 -o sweep.csv
+    python sweep.py LOAD_FILE MET_FILE --samples 500 --capacity 1 8 --panel-area 5 20 -o sweep.csv
+
+With --samples, every parameter takes exactly two values, the low and high bounds of its range.
+"""
+
+import argparse
+
+import pandas as pd
+
+from modules import trace
+from modules.analysis import EnergyAnalysis, SEASON_MONTHS, SEASONS
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from modules.sweep import BatterySweep, PARAMETERS
+from modules.tariff import load_tariffs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate battery parameters against one load profile and meteorological file.")
+    parser.add_argument('load_file', help="Load profile (.xlsx) file")
+    parser.add_argument('met_file', help="PVGIS meteorological (.csv) file")
+    parser.add_argument('-o', '--output', default='sweep.csv', help="Output table (.csv)")
+    parser.add_argument('--season', choices=SEASONS, action='append', help="Season(s) to evaluate (default: both)")
+    for name in PARAMETERS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs='+', dest=name,
+                            help=f"Values of {name} (low and high bounds with --samples)")
+    parser.add_argument('--samples', type=int, help="Draw a Latin hypercube sample of this size instead of a grid")
+    parser.add_argument('--tariffs', metavar='JSON', help="Tariff definitions to price every parameter set with as well")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for --samples")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="Show the per-stage analysis output (-vv: also per-hour details and tables)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    values = {name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None}
+    threshold = None if 'threshold' in values else 3.0
+
+    if args.samples:
+        if any(len(bounds) != 2 for bounds in values.values()):
+            raise SystemExit("With --samples every parameter needs exactly two values (low and high)")
+        parameters_df = BatterySweep.latin_hypercube(values, args.samples, args.seed)
+    else:
+        parameters_df = BatterySweep.grid(**values)
+
+    peak_hours = EnergyAnalysis.default_peak_hours()
+    tariffs = load_tariffs(args.tariffs) if args.tariffs else None
+    trace.set_level((trace.WARNING, trace.INFO, trace.DEBUG)[min(args.verbose, 2)])
+    profiles = dict(zip(SEASONS, ElectricLoad.from_excel(args.load_file)))
+    meteorological = dict(zip(SEASONS, MeteorologicalData.from_csv(args.met_file)))
+
+    results = []
+    for season in args.season or SEASONS:
+        season_results = BatterySweep.evaluate(profiles[season], meteorological[season], parameters_df, peak_hours, threshold,
+                                              tariffs, SEASON_MONTHS[season])
+        season_results.insert(0, 'Season', season)
+        results.append(season_results)
+
+    results = pd.concat(results, ignore_index=True)
+    results.to_csv(args.output, index=False)
+    print(f"Wrote {len(results)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
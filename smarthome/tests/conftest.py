@@ -0,0 +1,24 @@
+"""
+Shared setup of the checks: the analysis package is imported from the smarthome directory,
+every test runs with its own empty cache directory, and the bundled data is available.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LOAD_DIR = os.path.join(ROOT, 'data', 'load_profile_data')
+MET_DIR = os.path.join(ROOT, 'data', 'meteorological_data')
+LOAD_FILE = os.path.join(LOAD_DIR, 'load_profile_v1.xlsx')
+MET_FILE = os.path.join(MET_DIR, 'meteorological_data.csv')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'cache'
+    monkeypatch.setenv('SMARTHOME_CACHE_DIR', str(directory))
+    return directory
@@ -0,0 +1,80 @@
+"""
+Checks of the appliance table: the simulation core gives the same results on tables and on the
+appliance DataFrames it used to work on, and tables convert to and from the DataFrame layout
+with battery discharge rows.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules.analysis import EnergyAnalysis
+from modules.appliances import ApplianceTable
+from modules.calculations import Calculations
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from test_load_kernel import random_profile
+
+PEAK_HOURS = list(range(17, 23))
+FRAMES = ('original_hourly', 'battery_hourly', 'shifted_hourly', 'shifted_profile', 'soc')
+
+
+@pytest.fixture(scope='module')
+def seasons():
+    return list(zip(ElectricLoad.from_excel(LOAD_FILE), MeteorologicalData.from_csv(MET_FILE)))
+
+
+def with_discharge_rows(df, discharge):
+    """An appliance DataFrame with battery discharge rows appended, as the battery used to build it."""
+    hours = np.flatnonzero(discharge)
+    return pd.concat([df, pd.DataFrame({
+        'Name': [f"Battery Discharge (Hour {hour})" for hour in hours],
+        'Rated Power (kW)': -discharge[hours],
+        'Priority Group': 0,
+        'Start': hours,
+        'End': hours + 1,
+    })], ignore_index=True)
+
+
+@pytest.mark.parametrize('threshold', [1.0, 3.0])
+def test_season_results_match_on_tables_and_frames(seasons, threshold):
+    for profile_df, meteorological in seasons:
+        from_frame = EnergyAnalysis.analyze_season(profile_df.copy(), meteorological, threshold, PEAK_HOURS)
+        from_table = EnergyAnalysis.analyze_season(ApplianceTable.of(profile_df), meteorological, threshold, PEAK_HOURS)
+        for name in ('original_cost', 'battery_cost', 'shifted_cost'):
+            assert from_table[name] == from_frame[name]
+        for name in FRAMES:
+            pd.testing.assert_frame_equal(from_table[name], from_frame[name], check_dtype=False)
+
+
+def test_battery_and_shift_match_on_tables_and_frames(seasons):
+    for profile_df, meteorological in seasons:
+        table = ApplianceTable.of(profile_df)
+        battery_table, soc_table = EnergyAnalysis.create_battery(5.0).simulate_battery(table, meteorological, 2.0, PEAK_HOURS)
+        battery_frame, soc_frame = EnergyAnalysis.create_battery(5.0).simulate_battery(profile_df, meteorological, 2.0, PEAK_HOURS)
+        pd.testing.assert_frame_equal(soc_table, soc_frame)
+        pd.testing.assert_frame_equal(battery_table.to_frame(), battery_frame.to_frame())
+
+        shifted_frame = Calculations.shift_loads(battery_table.to_frame(), 2.0, PEAK_HOURS)
+        shifted_table = Calculations.shift_loads(battery_table, 2.0, PEAK_HOURS)
+        pd.testing.assert_frame_equal(shifted_table.to_frame(), shifted_frame, check_dtype=False)
+        # Shifting a table leaves the table it came from as it was
+        np.testing.assert_array_equal(battery_table.start, table.start)
+
+
+def test_discharge_rows_round_trip():
+    df = random_profile(12, 4)
+    discharge = np.zeros(24)
+    discharge[[17, 18, 21]] = [0.4, 1.25, 0.3]
+    legacy = with_discharge_rows(df, discharge)
+
+    table = ApplianceTable.from_frame(legacy)
+    assert len(table) == len(df)
+    np.testing.assert_array_equal(table.discharge_power, [0.4, 1.25, 0.3])
+    pd.testing.assert_frame_equal(table.to_frame(), legacy, check_dtype=False)
+    pd.testing.assert_frame_equal(ApplianceTable.of(df).with_discharge(np.arange(24), discharge).to_frame(), legacy,
+                                  check_dtype=False)
+
+    hourly = Calculations.generate_adjusted_profile(df, legacy)
+    pd.testing.assert_frame_equal(Calculations.generate_adjusted_profile(ApplianceTable.of(df), table), hourly)
@@ -0,0 +1,101 @@
+"""
+Checks of the on-disk cache of parsed input files: a cached file reads back as parsed, an
+edited file is parsed again, and precompile.py fills the cache once.
+"""
+
+import os
+import shutil
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import precompile
+from conftest import LOAD_FILE, MET_FILE
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+
+@pytest.fixture
+def met_file(tmp_path):
+    path = tmp_path / 'met.csv'
+    shutil.copy(MET_FILE, path)
+    return str(path)
+
+
+@pytest.fixture
+def load_file(tmp_path):
+    path = tmp_path / 'load.xlsx'
+    shutil.copy(LOAD_FILE, path)
+    return str(path)
+
+
+def test_cached_meteorology_reads_back_as_parsed(met_file, cache_dir):
+    assert not MeteorologicalData.is_cached(met_file)
+    parsed = MeteorologicalData.read_pvgis(met_file)
+    assert MeteorologicalData.is_cached(met_file) and os.listdir(cache_dir)
+
+    cached = MeteorologicalData.read_pvgis(met_file)
+    pd.testing.assert_frame_equal(cached, parsed)
+    for parsed_season, cached_season in zip(MeteorologicalData.from_csv(met_file), MeteorologicalData.from_csv(met_file)):
+        pd.testing.assert_frame_equal(cached_season, parsed_season)
+
+
+def test_edited_meteorology_is_parsed_again(met_file):
+    MeteorologicalData.read_pvgis(met_file)
+    with open(met_file) as f:
+        lines = f.readlines()
+    row = next(i for i, line in enumerate(lines) if line.startswith('20230101:1210'))
+    fields = lines[row].split(',')
+    fields[3] = '999.0'   # H_sun, as long as the old value, so the content hash decides
+    lines[row] = ','.join(fields)
+    with open(met_file, 'w') as f:
+        f.writelines(lines)
+
+    assert not MeteorologicalData.is_cached(met_file)
+    assert MeteorologicalData.read_pvgis(met_file)['H_sun'].max() == 999.0
+
+
+def test_touched_meteorology_still_hits(met_file):
+    MeteorologicalData.read_pvgis(met_file)
+    stat = os.stat(met_file)
+    os.utime(met_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert MeteorologicalData.is_cached(met_file)
+
+
+def test_disabled_cache_writes_nothing(met_file, cache_dir, monkeypatch):
+    monkeypatch.setenv('SMARTHOME_CACHE_DIR', '')
+    MeteorologicalData.read_pvgis(met_file)
+    assert not MeteorologicalData.is_cached(met_file)
+    assert not cache_dir.exists()
+
+
+def test_cached_load_profile_reads_back_as_parsed(load_file):
+    assert not ElectricLoad.is_cached(load_file)
+    parsed = ElectricLoad.from_excel(load_file)
+    assert ElectricLoad.is_cached(load_file)
+    for parsed_season, cached_season in zip(parsed, ElectricLoad.from_excel(load_file)):
+        pd.testing.assert_frame_equal(cached_season, parsed_season)
+
+
+def test_edited_load_profile_is_parsed_again(load_file):
+    winter, _ = ElectricLoad.from_excel(load_file)
+    workbook = openpyxl.load_workbook(load_file)
+    sheet = workbook.active
+    sheet.cell(row=2, column=2).value = 9.5   # Rated power of the first appliance
+    workbook.save(load_file)
+
+    assert not ElectricLoad.is_cached(load_file)
+    edited, _ = ElectricLoad.from_excel(load_file)
+    assert edited['Rated Power (kW)'].iloc[0] == 9.5
+    assert edited['Rated Power (kW)'].iloc[1:].tolist() == winter['Rated Power (kW)'].iloc[1:].tolist()
+
+
+def test_precompile_fills_the_cache_once(load_file, met_file, tmp_path, capsys):
+    directory = str(tmp_path)
+    precompile.main([directory])
+    assert ElectricLoad.is_cached(load_file) and MeteorologicalData.is_cached(met_file)
+    assert capsys.readouterr().out.startswith("Compiled 2 files, 0 already up to date, 0 failed")
+
+    precompile.main([directory])
+    assert capsys.readouterr().out.startswith("Compiled 0 files, 2 already up to date, 0 failed")
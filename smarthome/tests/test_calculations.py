@@ -0,0 +1,42 @@
+"""
+Checks of the cost calculation under every trace level.
+
+Run from the smarthome directory:
+    python -m pytest tests
+"""
+
+import pandas as pd
+import pytest
+
+from modules import trace
+from modules.calculations import Calculations
+from modules.tariff import Tariff
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture
+def debug_trace():
+    level = trace.get_level()
+    trace.set_level(trace.DEBUG)
+    yield
+    trace.set_level(level)
+
+
+def hourly_profile():
+    return Calculations.generate_hourly_profile(pd.DataFrame({
+        'Name': ['Fridge', 'Oven'],
+        'Rated Power (kW)': [0.2, 2.0],
+        'Priority Group': [1, 3],
+        'Start': [0.0, 18.0],
+        'End': [24.0, 20.0],
+    }))
+
+
+@pytest.mark.parametrize('tariff', [None, Tariff('demand', 0.2, demand_charge=0.5, demand_hours=PEAK_HOURS)])
+def test_energy_cost_with_debug_trace(debug_trace, tariff):
+    hourly_df = hourly_profile()
+    cost = Calculations.calculate_energy_cost(hourly_df, PEAK_HOURS, tariff=tariff)
+
+    trace.set_level(trace.WARNING)
+    assert cost == Calculations.calculate_energy_cost(hourly_df, PEAK_HOURS, tariff=tariff)
@@ -0,0 +1,84 @@
+"""
+Checks of the battery dispatch kernel against the per-hour rules of the Battery methods it
+replaced, for single and batched scenarios.
+"""
+
+import numpy as np
+import pytest
+
+from modules.dispatch import dispatch_battery
+
+PEAK_HOURS = list(range(17, 23))
+PEAK = np.isin(np.arange(24), PEAK_HOURS)
+
+
+def reference_dispatch(load, irradiance, threshold, capacity, charge_rate, discharge_rate, soc, panel_area, panel_efficiency):
+    """The hourly charge and discharge rules of Battery.simulate_battery before the kernel."""
+    def charge_with_solar(soc, sun, in_peak_hours):
+        if sun <= 0:
+            return soc
+        solar_power_kw = sun * panel_area * panel_efficiency
+        limit = 50 if in_peak_hours else 80
+        if soc >= limit:
+            return soc
+        charge = min(solar_power_kw, charge_rate * capacity, (limit - soc) * capacity / 100.0)
+        return max(0, min(100, soc + charge / capacity * 100))
+
+    soc_log, discharge_log = [], []
+    for hour in range(24):
+        sun = irradiance[hour]
+        soc_log.append(soc)
+        if soc < 80:
+            if hour in PEAK_HOURS:
+                if soc < 50 and sun > 0:
+                    soc = charge_with_solar(soc, sun, True)
+            elif sun > 0:
+                soc = charge_with_solar(soc, sun, False)
+
+        discharge = 0
+        if hour in PEAK_HOURS:
+            if soc > 30 and load[hour] > threshold:
+                discharge = min(discharge_rate * capacity, load[hour] - threshold, (soc - 30) / 100 * capacity)
+                soc = max(0, min(100, soc - discharge * 100 / capacity))
+            if soc < 30 or sun > 0:
+                soc = charge_with_solar(soc, sun, True)
+        discharge_log.append(discharge)
+    return np.array(soc_log), np.array(discharge_log)
+
+
+def random_day(seed):
+    rng = np.random.default_rng(seed)
+    load = rng.uniform(0.5, 6.0, 24)
+    irradiance = np.clip(np.sin((np.arange(24) - 6) / 13 * np.pi), 0, None) * rng.uniform(0.2, 1.0)
+    return load, irradiance
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('soc', [20.0, 45.0, 75.0])
+def test_kernel_matches_hourly_rules(seed, soc):
+    load, irradiance = random_day(seed)
+    # Late sun, so that peak hours charge too
+    irradiance[17:20] = [0.3, 0.2, 0.1]
+    params = dict(threshold=2.5, capacity=6.0, charge_rate=0.5, discharge_rate=0.5, soc=soc, panel_area=10.0,
+                  panel_efficiency=0.2)
+
+    expected_soc, expected_discharge = reference_dispatch(load, irradiance, **params)
+    soc_log, discharge, final_soc = dispatch_battery(load, irradiance, PEAK, **params)
+    np.testing.assert_allclose(soc_log, expected_soc, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(discharge, expected_discharge, rtol=0, atol=1e-9)
+
+
+def test_batched_scenarios_match_single_runs():
+    loads, irradiances = zip(*(random_day(seed) for seed in range(4)))
+    loads, irradiances = np.array(loads), np.array(irradiances)
+    capacity = np.array([[2.0], [4.0], [8.0]])   # Scenarios x households
+    threshold = np.array([2.0, 3.0, 2.5, 4.0])
+
+    soc_log, discharge, final_soc = dispatch_battery(loads, irradiances, PEAK, threshold, capacity, 0.5, 0.5, 40.0, 10.0, 0.2)
+    assert soc_log.shape == discharge.shape == (3, 4, 24)
+    for i in range(3):
+        for j in range(4):
+            single = dispatch_battery(loads[j], irradiances[j], PEAK, threshold[j], capacity[i, 0], 0.5, 0.5, 40.0, 10.0, 0.2)
+            np.testing.assert_array_equal(soc_log[i, j], single[0])
+            np.testing.assert_array_equal(discharge[i, j], single[1])
+            assert final_soc[i, j] == single[2]
@@ -0,0 +1,83 @@
+"""
+Checks of the load vector kernels against the row-by-row aggregation they replaced.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LOAD_FILE
+from modules.calculations import Calculations
+from modules.load_kernel import interval_load, point_load, table_load
+from modules.load_profile import ElectricLoad
+
+
+def reference_hourly_profile(df):
+    """The hourly profile of the GUI before the kernels, one appliance row at a time."""
+    hourly_profile = pd.DataFrame(0.0, index=np.arange(24), columns=['Power (kW)'])
+    for _, row in df.iterrows():
+        start_time, end_time, power = row['Start'], row['End'], row['Rated Power (kW)']
+        if start_time < end_time:
+            hourly_profile.loc[int(start_time):int(end_time) - 1, 'Power (kW)'] += power
+        else:
+            hourly_profile.loc[int(start_time):23, 'Power (kW)'] += power
+            hourly_profile.loc[0:int(end_time) - 1, 'Power (kW)'] += power
+    return hourly_profile
+
+
+def reference_adjusted_profile(df, battery_df):
+    """The hourly profile net of the battery discharge rows, as the GUI computed it."""
+    hourly_profile = reference_hourly_profile(df)
+    for _, row in battery_df[battery_df['Name'].str.contains('Battery Discharge', na=False)].iterrows():
+        hourly_profile.loc[int(row['Start']), 'Power (kW)'] -= abs(row['Rated Power (kW)'])
+    return hourly_profile
+
+
+def random_profile(n_appliances, seed):
+    """Appliances on whole hours, including ones that wrap around midnight or run all day."""
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, 24, n_appliances)
+    end = rng.integers(0, 25, n_appliances)
+    start[:2], end[:2] = 0, 24
+    return pd.DataFrame({
+        'Name': [f"Appliance {i}" for i in range(n_appliances)],
+        'Rated Power (kW)': rng.choice([0.05, 0.1, 0.15, 0.2, 0.75, 1.2, 1.75, 2.0], n_appliances),
+        'Priority Group': rng.integers(1, 6, n_appliances),
+        'Start': start.astype(float),
+        'End': end.astype(float),
+    })
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_hourly_profile_matches_row_by_row_sums(seed):
+    df = random_profile(40, seed)
+    expected = reference_hourly_profile(df)['Power (kW)'].to_numpy()
+    # The kernel adds the appliances in table order, so the sums are identical, not just close
+    np.testing.assert_array_equal(table_load(df), expected)
+    np.testing.assert_array_equal(Calculations.generate_hourly_profile(df)['Power (kW)'].to_numpy(), expected)
+
+
+def test_bundled_profiles_match_row_by_row_sums():
+    for df in ElectricLoad.from_excel(LOAD_FILE):
+        np.testing.assert_array_equal(table_load(df), reference_hourly_profile(df)['Power (kW)'].to_numpy())
+
+
+def test_adjusted_profile_subtracts_battery_rows():
+    df = random_profile(20, 7)
+    hours = np.array([17, 18, 21])
+    battery_df = pd.concat([df, pd.DataFrame({
+        'Name': [f"Battery Discharge (Hour {hour})" for hour in hours],
+        'Rated Power (kW)': [-0.4, -1.25, -0.3],
+        'Priority Group': 0,
+        'Start': hours.astype(float),
+        'End': hours + 1.0,
+    })], ignore_index=True)
+
+    adjusted = Calculations.generate_adjusted_profile(df, battery_df)['Power (kW)'].to_numpy()
+    np.testing.assert_allclose(adjusted, reference_adjusted_profile(df, battery_df)['Power (kW)'].to_numpy(), atol=1e-12)
+
+
+def test_interval_and_point_loads():
+    np.testing.assert_array_equal(interval_load([22, 2], [2, 2], [1.0, 0.5], n_slots=24),
+                                  [1.5, 1.5] + [0.5] * 20 + [1.5, 1.5])
+    np.testing.assert_array_equal(point_load([3, 3, 5], [1.0, 0.5, 2.0], n_slots=6), [0, 0, 0, 1.5, 0, 2.0])
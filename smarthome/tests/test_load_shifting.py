@@ -0,0 +1,129 @@
+"""
+Checks of load shifting: the greedy shift moves loads out of the given peak hours and makes
+the same moves as the re-summing loop it replaced, and the optimal solver is never worse than
+the greedy shift it starts from, priced as reported.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules.analysis import EnergyAnalysis, SEASONS
+from modules.calculations import Calculations
+from modules.load_optimizer import EXCESS_PENALTY
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+
+PEAK_HOURS = list(range(17, 23))
+
+
+def random_profile(n_appliances, seed):
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, 24, n_appliances)
+    duration = rng.integers(1, 6, n_appliances)
+    return pd.DataFrame({
+        'Name': [f"Appliance {i}" for i in range(n_appliances)],
+        'Rated Power (kW)': rng.choice([0.05, 0.1, 0.2, 0.75, 1.2, 1.75, 2.0], n_appliances),
+        'Priority Group': rng.integers(1, 6, n_appliances),
+        'Start': start.astype(float),
+        'End': ((start + duration) % 24).astype(float),
+    })
+
+
+def excess(hourly_df, threshold):
+    return np.maximum(hourly_df['Power (kW)'].to_numpy() - threshold, 0.0).sum()
+
+
+def assert_not_worse(optimal_cost, optimal_excess, greedy_cost, greedy_excess):
+    """The solver's objective (reported cost plus excess penalty) is at most the greedy one's."""
+    assert optimal_cost + EXCESS_PENALTY * optimal_excess <= greedy_cost + EXCESS_PENALTY * greedy_excess + 1e-9
+    if greedy_excess == 0:
+        assert optimal_cost <= greedy_cost
+
+
+@pytest.mark.parametrize('threshold', [2.0, 3.0, 5.0])
+def test_optimal_season_cost_is_not_above_greedy(threshold):
+    profiles = dict(zip(SEASONS, ElectricLoad.from_excel(LOAD_FILE)))
+    meteorological = dict(zip(SEASONS, MeteorologicalData.from_csv(MET_FILE)))
+    for season in SEASONS:
+        greedy, optimal = (EnergyAnalysis.analyze_season(profiles[season], meteorological[season], threshold, PEAK_HOURS, solver)
+                           for solver in ('greedy', 'optimal'))
+        assert_not_worse(optimal['shifted_cost'], excess(optimal['shifted_hourly'], threshold),
+                         greedy['shifted_cost'], excess(greedy['shifted_hourly'], threshold))
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_optimal_shift_is_not_above_greedy(seed):
+    profile = random_profile(12, seed)
+    threshold = 4.0
+    costs = {}
+    for solver in ('greedy', 'optimal'):
+        shifted = Calculations.shift_loads(profile.copy(), threshold, PEAK_HOURS, solver, time_budget=0.1)
+        hourly_df = Calculations.generate_hourly_profile(shifted)
+        costs[solver] = Calculations.calculate_energy_cost(hourly_df, PEAK_HOURS), excess(hourly_df, threshold)
+    assert_not_worse(*costs['optimal'], *costs['greedy'])
+
+
+def appliance(start, end, power=2.0):
+    return pd.DataFrame({'Name': ['Oven', 'Fridge'], 'Rated Power (kW)': [power, 0.1], 'Priority Group': [3, 1],
+                         'Start': [float(start), 0.0], 'End': [float(end), 24.0]})
+
+
+@pytest.mark.parametrize('peak_hours, start, end, shifted', [
+    (list(range(17, 23)), 18, 20, (23, 1)),
+    (list(range(12, 15)), 13, 15, (15, 17)),
+    ([22, 23, 0, 1], 0, 1, (2, 3)),
+])
+def test_greedy_shift_moves_past_the_given_peak(peak_hours, start, end, shifted):
+    result = Calculations.shift_loads(appliance(start, end), 1.0, peak_hours)
+    assert tuple(result.loc[0, ['Start', 'End']]) == shifted
+    assert tuple(result.loc[1, ['Start', 'End']]) == (0.0, 24.0)
+
+
+def test_greedy_shift_without_off_peak_hours_keeps_the_profile():
+    result = Calculations.shift_loads(appliance(18, 20), 1.0, list(range(24)))
+    assert tuple(result.loc[0, ['Start', 'End']]) == (18.0, 20.0)
+
+
+def reference_greedy_shift(profile_df, threshold, peak_hours):
+    """The greedy shift before the running load array, re-summing the profile after every move."""
+    def total_load(hour):
+        return round(sum(load['Rated Power (kW)'] for load in profile_df.to_dict(orient='records')
+                         if load['Start'] <= hour < load['End']), 3)
+
+    shifted = set()
+    sorted_profile = profile_df.sort_values(by="Priority Group", ascending=False, kind="stable")
+    for hour in peak_hours:
+        if total_load(hour) - threshold <= 0:
+            continue
+        candidates = [(index, row['Name'], row['Rated Power (kW)']) for index, row in sorted_profile.iterrows()
+                      if row['Priority Group'] != 1 and row['Rated Power (kW)'] != 0 and "Battery Discharge" not in row['Name']
+                      and not (row['Start'] == 0 and row['End'] == 24) and row['Start'] <= hour < row['End']]
+        for index, name, _ in sorted(candidates, key=lambda candidate: candidate[2], reverse=True):
+            if name in shifted:
+                continue
+            shift_start = (peak_hours[-1] + 1) % 24
+            shift_end = (shift_start + (int(profile_df.at[index, 'End']) - int(profile_df.at[index, 'Start']))) % 24
+            profile_df.at[index, 'Start'], profile_df.at[index, 'End'] = shift_start, shift_end
+            shifted.add(name)
+            if total_load(hour) <= threshold:
+                break
+    return profile_df
+
+
+@pytest.mark.parametrize('seed', range(8))
+@pytest.mark.parametrize('threshold', [1.0, 3.0])
+def test_greedy_shift_matches_re_summing_shift(seed, threshold):
+    profile = random_profile(30, seed)
+    discharge_hours = [18, 19, 20]
+    profile = pd.concat([profile, pd.DataFrame({
+        'Name': [f"Battery Discharge (Hour {hour})" for hour in discharge_hours],
+        'Rated Power (kW)': [-0.5, -0.25, -1.0], 'Priority Group': 0,
+        'Start': [float(hour) for hour in discharge_hours], 'End': [hour + 1.0 for hour in discharge_hours],
+    })], ignore_index=True)
+
+    expected = reference_greedy_shift(profile.copy(), threshold, PEAK_HOURS)
+    result = Calculations.shift_loads(profile.copy(), threshold, PEAK_HOURS)
+    np.testing.assert_array_equal(result['Start'].to_numpy(dtype=float), expected['Start'].to_numpy(dtype=float))
+    np.testing.assert_array_equal(result['End'].to_numpy(dtype=float), expected['End'].to_numpy(dtype=float))
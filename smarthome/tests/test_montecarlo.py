@@ -0,0 +1,63 @@
+"""
+Checks of the Monte Carlo engine: draws are reproducible from the seed, every scenario is
+evaluated on the same draws, and draws without jitter are the deterministic day.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules.analysis import SEASON_MONTHS
+from modules.calculations import Calculations
+from modules.load_kernel import table_load
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from modules.montecarlo import MonteCarlo
+from modules.sweep import BatterySweep
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    winter, _ = ElectricLoad.from_excel(LOAD_FILE)
+    return winter, MeteorologicalData.read_hourly(MET_FILE)
+
+
+def simulate(inputs, parameters_df, **kwargs):
+    profile, hourly_met_df = inputs
+    return MonteCarlo.simulate(profile, hourly_met_df, parameters_df, PEAK_HOURS, SEASON_MONTHS['winter'],
+                               n_draws=200, threshold=3.0, **kwargs)
+
+
+def test_same_seed_gives_the_same_draws(inputs):
+    parameters_df = BatterySweep.grid(capacity=[2.0, 4.0])
+    first, second = simulate(inputs, parameters_df, seed=7), simulate(inputs, parameters_df, seed=7)
+    for name in ('original_cost', 'original_peak', 'battery_cost', 'battery_peak'):
+        np.testing.assert_array_equal(first[name], second[name])
+    pd.testing.assert_frame_equal(MonteCarlo.summarize(first), MonteCarlo.summarize(second))
+
+    other = simulate(inputs, parameters_df, seed=8)
+    assert not np.array_equal(first['original_cost'], other['original_cost'])
+
+
+def test_scenarios_share_their_draws(inputs):
+    single = simulate(inputs, BatterySweep.grid(capacity=[4.0]), seed=3)
+    several = simulate(inputs, BatterySweep.grid(capacity=[2.0, 4.0, 4.0]), seed=3)
+    # Adding scenarios does not change the draws of the others
+    np.testing.assert_array_equal(several['original_cost'], single['original_cost'])
+    np.testing.assert_array_equal(several['battery_cost'][1], single['battery_cost'][0])
+    np.testing.assert_array_equal(several['battery_cost'][2], several['battery_cost'][1])
+
+    comparison = MonteCarlo.compare(several, baseline=1)
+    assert comparison['Cost Difference Mean'].iloc[2] == 0 and comparison['Std Error (common draws)'].iloc[2] == 0
+    assert comparison['Std Error (common draws)'].iloc[0] < comparison['Std Error (independent draws)'].iloc[0]
+
+
+def test_draws_without_jitter_are_the_deterministic_day(inputs):
+    profile, _ = inputs
+    simulation = simulate(inputs, BatterySweep.grid(capacity=[4.0]), seed=0, start_sigma=0.0, duration_sigma=0.0)
+    load = table_load(profile)
+    np.testing.assert_allclose(simulation['original_cost'], load @ Calculations.hourly_tariffs(PEAK_HOURS))
+    np.testing.assert_array_equal(simulation['original_peak'], load.max())
@@ -0,0 +1,58 @@
+"""
+Checks of the rolling-horizon dispatch: with perfect forecasts it never costs more than the
+fixed rules under the tariff it plans against.
+"""
+
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules.analysis import EnergyAnalysis
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from modules.mpc import MPCDispatch
+from modules.tariff import Tariff, TariffMatrix
+from modules.time_grid import HOURLY, TimeGrid
+
+PEAK_HOURS = list(range(17, 23))
+
+# Expensive afternoons on every day and a weekday evening peak
+AFTERNOON = (Tariff('afternoon', 0.1).with_rates(0.45, hours=range(14, 17))
+             .with_rates(0.2, hours=range(17, 23), weekdays=range(5)))
+
+
+@pytest.fixture(scope='module')
+def seasons():
+    return list(zip(ElectricLoad.from_excel(LOAD_FILE), MeteorologicalData.from_csv(MET_FILE)))
+
+
+@pytest.mark.parametrize('threshold', [1.0, 3.0])
+@pytest.mark.parametrize('grid', [HOURLY, TimeGrid(15)])
+def test_mpc_season_cost_is_not_above_rules(seasons, threshold, grid):
+    for profile, meteorological in seasons:
+        rules, mpc = (EnergyAnalysis.analyze_season(profile, meteorological, threshold, PEAK_HOURS, grid=grid, mpc=dispatch)
+                      for dispatch in (None, MPCDispatch()))
+        assert mpc['battery_cost'] <= rules['battery_cost']
+
+
+def test_mpc_plans_against_its_tariff(seasons):
+    matrix = TariffMatrix.day([AFTERNOON])
+    costs = {}
+    for name, dispatch in [('rules', None), ('default', MPCDispatch()), ('afternoon', MPCDispatch(tariff=AFTERNOON))]:
+        costs[name] = sum(matrix.cost(EnergyAnalysis.analyze_season(profile, meteorological, 3.0, PEAK_HOURS, mpc=dispatch)
+                                      ['battery_hourly']['Power (kW)'].to_numpy())[0]
+                          for profile, meteorological in seasons)
+    assert costs['afternoon'] <= costs['rules']
+    assert costs['afternoon'] < costs['default']
+
+
+def test_mpc_year_cost_is_not_above_rules():
+    profiles = EnergyAnalysis.read_load_profile(LOAD_FILE)
+    hourly_met_df = MeteorologicalData.read_hourly(MET_FILE)
+    rules = EnergyAnalysis.analyze_year(profiles, hourly_met_df, 3.0, PEAK_HOURS)
+    mpc = EnergyAnalysis.analyze_year(profiles, hourly_met_df, 3.0, PEAK_HOURS, mpc=MPCDispatch())
+    assert mpc['battery_cost'] <= rules['battery_cost']
+
+
+def test_planning_tariff_is_part_of_the_stored_key():
+    assert MPCDispatch().to_dict() != MPCDispatch(tariff=AFTERNOON).to_dict()
+    assert MPCDispatch(tariff=AFTERNOON).to_dict() != MPCDispatch(tariff=AFTERNOON.with_rates(0.5, hours=[15])).to_dict()
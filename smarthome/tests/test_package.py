@@ -0,0 +1,25 @@
+"""
+Checks that the analysis package imports from the repository root as smarthome.modules,
+without the GUI or plotting packages.
+"""
+
+import os
+import subprocess
+import sys
+
+from conftest import LOAD_FILE, MET_FILE, ROOT
+
+SCRIPT = """
+import sys
+from smarthome.modules import EnergyAnalysis
+results = EnergyAnalysis.analyze_household({load!r}, {met!r}, 3.0)
+print(sorted(results), [name for name in ('tkinter', 'matplotlib') if name in sys.modules])
+"""
+
+
+def test_analysis_imports_from_the_repository_root():
+    repository = os.path.dirname(ROOT)
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+    completed = subprocess.run([sys.executable, '-c', SCRIPT.format(load=LOAD_FILE, met=MET_FILE)],
+                               cwd=repository, env=env, capture_output=True, text=True, check=True)
+    assert completed.stdout.splitlines()[-1] == "['summer', 'winter'] []"
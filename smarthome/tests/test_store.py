@@ -0,0 +1,76 @@
+"""
+Checks of the result store: a stored run reads back as computed, and a run is recomputed once its
+input files, its parameters or the version of the analysis change.
+"""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules import store as store_module
+from modules.analysis import EnergyAnalysis
+from modules.store import ResultStore
+from modules.time_grid import HOURLY
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture
+def store(tmp_path):
+    result_store = ResultStore(str(tmp_path / 'results.sqlite'))
+    yield result_store
+    result_store.close()
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """Copies of the bundled inputs, so the tests can edit them."""
+    load_file, met_file = tmp_path / 'load.xlsx', tmp_path / 'met.csv'
+    shutil.copy(LOAD_FILE, load_file)
+    shutil.copy(MET_FILE, met_file)
+    return str(load_file), str(met_file)
+
+
+def lookup(store, load_file, met_file, threshold=3.0, solver='greedy'):
+    return EnergyAnalysis.lookup(store, load_file, met_file, threshold, PEAK_HOURS, solver, HOURLY)
+
+
+def test_stored_run_reads_back_as_computed(store, inputs):
+    computed = EnergyAnalysis.analyze_household(*inputs, 3.0, PEAK_HOURS, store=store)
+    key, stored = lookup(store, *inputs)
+    assert stored is not None and list(stored) == list(computed)
+    for season, result in computed.items():
+        for name in store_module.COSTS:
+            assert stored[season][name] == result[name]
+        for name in store_module.FRAMES:
+            pd.testing.assert_frame_equal(stored[season][name], result[name], check_dtype=False)
+
+    # A later analysis reads the stored run instead of recomputing it
+    again = EnergyAnalysis.analyze_household(*inputs, 3.0, PEAK_HOURS, store=store)
+    assert [result['shifted_cost'] for result in again.values()] == [result['shifted_cost'] for result in computed.values()]
+    assert store.runs()['Hits'].max() >= 2
+
+
+def test_changed_inputs_or_parameters_miss(store, inputs, tmp_path):
+    load_file, met_file = inputs
+    EnergyAnalysis.analyze_household(load_file, met_file, 3.0, PEAK_HOURS, store=store)
+
+    # A renamed copy has the same content and still hits
+    copy = str(tmp_path / 'renamed.csv')
+    shutil.copy(met_file, copy)
+    assert lookup(store, load_file, copy)[1] is not None
+
+    assert lookup(store, load_file, met_file, threshold=2.0)[1] is None
+    assert lookup(store, load_file, met_file, solver='optimal')[1] is None
+
+    with open(met_file, 'a') as f:
+        f.write('\n')
+    assert lookup(store, load_file, met_file)[1] is None
+
+
+def test_runs_of_another_version_are_not_returned(store, inputs, monkeypatch):
+    EnergyAnalysis.analyze_household(*inputs, 3.0, PEAK_HOURS, store=store)
+    monkeypatch.setattr(store_module, 'STORE_VERSION', store_module.STORE_VERSION + 1)
+    assert lookup(store, *inputs)[1] is None
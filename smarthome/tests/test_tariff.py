@@ -0,0 +1,102 @@
+"""
+Checks of the tariff model: the default tariff keeps the costs of the fixed-rate calculation it
+replaced, and compiled tariffs price imports, exports and demand as their definitions say.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import LOAD_DIR, MET_FILE
+from modules.analysis import EnergyAnalysis
+from modules.calculations import Calculations
+from modules.tariff import Tariff, TariffMatrix
+from modules.time_grid import TimeGrid
+
+PEAK_HOURS = list(range(17, 23))
+
+# Seasonal costs (original, battery, shifted) of the bundled households with the greedy solver,
+# from the analysis before the tariff model, which priced every hour linearly at fixed rates
+BASELINE_COSTS = {
+    ('load_profile_v1.xlsx', 1.0): {'winter': (13.12, 12.59, 7.92), 'summer': (16.2, 15.54, 8.83)},
+    ('load_profile_v1.xlsx', 2.0): {'winter': (13.12, 12.59, 7.92), 'summer': (16.2, 15.54, 9.27)},
+    ('load_profile_v1.xlsx', 3.0): {'winter': (13.12, 12.59, 8.46), 'summer': (16.2, 15.54, 9.63)},
+    ('load_profile_v1.xlsx', 5.0): {'winter': (13.12, 12.59, 11.25), 'summer': (16.2, 15.54, 11.08)},
+    ('load_profile_v3.xlsx', 1.0): {'winter': (13.3, 12.77, 8.1), 'summer': (16.2, 15.56, 8.89)},
+    ('load_profile_v3.xlsx', 2.0): {'winter': (13.3, 12.77, 8.1), 'summer': (16.2, 15.56, 9.33)},
+    ('load_profile_v3.xlsx', 3.0): {'winter': (13.3, 12.77, 8.64), 'summer': (16.2, 15.56, 9.69)},
+    ('load_profile_v3.xlsx', 5.0): {'winter': (13.3, 12.77, 11.44), 'summer': (16.2, 15.56, 11.89)},
+}
+
+
+def linear_cost(load, peak_hours):
+    """Cost of an hourly day at the fixed peak, mid-peak and off-peak rates, exports included."""
+    rates = np.full(24, 0.1)
+    rates[6:17] = 0.2
+    rates[peak_hours] = 0.3
+    return round(float(np.cumsum(load * rates)[-1]), 2)
+
+
+@pytest.mark.parametrize('load_name, threshold', sorted(BASELINE_COSTS))
+def test_default_tariff_keeps_baseline_seasonal_costs(load_name, threshold):
+    results = EnergyAnalysis.analyze_household(os.path.join(LOAD_DIR, load_name), MET_FILE, threshold, PEAK_HOURS)
+    for season, expected in BASELINE_COSTS[load_name, threshold].items():
+        result = results[season]
+        assert (result['original_cost'], result['battery_cost'], result['shifted_cost']) == expected
+
+
+def test_default_tariff_credits_negative_load_at_the_import_rate():
+    load = np.linspace(-1.5, 2.5, 24)
+    hourly_df = pd.DataFrame({'Power (kW)': load})
+    assert Calculations.calculate_energy_cost(hourly_df, PEAK_HOURS) == linear_cost(load, PEAK_HOURS)
+
+    matrix = TariffMatrix.day([Calculations.default_tariff(PEAK_HOURS)])
+    assert matrix.cost(load)[0] == pytest.approx(load @ Calculations.hourly_tariffs(PEAK_HOURS))
+
+
+def test_export_and_demand_rates():
+    tariff = (Tariff('tou', 0.1, export_rates=0.05, demand_charge=2.0, demand_hours=range(17, 23))
+              .with_rates(0.3, hours=range(17, 23)))
+    load = np.zeros(24)
+    load[3], load[12], load[18] = -2.0, 1.0, 4.0
+
+    expected = 1.0 * 0.1 + 4.0 * 0.3 - 2.0 * 0.05 + 2.0 * 4.0
+    assert TariffMatrix.day([tariff]).cost(load)[0] == pytest.approx(expected)
+    assert Calculations.calculate_energy_cost(pd.DataFrame({'Power (kW)': load}), PEAK_HOURS, tariff=tariff) == round(expected, 2)
+
+
+def test_compiled_rates_follow_months_weekdays_and_hours():
+    tariff = Tariff.from_dict({
+        'name': 'seasonal', 'rate': 0.1,
+        'periods': [{'rate': 0.4, 'hours': [18], 'weekdays': [0, 1, 2, 3, 4]},
+                    {'rate': 0.5, 'hours': [14], 'months': [7]}],
+    })
+    times = pd.to_datetime(['2023-07-03 14:00', '2023-07-03 18:00', '2023-07-08 18:00', '2023-01-02 14:00'])
+    np.testing.assert_array_equal(tariff.prices(times), [0.5, 0.4, 0.1, 0.1])
+
+    # A representative day averages the hour over the selected weekdays
+    assert tariff.day_prices(months=[1])[18] == pytest.approx((5 * 0.4 + 2 * 0.1) / 7)
+    assert tariff.day_prices(months=[7], weekdays=[6])[14] == 0.5
+
+
+def test_batched_costs_match_single_costs():
+    rng = np.random.default_rng(3)
+    tariffs = [Calculations.default_tariff(PEAK_HOURS), Tariff('flat', 0.15, 0.05, 1.0)]
+    grid = TimeGrid(15)
+    matrix = TariffMatrix.day(tariffs, grid)
+    loads = rng.normal(1.0, 1.5, (50, grid.steps))
+
+    batched = matrix.cost(loads)
+    for i in (0, 17, 49):
+        np.testing.assert_array_equal(batched[i], matrix.cost(loads[i]))
+        np.testing.assert_array_equal(TariffMatrix.day(tariffs[1:], grid).cost(loads[i]), batched[i, 1:])
+
+
+def test_timeline_charges_demand_once_per_month():
+    times = pd.date_range('2023-01-31 00:00', periods=48, freq='h')
+    load = np.ones(48)
+    load[5], load[30] = 3.0, 5.0   # Peaks on January 31 and February 1
+    matrix = TariffMatrix.timeline([Tariff('demand', 0.0, demand_charge=1.0)], times)
+    assert matrix.cost(load)[0] == pytest.approx(3.0 + 5.0)
@@ -0,0 +1,70 @@
+"""
+Checks of the time grid: the hourly grid gives exactly the results of the 24-slot profiles and
+hourly battery rules, and a finer grid spreads whole-hour profiles evenly over its steps.
+"""
+
+import numpy as np
+import pytest
+
+from conftest import LOAD_FILE, MET_FILE
+from modules.analysis import EnergyAnalysis
+from modules.appliances import ApplianceTable
+from modules.calculations import Calculations
+from modules.load_kernel import point_load, table_load
+from modules.load_profile import ElectricLoad
+from modules.met_data import MeteorologicalData
+from modules.time_grid import HOURLY, TimeGrid
+from test_dispatch import reference_dispatch
+from test_load_kernel import random_profile
+
+PEAK_HOURS = list(range(17, 23))
+
+
+@pytest.fixture(scope='module')
+def seasons():
+    return list(zip(ElectricLoad.from_excel(LOAD_FILE), MeteorologicalData.from_csv(MET_FILE)))
+
+
+def test_hourly_grid_matches_24_slot_kernels():
+    profile = random_profile(30, 1)
+    np.testing.assert_array_equal(HOURLY.table_load(profile), table_load(profile))
+    np.testing.assert_array_equal(HOURLY.point_load([3, 17, 17], [1.0, 0.5, 0.25]), point_load([3, 17, 17], [1.0, 0.5, 0.25]))
+    np.testing.assert_array_equal(HOURLY.hour_mask(PEAK_HOURS), np.isin(np.arange(24), PEAK_HOURS))
+    np.testing.assert_array_equal(HOURLY.hours, np.arange(24))
+    assert HOURLY.step_hours == 1.0 and TimeGrid(60) == HOURLY
+
+
+def test_hourly_battery_matches_hourly_rules(seasons):
+    for profile, meteorological in seasons:
+        load = table_load(profile)
+        battery = EnergyAnalysis.create_battery(load.max())
+        initial_soc = battery.soc
+        table, soc_df = battery.simulate_battery(profile, meteorological, 2.0, PEAK_HOURS)
+
+        expected_soc, expected_discharge = reference_dispatch(
+            load, MeteorologicalData.irradiance_vector(meteorological), 2.0, battery.capacity, battery.charge_rate,
+            battery.discharge_rate, initial_soc, battery.panel_area, battery.panel_efficiency)
+        np.testing.assert_allclose(soc_df['State of Charge (%)'].to_numpy(), expected_soc, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(point_load(table.discharge_start, table.discharge_power), expected_discharge, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('step_minutes', [5, 15, 30])
+def test_finer_grid_repeats_whole_hour_profiles(seasons, step_minutes):
+    grid = TimeGrid(step_minutes)
+    tariff = Calculations.default_tariff(PEAK_HOURS)
+    for profile, _ in seasons:
+        hourly = table_load(profile)
+        fine = grid.table_load(profile)
+        np.testing.assert_array_equal(fine, np.repeat(hourly, grid.steps_per_hour))
+        # The same energy at the same rates; only the order of the sum differs
+        assert tariff.day_cost(fine, grid) == pytest.approx(tariff.day_cost(hourly), abs=1e-9)
+
+
+def test_finer_grid_places_partial_hours():
+    grid = TimeGrid(15)
+    profile = ApplianceTable.of(random_profile(1, 0).assign(**{'Start': 17.5, 'End': 18.25, 'Rated Power (kW)': 2.0}))
+    load = grid.table_load(profile)
+    assert np.flatnonzero(load).tolist() == [70, 71, 72]
+    assert Calculations.calculate_energy_cost(Calculations.generate_hourly_profile(profile, grid), PEAK_HOURS, grid) == round(2.0 * 0.75 * 0.3, 2)
+    with pytest.raises(ValueError):
+        TimeGrid(7)